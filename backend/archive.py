@@ -0,0 +1,171 @@
+"""Time-partitioned archival of old documents and batched pruning of expired ones.
+
+``MonthlyArchiver`` moves documents older than ``max_age`` out of a hot
+collection into per-month archive collections, named like
+``job_applications_archive_2024_03``. Documents move in batches:
+
+1. Insert the batch into its month's archive, keeping ``_id``. A rerun
+   after a crash hits duplicate keys, which are ignored.
+2. Delete the same ``_id`` values from the hot collection.
+
+So a document is never lost, and at worst it is briefly in both places.
+Hot queries then only scan recent data. Archives are read only when a
+caller asks for them (``find_archived``). Only the months that can match
+the filter's range on ``field`` are queried. The list of archive
+collections is cached for ``refresh_interval`` seconds, so months created
+by another worker show up within that window.
+
+``prune_expired`` deletes expired documents (e.g. sessions) a batch at a
+time, pausing between batches so it never holds a long write burst.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from itertools import groupby
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+_DUPLICATE_KEY = 11000
+
+
+def _month(value):
+    return value.strftime("%Y_%m")
+
+
+class MonthlyArchiver:
+    def __init__(self, collection, field, max_age, batch_size=1000, indexes=(), refresh_interval=60.0):
+        self.collection = collection
+        self.field = field
+        self.max_age = max_age
+        self.batch_size = batch_size
+        self.indexes = indexes
+        self.refresh_interval = refresh_interval
+        self.prefix = f"{collection.name}_archive_"
+        self._known = None
+        self._listed_at = None
+
+    @property
+    def enabled(self):
+        return self.max_age is not None and self.max_age > timedelta(0)
+
+    def archive_names(self):
+        """Archive collections, newest month first."""
+        # Other workers may have created new months since the last listing
+        if self._known is None or time.monotonic() - self._listed_at > self.refresh_interval:
+            names = [name for name in self.collection.database.list_collection_names()
+                     if name.startswith(self.prefix)]
+            self._known = sorted(names, reverse=True)
+            self._listed_at = time.monotonic()
+        return self._known
+
+    def _archive(self, month):
+        name = self.prefix + month
+        archive = self.collection.database[name]
+        if name not in (self._known or []):
+            for index in self.indexes:
+                archive.create_index(index)
+            self._known = sorted(set(self.archive_names()) | {name}, reverse=True)
+        return archive
+
+    def archive_once(self, now=None):
+        """Move one batch of old documents; returns how many were moved."""
+        cutoff = (now or datetime.utcnow()) - self.max_age
+        batch = list(self.collection.find({self.field: {"$lt": cutoff}})
+                     .sort(self.field, 1).limit(self.batch_size))
+        if not batch:
+            return 0
+        for month, docs in groupby(batch, key=lambda doc: _month(doc[self.field])):
+            docs = list(docs)
+            try:
+                self._archive(month).insert_many(docs, ordered=False)
+            except BulkWriteError as e:
+                if any(error["code"] != _DUPLICATE_KEY for error in e.details.get("writeErrors", [])):
+                    raise
+        self.collection.delete_many({"_id": {"$in": [doc["_id"] for doc in batch]}})
+        return len(batch)
+
+    def archive(self, now=None, pause=0.05):
+        moved = 0
+        if not self.enabled:
+            return moved
+        while True:
+            count = self.archive_once(now)
+            moved += count
+            if count < self.batch_size:
+                return moved
+            time.sleep(pause)
+
+    def _months(self, filter):
+        """The first and last month (``YYYY_MM``) ``filter`` can match on ``field``; None when unbounded."""
+        bounds = filter.get(self.field)
+        if not isinstance(bounds, dict):
+            return (_month(bounds),) * 2 if isinstance(bounds, datetime) else (None, None)
+        lower = bounds.get("$gte", bounds.get("$gt"))
+        upper = bounds.get("$lte", bounds.get("$lt"))
+        return (_month(lower) if isinstance(lower, datetime) else None,
+                _month(upper) if isinstance(upper, datetime) else None)
+
+    def find_archived(self, filter, projection=None, oldest_first=False):
+        """Matching archived documents, newest first unless ``oldest_first``, marked ``archived: True``."""
+        first, last = self._months(filter)
+        names = [name for name in self.archive_names()
+                 if (first is None or name[len(self.prefix):] >= first)
+                 and (last is None or name[len(self.prefix):] <= last)]
+        direction = 1 if oldest_first else -1
+        for name in (reversed(names) if oldest_first else names):
+            for doc in self.collection.database[name].find(filter, projection).sort(self.field, direction):
+                doc["archived"] = True
+                yield doc
+
+
+def prune_expired(collection, field="expires_at", batch_size=1000, pause=0.05, now=None):
+    """Delete documents whose ``field`` is in the past, ``batch_size`` at a time."""
+    removed = 0
+    while True:
+        ids = [doc["_id"] for doc in collection.find({field: {"$lt": now or datetime.utcnow()}}, {"_id": 1})
+               .limit(batch_size)]
+        if not ids:
+            return removed
+        removed += collection.delete_many({"_id": {"$in": ids}}).deleted_count
+        if len(ids) < batch_size:
+            return removed
+        time.sleep(pause)
+
+
+class Maintenance:
+    """Runs ``jobs`` (name -> blocking callable) every ``interval`` seconds in a worker thread."""
+
+    def __init__(self, jobs, interval=3600.0):
+        self.jobs = jobs
+        self.interval = interval
+        self._task = None
+
+    def run_once(self):
+        results = {}
+        for name, job in self.jobs.items():
+            started = time.perf_counter()
+            try:
+                results[name] = job()
+            except Exception as e:
+                logger.warning("Maintenance job %s failed: %s", name, e)
+                continue
+            if results[name]:
+                logger.info("Maintenance %s: %s in %.1f ms", name, results[name], (time.perf_counter() - started) * 1000)
+        return results
+
+    async def _run(self):
+        while True:
+            await asyncio.to_thread(self.run_once)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
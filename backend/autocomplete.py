@@ -0,0 +1,213 @@
+"""In-memory typeahead over career-path titles, skills and popular searches.
+
+``CompletionTrie`` is a character trie keyed on lowercased text. Every node
+caches its ``top_n`` best completions, so a lookup costs one walk down the
+prefix plus a copy of a short list. It does not depend on how many terms
+share the prefix. Multi-word terms are also indexed from each later word,
+so "learn" finds "Machine Learning".
+
+Terms can be added or re-weighted one at a time (``add``). Only the nodes
+on the term's paths are touched. Memory is bounded by ``max_terms``: past
+the limit, the lowest-weighted term is evicted, found through a min-heap of
+weights. ``Autocompleter`` keeps the static terms (career paths) and the
+dynamic ones (search popularity) separate, so a periodic full rebuild can
+swap in a fresh trie without blocking lookups. Query weights are the number
+of distinct clients (users, or addresses when signed out) that searched for
+them, not search counts. A query only becomes a suggestion once
+``min_count`` clients have searched for it, so one user's query (which may
+hold a name or an email address) is not offered to others however often
+they repeat it.
+"""
+import asyncio
+import heapq
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_MAX_WORD_STARTS = 4
+
+
+def _key(text):
+    return " ".join(text.lower().split())
+
+
+def _word_starts(key):
+    starts = [0] + [i + 1 for i, ch in enumerate(key) if ch == " "]
+    return starts[:_MAX_WORD_STARTS]
+
+
+class _Node:
+    __slots__ = ("children", "ends", "top")
+
+    def __init__(self):
+        self.children = {}
+        self.ends = set()  # keys whose indexed suffix ends at this node
+        self.top = []  # [(-weight, key)], best first
+
+
+class CompletionTrie:
+    def __init__(self, top_n=10, max_terms=20000):
+        self.top_n = top_n
+        self.max_terms = max_terms
+        self.root = _Node()
+        self.terms = {}  # key -> (weight, text, kind)
+        self._by_weight = []  # min-heap of (weight, key); entries whose weight changed are stale
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.terms)
+
+    def _paths(self, key):
+        """Nodes along each indexed suffix of ``key`` (the root excluded), created on demand."""
+        for start in _word_starts(key):
+            node, path = self.root, []
+            for ch in key[start:]:
+                node = node.children.setdefault(ch, _Node())
+                path.append(node)
+            yield path
+
+    def add(self, text, weight, kind):
+        key = _key(text)
+        if not key:
+            return
+        with self._lock:
+            previous = self.terms.get(key)
+            if previous is not None and previous[0] == weight:
+                return
+            self.terms[key] = (weight, previous[1] if previous else text, previous[2] if previous else kind)
+            for path in self._paths(key):
+                path[-1].ends.add(key)
+                for node in reversed(path):
+                    entries = [entry for entry in node.top if entry[1] != key]
+                    if previous is not None and len(entries) < len(node.top) and weight < previous[0]:
+                        # Demoted: something below the cut may now outrank it
+                        node.top = self._recompute(node)
+                    else:
+                        entries.append((-weight, key))
+                        entries.sort()
+                        node.top = entries[:self.top_n]
+            heapq.heappush(self._by_weight, (weight, key))
+            if len(self._by_weight) > 2 * len(self.terms) + 64:
+                self._by_weight = [(term[0], k) for k, term in self.terms.items()]
+                heapq.heapify(self._by_weight)
+            if len(self.terms) > self.max_terms:
+                self._evict_lowest()
+
+    def _recompute(self, node):
+        """Best completions of ``node`` from its own terms and its children's caches.
+
+        Children must already be up to date, so callers walk paths deepest first.
+        """
+        keys = set(node.ends)
+        for child in node.children.values():
+            keys.update(key for _, key in child.top)
+        ranked = [(-self.terms[key][0], key) for key in keys if key in self.terms]
+        return heapq.nsmallest(self.top_n, ranked)
+
+    def _evict_lowest(self):
+        while True:
+            weight, key = heapq.heappop(self._by_weight)
+            term = self.terms.get(key)
+            if term is not None and term[0] == weight:
+                break
+        del self.terms[key]
+        for start, path in zip(_word_starts(key), self._paths(key)):
+            path[-1].ends.discard(key)
+            for depth in range(len(path) - 1, -1, -1):
+                node = path[depth]
+                if any(entry[1] == key for entry in node.top):
+                    node.top = self._recompute(node)
+                if not node.children and not node.ends:
+                    # Prune branches that no longer lead to any term
+                    parent = path[depth - 1] if depth else self.root
+                    del parent.children[key[start + depth]]
+
+    def complete(self, prefix, limit=10):
+        node = self.root
+        for ch in _key(prefix):
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        results = []
+        for negative_weight, key in node.top[:limit]:
+            term = self.terms.get(key)
+            if term is not None:
+                results.append({"text": term[1], "type": term[2], "score": -negative_weight})
+        return results
+
+
+class Autocompleter:
+    """Typeahead over static career-path terms plus dynamically weighted search queries.
+
+    ``source()`` returns ``(career_paths, popular_queries)`` for a full rebuild.
+    Once started, that rebuild runs every ``interval`` seconds in a worker thread.
+    Queries searched for by fewer than ``min_count`` distinct clients are not suggested.
+    """
+
+    def __init__(self, source=None, interval=300.0, top_n=10, max_terms=20000, min_count=5):
+        self.source = source
+        self.interval = interval
+        self.top_n = top_n
+        self.max_terms = max_terms
+        self.min_count = min_count
+        self.static = {}
+        self.trie = CompletionTrie(top_n, max_terms)
+        self._task = None
+
+    def rebuild(self, career_paths, popular_queries):
+        """Build a fresh trie and swap it in; lookups keep using the old one meanwhile.
+
+        Career-path titles and skills get one point per career path that lists
+        them. Popular queries (``[(text, clients)]``) add their distinct-client
+        counts; those that match no static term need at least ``min_count``.
+        """
+        static = {}
+        for path in career_paths:
+            entries = [(path.get("title", ""), "career_path")] + [(skill, "skill") for skill in path.get("skills", [])]
+            for text, kind in entries:
+                key = _key(text)
+                if key:
+                    weight, _, _ = static.get(key, (0, text, kind))
+                    static[key] = (weight + 1, text, kind)
+        trie = CompletionTrie(self.top_n, self.max_terms)
+        for key, (weight, text, kind) in static.items():
+            trie.add(text, weight, kind)
+        for text, count in popular_queries:
+            self._observe(trie, static, text, count)
+        self.static, self.trie = static, trie
+
+    def observe(self, text, count):
+        """Incremental update: ``count`` distinct clients have searched for ``text``."""
+        self._observe(self.trie, self.static, text, count)
+
+    def _observe(self, trie, static, text, count):
+        key = _key(text)
+        if key in static:
+            weight, original, kind = static[key]
+            trie.add(original, weight + count, kind)
+        elif key and count >= self.min_count:
+            trie.add(text, count, "query")
+
+    def complete(self, prefix, limit=10):
+        return self.trie.complete(prefix, min(limit, self.top_n))
+
+    def refresh(self):
+        self.rebuild(*self.source())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.warning("Rebuilding autocomplete failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.source is not None and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,192 @@
+"""Static content (resume templates, job guidance) loaded from files, with hot reload.
+
+The catalog directory has one subdirectory per kind, and one JSON or YAML
+file per item::
+
+    data/catalog/resume_templates/software_engineer.json
+    data/catalog/job_guidance/interview_prep.json
+
+An item's ``id`` defaults to its file name. ``order`` sets the listing
+order, and ``category`` groups items. YAML needs PyYAML; without it, YAML
+files are skipped with a warning.
+
+``Catalog`` loads everything once into an immutable ``Snapshot``, indexed by
+id and category. Items are frozen too: mappings become ``MappingProxyType``
+and lists become tuples, so a reader cannot edit content shared by every
+request. Copy an item (``{**item}``) to change it.
+
+Readers just take ``catalog.snapshot``. ``start()`` runs the first load in a
+worker thread. After that, a background task polls file mtimes and sizes. It
+re-parses only the files that changed, then swaps in a new snapshot. A file
+that fails to parse keeps its previous contents, so a bad edit never empties
+the catalog. Two files of one kind with the same id are logged, and only the
+first (by path) is kept. ``Snapshot.version`` is a hash of every file's
+content, meant for cache keys and ETags.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from types import MappingProxyType
+
+try:
+    import yaml
+except ImportError:  # YAML content is optional
+    yaml = None
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = (".json", ".yaml", ".yml")
+
+
+def _parse(path, data):
+    if path.endswith(".json"):
+        return json.loads(data)
+    if yaml is None:
+        raise ValueError("PyYAML is not installed")
+    return yaml.safe_load(data)
+
+
+def _freeze(value):
+    """A read-only copy of parsed content: mappings as ``MappingProxyType``, lists as tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class Snapshot:
+    """One immutable version of the catalog."""
+
+    __slots__ = ("version", "_items", "_by_id", "_by_category")
+
+    def __init__(self, version, items):
+        self.version = version
+        items = {kind: [_freeze(item) for item in kind_items] for kind, kind_items in items.items()}
+        self._items = MappingProxyType({kind: tuple(kind_items) for kind, kind_items in items.items()})
+        self._by_id = MappingProxyType({
+            kind: MappingProxyType({item["id"]: item for item in kind_items}) for kind, kind_items in items.items()
+        })
+        by_category = {}
+        for kind, kind_items in items.items():
+            for item in kind_items:
+                by_category.setdefault(kind, {}).setdefault(item.get("category"), []).append(item)
+        self._by_category = MappingProxyType({
+            kind: MappingProxyType({category: tuple(group) for category, group in groups.items()})
+            for kind, groups in by_category.items()
+        })
+
+    def items(self, kind, category=None):
+        if category is None:
+            return self._items.get(kind, ())
+        return self._by_category.get(kind, {}).get(category, ())
+
+    def get(self, kind, item_id):
+        return self._by_id.get(kind, {}).get(item_id)
+
+    def categories(self, kind):
+        return sorted(category for category in self._by_category.get(kind, {}) if category is not None)
+
+
+class Catalog:
+    def __init__(self, directory, interval=2.0):
+        self.directory = directory
+        self.interval = interval
+        self._files = {}  # path -> (fingerprint, content hash, kind, item)
+        self._snapshot = Snapshot("", {})
+        self._lock = threading.Lock()
+        self._task = None
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    def _scan(self):
+        """``{path: (kind, (mtime_ns, size))}`` for every content file."""
+        found = {}
+        if not os.path.isdir(self.directory):
+            return found
+        for kind in sorted(os.listdir(self.directory)):
+            folder = os.path.join(self.directory, kind)
+            if not os.path.isdir(folder):
+                continue
+            for name in os.listdir(folder):
+                if name.endswith(EXTENSIONS) and not name.startswith("."):
+                    path = os.path.join(folder, name)
+                    stat = os.stat(path)
+                    found[path] = (kind, (stat.st_mtime_ns, stat.st_size))
+        return found
+
+    def reload(self):
+        """Re-read changed files and swap in a new snapshot; returns True when anything changed."""
+        with self._lock:
+            return self._reload()
+
+    def _reload(self):
+        found = self._scan()
+        files, changed = {}, set(self._files) - set(found)
+        for path, (kind, fingerprint) in found.items():
+            previous = self._files.get(path)
+            if previous is not None and previous[0] == fingerprint:
+                files[path] = previous
+                continue
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                item = _parse(path, data)
+                if not isinstance(item, dict):
+                    raise ValueError("expected a mapping at the top level")
+            except Exception as e:
+                logger.warning("Skipping catalog file %s: %s", path, e)
+                if previous is not None:
+                    # Keep the last good contents; the new fingerprint stops repeat warnings
+                    files[path] = (fingerprint,) + previous[1:]
+                continue
+            item.setdefault("id", os.path.splitext(os.path.basename(path))[0])
+            files[path] = (fingerprint, hashlib.sha256(data).hexdigest(), kind, item)
+            if previous is None or previous[1] != files[path][1]:
+                changed.add(path)
+        self._files = files
+        if not changed and self._snapshot.version:
+            return False
+
+        items, owners = {}, {}
+        for path in sorted(files):
+            _, _, kind, item = files[path]
+            owner = owners.setdefault((kind, str(item["id"])), path)
+            if owner != path:
+                logger.warning("Skipping catalog file %s: %s id %r is already used by %s", path, kind, item["id"], owner)
+                continue
+            items.setdefault(kind, []).append(item)
+        for kind_items in items.values():
+            kind_items.sort(key=lambda item: (item.get("order", float("inf")), str(item["id"])))
+        digest = hashlib.sha256()
+        for path in sorted(files):
+            digest.update(f"{os.path.relpath(path, self.directory)}\0{files[path][1]}\0".encode())
+        self._snapshot = Snapshot(digest.hexdigest()[:16], items)
+        logger.info("Content catalog loaded: version %s, %d files", self._snapshot.version, len(files))
+        return True
+
+    async def _run(self):
+        try:
+            await asyncio.to_thread(self.reload)
+        except Exception as e:
+            logger.warning("Loading the content catalog failed: %s", e)
+        while self.interval > 0:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.reload)
+            except Exception as e:
+                logger.warning("Reloading the content catalog failed: %s", e)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
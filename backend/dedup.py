@@ -0,0 +1,176 @@
+"""Near-duplicate detection for job listings with MinHash and LSH.
+
+A listing's signature is the MinHash of the word 3-shingles of its title,
+company and description. Location is left out on purpose, since the same
+posting often repeats for several cities. Two signatures agree in a given
+position with probability equal to the Jaccard similarity of the shingle
+sets.
+
+``LSHIndex`` splits each signature into ``bands`` bands of ``rows`` values
+and buckets listings by band. Only listings that share a bucket are
+compared, so a batch is deduplicated in roughly linear time, not pairwise.
+A candidate counts as a duplicate when its estimated similarity is at least
+``threshold`` and the Jaccard similarity of the two titles' word sets is at
+least ``title_threshold`` (case, punctuation and order ignored). So
+"Senior Data Engineer" matches "Data Engineer (Remote)", but "Data Analyst"
+does not. Distinct roles at one company often share most of their
+description boilerplate, so text similarity alone would merge them. With
+the defaults (32 bands x 2 rows), a pair at 0.6 similarity shares a bucket
+with probability above 99.9%. Unrelated listings rarely collide at all.
+
+``collapse`` keeps the first occurrence of each group, so upstream ranking
+is preserved, and tells how many listings were dropped. One index can be
+fed several batches (pages, sources) to deduplicate across them. A listing
+whose id is already indexed is the same listing shown again, not a
+duplicate, so repeating a search does not empty it. ``SessionIndexes``
+keeps one such index per session and query, bounded in both the number of
+indexes and the listings each one holds.
+"""
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+NUM_PERM = 64
+BANDS = 32
+THRESHOLD = 0.6
+TITLE_THRESHOLD = 0.6
+MAX_LISTINGS = 2000
+SHINGLE_SIZE = 3
+
+_WORD = re.compile(r"[a-z0-9]+")
+_rng = np.random.default_rng(0x5EED)
+# Multiply-shift hashing: (a * x + b) mod 2**64, top 32 bits. Overflow wraps on purpose
+_A = _rng.integers(1, 2**63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 2**63, size=NUM_PERM, dtype=np.uint64)
+
+
+def title_words(job):
+    """The title's words, lowercased: "Data Engineer (Remote)" and "remote data engineer" give the same set."""
+    return frozenset(_WORD.findall(str(job.get("title") or "").lower()))
+
+
+def title_similarity(a, b):
+    """Jaccard similarity of two title word sets; two empty titles are identical."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def listing_text(job):
+    return " ".join(str(job.get(field) or "") for field in ("title", "company", "description"))
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(text):
+    """A ``NUM_PERM``-value MinHash signature (uint32) of ``text``'s shingles."""
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles(text)), dtype=np.uint64)
+    if hashes.size == 0:
+        return np.full(NUM_PERM, np.iinfo(np.uint32).max, dtype=np.uint32)
+    with np.errstate(over="ignore"):
+        permuted = (_A[:, None] * hashes[None, :] + _B[:, None]) >> np.uint64(32)
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+class LSHIndex:
+    def __init__(self, bands=BANDS, threshold=THRESHOLD, title_threshold=TITLE_THRESHOLD, max_listings=None):
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self.threshold = threshold
+        self.title_threshold = title_threshold
+        self.max_listings = max_listings
+        self.lock = threading.Lock()
+        self._buckets = [{} for _ in range(bands)]
+        self._signatures = []
+        self._titles = []
+        self._ids = []
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def _keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    @property
+    def full(self):
+        return self.max_listings is not None and len(self) >= self.max_listings
+
+    def listing_id(self, position):
+        return self._ids[position]
+
+    def find(self, signature, title=frozenset()):
+        """Position of an indexed signature similar to ``signature`` with a similar ``title``, or None."""
+        seen = set()
+        for band, key in enumerate(self._keys(signature)):
+            for candidate in self._buckets[band].get(key, ()):
+                if candidate not in seen:
+                    seen.add(candidate)
+                    if (title_similarity(self._titles[candidate], title) >= self.title_threshold
+                            and similarity(self._signatures[candidate], signature) >= self.threshold):
+                        return candidate
+        return None
+
+    def add(self, signature, title=frozenset(), listing_id=None):
+        """Index a signature; once ``max_listings`` are held, new ones are only compared, not kept."""
+        if self.full:
+            return None
+        position = len(self._signatures)
+        self._signatures.append(signature)
+        self._titles.append(title)
+        self._ids.append(listing_id)
+        for band, key in enumerate(self._keys(signature)):
+            self._buckets[band].setdefault(key, []).append(position)
+        return position
+
+
+class SessionIndexes:
+    """One ``LSHIndex`` per key (e.g. client and query), least recently used dropped beyond ``max_keys``."""
+
+    def __init__(self, max_keys=1000, max_listings=MAX_LISTINGS):
+        self.max_keys = max_keys
+        self.max_listings = max_listings
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._indexes)
+
+    def get(self, key):
+        with self._lock:
+            index = self._indexes.pop(key, None)
+            if index is None:
+                index = LSHIndex(max_listings=self.max_listings)
+            self._indexes[key] = index
+            if len(self._indexes) > self.max_keys:
+                self._indexes.popitem(last=False)
+        return index
+
+
+def collapse(jobs, index=None):
+    """``(kept, collapsed)``: ``jobs`` without near-duplicates of earlier ones, and how many were dropped."""
+    index = LSHIndex() if index is None else index
+    kept, batch_ids = [], set()
+    with index.lock:
+        for job in jobs:
+            signature, title, job_id = minhash(listing_text(job)), title_words(job), job.get("id")
+            match = index.find(signature, title)
+            if match is not None and (not job_id or index.listing_id(match) != job_id or job_id in batch_ids):
+                continue
+            if match is None:
+                index.add(signature, title, job_id)
+            batch_ids.add(job_id)
+            kept.append(job)
+    return kept, len(jobs) - len(kept)
@@ -0,0 +1,153 @@
+"""Streaming exports of Mongo documents as CSV or NDJSON, optionally gzipped.
+
+Everything here is a generator, so memory stays constant: documents come
+off a batched cursor and are encoded row by row. Rows are coalesced into
+~64 KiB chunks and compressed incrementally. CSV cells that a spreadsheet
+would run as a formula (leading ``=``, ``+``, ``-``, ``@``, tab or carriage
+return) are prefixed with ``'``.
+
+``parallel_scan`` splits a date range into partitions and reads them on
+worker threads, each into a small bounded queue. Partitions are drained in
+order, so the output stays sorted by the range field while later
+partitions are already being fetched. When the consumer stops early (the
+client went away, or a scan failed), the producers are stopped and joined,
+and their cursors are closed.
+"""
+import csv
+import io
+import json
+import queue
+import threading
+import zlib
+from datetime import datetime
+
+CHUNK_SIZE = 64 * 1024
+JOIN_TIMEOUT = 5.0
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    value = _value(value)
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_lines(docs, fields):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for doc in docs:
+        writer.writerow([_csv_cell(doc.get(field)) for field in fields])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def ndjson_lines(docs, fields):
+    parts, size = [], 0
+    for doc in docs:
+        line = json.dumps({field: _value(doc.get(field)) for field in fields}) + "\n"
+        parts.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield "".join(parts)
+            parts, size = [], 0
+    yield "".join(parts)
+
+
+def encode(docs, fields, fmt, compress=False):
+    """Byte chunks of ``docs`` rendered as ``fmt`` (csv or ndjson), gzipped when ``compress``."""
+    lines = csv_lines(docs, fields) if fmt == "csv" else ndjson_lines(docs, fields)
+    chunks = (text.encode("utf-8") for text in lines if text)
+    return gzip_chunks(chunks) if compress else chunks
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def split_range(start, end, partitions):
+    """``partitions`` contiguous ``[lo, hi)`` datetime ranges covering ``[start, end)``."""
+    partitions = max(1, partitions)
+    step = (end - start) / partitions
+    bounds = [start + step * i for i in range(partitions)] + [end]
+    return [(bounds[i], bounds[i + 1]) for i in range(partitions) if bounds[i] < bounds[i + 1]] or [(start, end)]
+
+
+_DONE = object()
+
+
+def parallel_scan(collection, base_filter, field, start, end, partitions=4, projection=None,
+                  batch_size=1000, prefetch=2000):
+    """Documents with ``start <= doc[field] <= end`` (sorted by ``field``), read by ``partitions`` threads."""
+    ranges = split_range(start, end, partitions)
+    queues = [queue.Queue(maxsize=prefetch) for _ in ranges]
+    stop = threading.Event()
+
+    def put(index, item):
+        # Gives up once the consumer has stopped, so a full queue never blocks a producer for good
+        while not stop.is_set():
+            try:
+                queues[index].put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def scan(index, lo, hi):
+        last = index == len(ranges) - 1
+        bound = {"$gte": lo, "$lte" if last else "$lt": hi}
+        cursor = None
+        try:
+            cursor = (collection.find({**base_filter, field: bound}, projection)
+                      .sort(field, 1).batch_size(batch_size))
+            for doc in cursor:
+                if not put(index, doc):
+                    return
+        except Exception as e:
+            put(index, e)
+        else:
+            put(index, _DONE)
+        finally:
+            if cursor is not None:
+                cursor.close()
+
+    threads = [threading.Thread(target=scan, args=(i, lo, hi), daemon=True, name=f"export-scan-{i}")
+               for i, (lo, hi) in enumerate(ranges)]
+    for thread in threads:
+        thread.start()
+    try:
+        for partition in queues:
+            while True:
+                item = partition.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+    finally:
+        # Client went away or a scan failed: stop the producers and wait for them to close their cursors
+        stop.set()
+        for partition in queues:
+            while not partition.empty():
+                partition.get_nowait()
+        for thread in threads:
+            thread.join(JOIN_TIMEOUT)
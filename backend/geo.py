@@ -0,0 +1,135 @@
+"""Offline geocoding of free-form job locations against a bundled gazetteer.
+
+The gazetteer (``data/gazetteer.csv``) lists cities with their state,
+coordinates, population and aliases. ``Gazetteer.geocode`` turns strings
+such as "Austin, TX", "San Francisco, California" or
+"Remote / San Francisco" into a city match:
+
+* The location is split on "/", "|", ";" and " or " into candidates. The
+  first candidate that resolves wins.
+* "City, ST" or "City, State Name" prefers the city in that state. A bare
+  city name picks the most populous city with that name or alias.
+* Remote-only locations resolve to None; ``is_remote`` reports them.
+
+No network calls are made. Points are GeoJSON ``[longitude, latitude]``,
+ready for a Mongo ``2dsphere`` index. ``within_box`` and ``near`` build the
+matching bounding-box filter and radius ``$geoNear`` stage.
+"""
+import csv
+import re
+
+STATES = {
+    "AL": "Alabama", "AK": "Alaska", "AZ": "Arizona", "AR": "Arkansas", "CA": "California",
+    "CO": "Colorado", "CT": "Connecticut", "DE": "Delaware", "DC": "District of Columbia",
+    "FL": "Florida", "GA": "Georgia", "HI": "Hawaii", "ID": "Idaho", "IL": "Illinois",
+    "IN": "Indiana", "IA": "Iowa", "KS": "Kansas", "KY": "Kentucky", "LA": "Louisiana",
+    "ME": "Maine", "MD": "Maryland", "MA": "Massachusetts", "MI": "Michigan", "MN": "Minnesota",
+    "MS": "Mississippi", "MO": "Missouri", "MT": "Montana", "NE": "Nebraska", "NV": "Nevada",
+    "NH": "New Hampshire", "NJ": "New Jersey", "NM": "New Mexico", "NY": "New York",
+    "NC": "North Carolina", "ND": "North Dakota", "OH": "Ohio", "OK": "Oklahoma", "OR": "Oregon",
+    "PA": "Pennsylvania", "RI": "Rhode Island", "SC": "South Carolina", "SD": "South Dakota",
+    "TN": "Tennessee", "TX": "Texas", "UT": "Utah", "VT": "Vermont", "VA": "Virginia",
+    "WA": "Washington", "WV": "West Virginia", "WI": "Wisconsin", "WY": "Wyoming",
+}
+_STATE_CODES = {name.lower(): code for code, name in STATES.items()}
+_STATE_CODES.update({code.lower(): code for code in STATES})
+
+_SEPARATORS = re.compile(r"\s*(?:/|\||;|\bor\b)\s*", re.IGNORECASE)
+_REMOTE = re.compile(r"\b(remote|anywhere|work from home|wfh|telecommute|distributed)\b", re.IGNORECASE)
+_NOISE = re.compile(r"\b(greater|metro(politan)?|area|county|downtown|hybrid|onsite|on-site)\b", re.IGNORECASE)
+
+
+def _normalize(text):
+    return " ".join(re.sub(r"[^\w\s.'-]", " ", text.lower()).split())
+
+
+def is_remote(location):
+    return bool(location and _REMOTE.search(location))
+
+
+def point(latitude, longitude):
+    return {"type": "Point", "coordinates": [longitude, latitude]}
+
+
+def within_box(field, bbox):
+    """Filter for points in ``bbox`` (``[min_lon, min_lat, max_lon, max_lat]``)."""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    box = {"type": "Polygon", "coordinates": [[
+        [min_lon, min_lat], [max_lon, min_lat], [max_lon, max_lat], [min_lon, max_lat], [min_lon, min_lat]
+    ]]}
+    return {field: {"$geoWithin": {"$geometry": box}}}
+
+
+def near(field, latitude, longitude, radius_km, query=None):
+    """``$geoNear`` stage for points within ``radius_km``, nearest first, with ``distance_km`` set."""
+    return {"$geoNear": {
+        "near": point(latitude, longitude),
+        "key": field,
+        "distanceField": "distance_km",
+        "distanceMultiplier": 0.001,
+        "maxDistance": radius_km * 1000,
+        "spherical": True,
+        "query": query or {},
+    }}
+
+
+class Gazetteer:
+    def __init__(self, places):
+        self.places = places
+        self._by_name = {}
+        for place in places:
+            for name in [place["name"]] + place["aliases"]:
+                self._by_name.setdefault(_normalize(name), []).append(place)
+        for candidates in self._by_name.values():
+            candidates.sort(key=lambda place: -place["population"])
+
+    @classmethod
+    def from_csv(cls, path):
+        places = []
+        with open(path, encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                places.append({
+                    "name": row["name"],
+                    "state": row["state"],
+                    "latitude": float(row["latitude"]),
+                    "longitude": float(row["longitude"]),
+                    "population": int(row["population"] or 0),
+                    "aliases": [alias for alias in (row.get("aliases") or "").split("|") if alias],
+                })
+        return cls(places)
+
+    def _lookup(self, name, state=None):
+        candidates = self._by_name.get(_normalize(name), [])
+        if state is not None:
+            candidates = [place for place in candidates if place["state"] == state]
+        return candidates[0] if candidates else None
+
+    def _resolve(self, candidate):
+        place = self._lookup(candidate)
+        if place is not None:
+            return place
+        candidate = _NOISE.sub(" ", candidate).strip(" ,-")
+        if not candidate:
+            return None
+        place = self._lookup(candidate)
+        if place is not None:
+            return place
+        parts = [part.strip() for part in candidate.split(",") if part.strip()]
+        if len(parts) >= 2:
+            state = _STATE_CODES.get(_normalize(parts[1]))
+            place = self._lookup(parts[0], state) if state else None
+            if place is not None:
+                return place
+        return self._lookup(parts[0]) if parts else None
+
+    def geocode(self, location):
+        """The best gazetteer match for ``location``, or None (unknown or remote-only)."""
+        if not location:
+            return None
+        for candidate in _SEPARATORS.split(location):
+            if not candidate or _REMOTE.fullmatch(candidate.strip()):
+                continue
+            place = self._resolve(_REMOTE.sub(" ", candidate))
+            if place is not None:
+                return place
+        return None
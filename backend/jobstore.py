@@ -0,0 +1,212 @@
+"""Compact columnar storage for job listings held in memory.
+
+A list of job dicts costs a hash table per listing, plus a separate string
+object for every repeated company, location or job type. ``JobStore``
+keeps one column per field instead:
+
+* Low-cardinality fields (company, location, job_type, experience_level)
+  are dictionary-encoded. Each distinct value is stored once, and rows hold
+  a 32-bit code in an ``array``.
+* Everything else (id, title, description, apply_url, salary, posted_date)
+  is a list of strings. Salary and posted_date are near-unique per listing,
+  so a dictionary would only add a code per row. Titles are interned because
+  they repeat across searches.
+* ``fetched_at`` is an ``array('d')`` of epoch seconds.
+
+Rows are read through ``JobRecord`` views (``__slots__``, no per-row
+dict). Dicts and JSON are only built on demand by ``to_dict``/``to_json``.
+
+Run ``python jobstore.py --listings 50000`` to compare memory use with the
+list-of-dicts representation.
+"""
+import argparse
+import json
+import math
+import sys
+import tracemalloc
+from array import array
+from datetime import datetime, timezone
+
+TEXT_FIELDS = ("id", "title", "description", "apply_url", "salary", "posted_date")
+ENCODED_FIELDS = ("company", "location", "job_type", "experience_level")
+FIELDS = TEXT_FIELDS + ENCODED_FIELDS
+
+
+class _Dictionary:
+    """Dictionary encoding for one column: value <-> small integer code."""
+
+    __slots__ = ("values", "codes")
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class JobRecord:
+    """Read-only view of one row; attribute access reads straight from the columns."""
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    def __getattr__(self, field):
+        try:
+            return self._store.get(self._row, field)
+        except KeyError:
+            raise AttributeError(field) from None
+
+    def get(self, field, default=None):
+        value = self._store.get(self._row, field)
+        return default if value is None else value
+
+    def to_dict(self):
+        return self._store.to_dict(self._row)
+
+    def to_json(self):
+        return self._store.to_json(self._row)
+
+
+class JobStore:
+    def __init__(self, jobs=()):
+        self._text = {field: [] for field in TEXT_FIELDS}
+        self._dictionaries = {field: _Dictionary() for field in ENCODED_FIELDS}
+        self._codes = {field: array("I") for field in ENCODED_FIELDS}
+        self._fetched_at = array("d")
+        self.extend(jobs)
+
+    def __len__(self):
+        return len(self._fetched_at)
+
+    def __getitem__(self, row):
+        if not -len(self) <= row < len(self):
+            raise IndexError(row)
+        return JobRecord(self, row % len(self))
+
+    def __iter__(self):
+        return (JobRecord(self, row) for row in range(len(self)))
+
+    def append(self, job):
+        for field in TEXT_FIELDS:
+            value = job.get(field)
+            self._text[field].append(sys.intern(value) if field == "title" and value else value)
+        for field in ENCODED_FIELDS:
+            self._codes[field].append(self._dictionaries[field].encode(job.get(field)))
+        fetched_at = job.get("fetched_at")
+        self._fetched_at.append(fetched_at.replace(tzinfo=timezone.utc).timestamp() if fetched_at else math.nan)
+
+    def extend(self, jobs):
+        for job in jobs:
+            self.append(job)
+
+    def get(self, row, field):
+        if field in self._text:
+            return self._text[field][row]
+        if field in self._codes:
+            return self._dictionaries[field].values[self._codes[field][row]]
+        if field == "fetched_at":
+            timestamp = self._fetched_at[row]
+            return None if math.isnan(timestamp) else datetime.utcfromtimestamp(timestamp)
+        raise KeyError(field)
+
+    def column(self, field):
+        """All values of ``field`` (decoded), e.g. to vectorize titles in one pass."""
+        if field in self._text:
+            return list(self._text[field])
+        if field == "fetched_at":
+            return [self.get(row, field) for row in range(len(self))]
+        values = self._dictionaries[field].values
+        return [values[code] for code in self._codes[field]]
+
+    def ages_days(self, now):
+        """Age of every row in days (0 when unknown), as a plain list of floats."""
+        reference = now.replace(tzinfo=timezone.utc).timestamp()
+        return [0.0 if math.isnan(ts) else (reference - ts) / 86400 for ts in self._fetched_at]
+
+    def to_dict(self, row, fields=FIELDS):
+        return {field: self.get(row, field) for field in fields}
+
+    def to_json(self, row, fields=FIELDS):
+        return json.dumps(self.to_dict(row, fields))
+
+    def rows_json(self, rows, fields=FIELDS):
+        """A JSON array of the given rows, rendered without building the intermediate list."""
+        return "[" + ",".join(self.to_json(row, fields) for row in rows) + "]"
+
+    def cardinality(self):
+        return {field: len(dictionary.values) for field, dictionary in self._dictionaries.items()}
+
+
+def _sample_listings(count, seed=7):
+    """Listings shaped like search results, with realistic repetition of companies and locations."""
+    import random
+
+    rng = random.Random(seed)
+    companies = [f"Company {i}" for i in range(max(1, count // 40))]
+    locations = [f"City {i}, ST" for i in range(200)] + ["Remote"]
+    roles = ["Software Engineer", "Data Scientist", "Frontend Developer", "Security Analyst", "DevOps Engineer"]
+    now = datetime.utcnow()
+    listings = []
+    for i in range(count):
+        role = rng.choice(roles)
+        low = rng.randrange(40, 160) * 1000
+        listings.append({
+            "id": f"job_{i}",
+            "title": f"{rng.choice(['Junior', 'Senior', 'Lead', ''])} {role}".strip(),
+            "company": rng.choice(companies),
+            "location": rng.choice(locations),
+            "description": (f"{role} role #{i}: " + "build and ship reliable software with a friendly team. " * 6)[:300] + "...",
+            "salary": f"${low} - ${low + 30000}",
+            "job_type": rng.choice(["full_time", "part_time", "internship"]),
+            "experience_level": rng.choice(["entry", "mid", "senior"]),
+            "posted_date": f"2025-01-{rng.randrange(1, 29):02d}",
+            "apply_url": f"https://example.com/jobs/{i}",
+            "fetched_at": now,
+        })
+    return listings
+
+
+def _measure(build):
+    tracemalloc.start()
+    value = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, size
+
+
+def benchmark_memory(count):
+    """Bytes allocated for ``count`` listings as list-of-dicts vs. ``JobStore``."""
+    # JSON round-trip so the dicts own their strings, as they would after decoding a response
+    payload = json.dumps(_sample_listings(count), default=str)
+    dicts, dict_bytes = _measure(lambda: json.loads(payload))
+    for listing in dicts:
+        listing["fetched_at"] = datetime.fromisoformat(listing["fetched_at"])
+    store, store_bytes = _measure(lambda: JobStore(json.loads(payload, object_hook=_parse_fetched_at)))
+    return {
+        "listings": count,
+        "dict_bytes": dict_bytes,
+        "store_bytes": store_bytes,
+        "bytes_per_listing": {"dict": round(dict_bytes / count), "store": round(store_bytes / count)},
+        "ratio": round(store_bytes / dict_bytes, 3),
+        "cardinality": store.cardinality(),
+    }
+
+
+def _parse_fetched_at(obj):
+    if "fetched_at" in obj:
+        obj["fetched_at"] = datetime.fromisoformat(obj["fetched_at"])
+    return obj
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare job listing memory: list of dicts vs. JobStore")
+    parser.add_argument("--listings", type=int, default=50000)
+    print(json.dumps(benchmark_memory(parser.parse_args().listings), indent=2))
@@ -0,0 +1,177 @@
+"""Event-loop lag monitor and blocking-call detector.
+
+``LoopMonitor`` runs a probe coroutine that sleeps for ``interval`` seconds and
+records how late it wakes up in ``event_loop_lag_seconds``. A watchdog thread
+watches the probe's heartbeat. When the loop has been stuck for longer than
+``block_threshold``, the watchdog captures the loop thread's stack and logs
+the request handler and the call site that blocked it.
+
+Strict mode (``LOOP_STRICT=1``) is meant for development and tests. Mongo
+commands and outbound HTTP calls report themselves through
+``check_sync_io()``. Any that run on the event-loop thread are collected, and
+``StrictLoopMiddleware`` raises ``BlockingCallError`` before the response
+starts. Calls made while a response body streams can only fail the request
+after it has started.
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+from pymongo import monitoring
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+# Instrumentation modules are skipped when looking for the offending call site
+_INFRA_FILES = {
+    os.path.join(APP_DIR, name) for name in ("loopmon.py", "metrics.py", "tracing.py", "profiling.py", "mockmongo.py")
+}
+
+_violations = contextvars.ContextVar("loop_violations", default=None)
+
+
+class BlockingCallError(RuntimeError):
+    """Raised in strict mode when a request made synchronous I/O on the event loop."""
+
+
+def on_event_loop():
+    return asyncio._get_running_loop() is not None
+
+
+def check_sync_io(kind, detail):
+    """Record a synchronous I/O call if it is running on the event-loop thread."""
+    violations = _violations.get()
+    if violations is not None and on_event_loop():
+        frame = sys._getframe(1)
+        violations.append(f"{kind} {detail} in {_handler_frame(frame)} at {_app_call_site(frame)}")
+
+
+def _app_call_site(frame):
+    """Innermost frame belonging to application code rather than instrumentation."""
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename.startswith(APP_DIR) and filename not in _INFRA_FILES:
+            return f"{os.path.basename(filename)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+def _handler_frame(frame):
+    """Outermost application frame on the stack, i.e. the route handler."""
+    handler = None
+    while frame is not None:
+        if os.path.abspath(frame.f_code.co_filename) == os.path.join(APP_DIR, "server.py"):
+            handler = f"{frame.f_code.co_name} (server.py:{frame.f_lineno})"
+        frame = frame.f_back
+    return handler or "unknown"
+
+
+class LoopMonitor:
+    def __init__(self, interval=0.1, block_threshold=0.25):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id = None
+        self._task = None
+        self._stop = threading.Event()
+        self._watchdog = None
+
+    def start(self):
+        """Start probing the running loop; call from inside the loop (e.g. a startup event)."""
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._probe())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _probe(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - expected)
+            metrics.EVENT_LOOP_LAG.observe(lag)
+            self._heartbeat = time.monotonic()
+
+    def _watch(self):
+        reported_for = None
+        while not self._stop.wait(self.block_threshold / 2):
+            heartbeat = self._heartbeat
+            stalled = time.monotonic() - heartbeat - self.interval
+            if stalled < self.block_threshold or reported_for == heartbeat:
+                continue
+            reported_for = heartbeat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            handler, site = _handler_frame(frame), _app_call_site(frame)
+            metrics.EVENT_LOOP_BLOCKED.inc(handler.split(" ")[0])
+            logger.warning(
+                "Event loop blocked for %.0f ms in %s at %s\n%s",
+                stalled * 1000, handler, site, "".join(traceback.format_stack(frame)),
+            )
+
+
+def monitor_from_env():
+    return LoopMonitor(
+        interval=float(os.environ.get("LOOP_LAG_INTERVAL_MS", "100")) / 1000,
+        block_threshold=float(os.environ.get("LOOP_BLOCK_THRESHOLD_MS", "250")) / 1000,
+    )
+
+
+class StrictLoopMiddleware:
+    """Fails requests that performed synchronous I/O on the event-loop thread."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        violations = []
+        token = _violations.set(violations)
+
+        def error():
+            return BlockingCallError(
+                f"{scope['method']} {scope['path']} made blocking calls on the event loop: " + "; ".join(violations)
+            )
+
+        async def send_wrapper(message):
+            # Fail before the response starts, so the client gets a 500 instead of a normal-looking reply
+            if message["type"] == "http.response.start" and violations:
+                raise error()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _violations.reset(token)
+        if violations:
+            # Made while the body was streaming; the response has already started
+            raise error()
+
+
+class MongoBlockingCallDetector(monitoring.CommandListener):
+    """Reports Mongo commands issued from the event-loop thread."""
+
+    def started(self, event):
+        check_sync_io("mongo", event.command_name)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
@@ -0,0 +1,154 @@
+"""In-memory MongoDB (mongomock) that reports commands to pymongo listeners.
+
+mongomock never emits command-monitoring events. Under ``MONGO_URL=mongomock://``
+the metrics, tracing, strict-loop and query-watch listeners would see no
+database traffic at all. ``client(listeners)`` wraps the collection methods so
+each top-level call publishes a started event, then a succeeded or failed
+event, to ``listeners`` and to any globally registered listeners. As with the
+driver, ``find`` is reported when its cursor first fetches. Each event
+carries a command document shaped like the one the driver sends (``find`` with
+its ``filter``, ``update`` with ``updates[0].q`` and so on), so filter shapes
+and per-request counts match a real server. Calls made inside another call,
+such as ``find_one`` delegating to ``find``, are not reported again.
+"""
+import itertools
+import logging
+import threading
+import time
+from datetime import timedelta
+
+import mongomock
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+CONNECTION_ID = ("mongomock", 0)
+
+_request_ids = itertools.count(1)
+_nested = threading.local()
+_patched = False
+_EXHAUSTED = object()
+
+
+def _q(statement):
+    return {"q": statement or {}}
+
+
+# Collection method -> the command document a driver would send for it
+_COMMANDS = {
+    "find": lambda name, filter=None, *a, **k: {"find": name, "filter": filter or {}},
+    "find_one": lambda name, filter=None, *a, **k: {"find": name, "filter": filter or {}, "limit": 1},
+    "count_documents": lambda name, filter=None, *a, **k: {"count": name, "query": filter or {}},
+    "estimated_document_count": lambda name, *a, **k: {"count": name},
+    "distinct": lambda name, key=None, filter=None, *a, **k: {"distinct": name, "key": key, "query": filter or {}},
+    "aggregate": lambda name, pipeline=None, *a, **k: {"aggregate": name, "pipeline": list(pipeline or [])},
+    "insert_one": lambda name, *a, **k: {"insert": name},
+    "insert_many": lambda name, *a, **k: {"insert": name},
+    "update_one": lambda name, filter=None, *a, **k: {"update": name, "updates": [_q(filter)]},
+    "update_many": lambda name, filter=None, *a, **k: {"update": name, "updates": [_q(filter)]},
+    "replace_one": lambda name, filter=None, *a, **k: {"update": name, "updates": [_q(filter)]},
+    "bulk_write": lambda name, *a, **k: {"update": name, "updates": []},
+    "delete_one": lambda name, filter=None, *a, **k: {"delete": name, "deletes": [_q(filter)]},
+    "delete_many": lambda name, filter=None, *a, **k: {"delete": name, "deletes": [_q(filter)]},
+    "find_one_and_update": lambda name, filter=None, *a, **k: {"findAndModify": name, "query": filter or {}},
+    "find_one_and_replace": lambda name, filter=None, *a, **k: {"findAndModify": name, "query": filter or {}},
+    "find_one_and_delete": lambda name, filter=None, *a, **k: {"findAndModify": name, "query": filter or {}},
+    "create_index": lambda name, *a, **k: {"createIndexes": name},
+    "create_indexes": lambda name, *a, **k: {"createIndexes": name},
+    "drop": lambda name, *a, **k: {"drop": name},
+}
+
+
+def _publish(listeners, method, event):
+    for listener in listeners:
+        try:
+            getattr(listener, method)(event)
+        except Exception:
+            logger.exception("Command listener %r failed", listener)
+
+
+def _listeners(collection):
+    # vars(), not getattr(): mongomock resolves unknown attributes to sub-collections, so a
+    # client that was not built by client() would otherwise look like it has listeners.
+    listeners = vars(collection.database.client).get("_command_listeners")
+    if listeners is None or getattr(_nested, "depth", 0):
+        return None
+    return list(listeners) + list(monitoring._LISTENERS.command_listeners)
+
+
+def _run(listeners, database, command, call):
+    """``call()``, published to ``listeners`` as one command."""
+    request_id = next(_request_ids)
+    command_name = next(iter(command))
+    _publish(listeners, "started",
+             monitoring.CommandStartedEvent(command, database, request_id, CONNECTION_ID, request_id))
+    started = time.perf_counter()
+    _nested.depth = 1
+    try:
+        result = call()
+    except StopIteration:
+        result = _EXHAUSTED
+    except Exception as e:
+        duration = timedelta(seconds=time.perf_counter() - started)
+        _publish(listeners, "failed", monitoring.CommandFailedEvent(
+            duration, {"ok": 0, "errmsg": str(e)}, command_name, request_id, CONNECTION_ID, request_id))
+        raise
+    finally:
+        _nested.depth = 0
+    duration = timedelta(seconds=time.perf_counter() - started)
+    _publish(listeners, "succeeded", monitoring.CommandSucceededEvent(
+        duration, {"ok": 1}, command_name, request_id, CONNECTION_ID, request_id))
+    if result is _EXHAUSTED:
+        raise StopIteration
+    return result
+
+
+def _reported(method, build):
+    def wrapper(self, *args, **kwargs):
+        listeners = _listeners(self)
+        if listeners is None:
+            return method(self, *args, **kwargs)
+        command = build(self.name, *args, **kwargs)
+        return _run(listeners, self.database.name, command, lambda: method(self, *args, **kwargs))
+    return wrapper
+
+
+def _find(method, build):
+    # Like the driver, find() only builds a cursor; the command goes out on the first fetch
+    def wrapper(self, *args, **kwargs):
+        cursor = method(self, *args, **kwargs)
+        listeners = _listeners(self)
+        if listeners is not None:
+            cursor._pending_command = (listeners, self.database.name, build(self.name, *args, **kwargs))
+        return cursor
+    return wrapper
+
+
+def _next(method):
+    def wrapper(self):
+        pending = self.__dict__.pop("_pending_command", None)
+        if pending is None:
+            return method(self)
+        listeners, database, command = pending
+        return _run(listeners, database, command, lambda: method(self))
+    return wrapper
+
+
+def _patch():
+    global _patched
+    if _patched:
+        return
+    collection, cursor = mongomock.collection.Collection, mongomock.collection.Cursor
+    for name, build in _COMMANDS.items():
+        wrap = _find if name == "find" else _reported
+        setattr(collection, name, wrap(getattr(collection, name), build))
+    cursor.__next__ = cursor.next = _next(cursor.__next__)
+    _patched = True
+
+
+def client(event_listeners=()):
+    """A fresh in-memory client whose collection calls are reported to ``event_listeners``."""
+    _patch()
+    mock = mongomock.MongoClient()
+    mock._command_listeners = tuple(event_listeners)
+    return mock
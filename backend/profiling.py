@@ -0,0 +1,256 @@
+"""On-demand profiling of individual requests.
+
+A request is profiled when it carries ``X-Profile: <PROFILE_TOKEN>``, or when its
+route is listed in ``PROFILE_ROUTES`` and it wins the ``PROFILE_SAMPLE_RATE``
+draw. Requests that are not profiled only pay for a header lookup, and nothing
+at all when profiling is not configured.
+
+Two modes are supported:
+
+* ``sample`` (default): a background thread samples the Python stacks of
+  every busy thread every ``interval`` seconds. It writes collapsed stacks
+  (``<id>.folded``, flame-graph compatible) and a call tree.
+* ``cprofile``: deterministic cProfile of the event-loop thread. It writes
+  ``<id>.prof`` (pstats) and the top functions by cumulative time. cProfile
+  sees everything that runs on the loop thread, so other requests served
+  while the profiled one is in flight show up in its profile too. Profiled
+  requests are serialized so at least two profiles never overlap; for a
+  clean profile, send the request to an otherwise idle worker.
+
+Each profile also gets ``<id>.json`` with wall time, process CPU time and
+the call tree or function summary. Stopping the sampler and writing the
+artifacts happen in a worker thread, off the event loop.
+"""
+import asyncio
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from metrics import route_template
+
+PROFILE_ID_RE = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$")
+ARTIFACT_SUFFIXES = {"json": ".json", "folded": ".folded", "pstats": ".prof"}
+
+# Innermost frames that mean a thread is parked rather than doing work
+_IDLE_FRAMES = {
+    ("threading.py", "wait"), ("selectors.py", "select"), ("queue.py", "get"),
+    ("threading.py", "_wait_for_tstate_lock"), ("thread.py", "_worker"),
+}
+
+
+class StackSampler:
+    """Samples the stacks of all busy threads at a fixed interval."""
+
+    def __init__(self, interval=0.002, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.counts = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                key = ";".join(reversed(stack))
+                self.counts[key] = self.counts.get(key, 0) + 1
+            self.samples += 1
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.counts.items()))
+
+    def call_tree(self):
+        root = {"name": "root", "samples": 0, "children": {}}
+        for stack, count in self.counts.items():
+            node = root
+            node["samples"] += count
+            for frame in stack.split(";"):
+                node = node["children"].setdefault(frame, {"name": frame, "samples": 0, "children": {}})
+                node["samples"] += count
+
+        def freeze(node):
+            children = sorted(node["children"].values(), key=lambda child: -child["samples"])
+            return {"name": node["name"], "samples": node["samples"], "children": [freeze(c) for c in children]}
+
+        return freeze(root)
+
+
+class ProfileStore:
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, profile_id, artifact="json"):
+        if not PROFILE_ID_RE.match(profile_id) or artifact not in ARTIFACT_SUFFIXES:
+            return None
+        path = os.path.join(self.directory, profile_id + ARTIFACT_SUFFIXES[artifact])
+        return path if os.path.exists(path) else None
+
+    def save(self, profile_id, summary, folded=None, stats=None):
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, profile_id)
+        if folded is not None:
+            with open(base + ".folded", "w", encoding="utf-8") as f:
+                f.write(folded)
+        if stats is not None:
+            stats.dump_stats(base + ".prof")
+        summary["artifacts"] = [a for a, suffix in ARTIFACT_SUFFIXES.items()
+                                if a == "json" or os.path.exists(base + suffix)]
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, default=str)
+
+    def list(self, limit=100):
+        if not os.path.isdir(self.directory):
+            return []
+        ids = sorted((name[:-5] for name in os.listdir(self.directory)
+                      if name.endswith(".json") and PROFILE_ID_RE.match(name[:-5])), reverse=True)
+        profiles = []
+        for profile_id in ids[:limit]:
+            with open(os.path.join(self.directory, profile_id + ".json"), encoding="utf-8") as f:
+                summary = json.load(f)
+            summary.pop("call_tree", None)
+            summary.pop("top_functions", None)
+            profiles.append(summary)
+        return profiles
+
+
+class Profiler:
+    def __init__(self, store, token=None, routes=(), sample_rate=0.0, mode="sample", interval=0.002):
+        self.store = store
+        self.token = token
+        self.routes = frozenset(routes)
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.interval = interval
+
+    @property
+    def enabled(self):
+        return bool(self.token) or (self.sample_rate > 0 and bool(self.routes))
+
+    def should_profile(self, scope, header_value):
+        if header_value is not None and self.token:
+            return hmac.compare_digest(header_value, self.token.encode())
+        if self.sample_rate > 0 and self.routes:
+            return route_template(scope) in self.routes and random.random() < self.sample_rate
+        return False
+
+
+def profiler_from_env():
+    routes = [r.strip() for r in os.environ.get("PROFILE_ROUTES", "").split(",") if r.strip()]
+    return Profiler(
+        ProfileStore(os.environ.get("PROFILE_DIR", "profiles")),
+        token=os.environ.get("PROFILE_TOKEN") or None,
+        routes=routes,
+        sample_rate=float(os.environ.get("PROFILE_SAMPLE_RATE", "0")),
+        mode=os.environ.get("PROFILE_MODE", "sample"),
+        interval=float(os.environ.get("PROFILE_INTERVAL_MS", "2")) / 1000,
+    )
+
+
+class ProfilingMiddleware:
+    """ASGI middleware running triggered requests under a profiler."""
+
+    def __init__(self, app, profiler):
+        self.app = app
+        self.profiler = profiler
+        self._cprofile_lock = asyncio.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.enabled:
+            await self.app(scope, receive, send)
+            return
+        header_value = next((v for k, v in scope.get("headers") or () if k == b"x-profile"), None)
+        if not self.profiler.should_profile(scope, header_value):
+            await self.app(scope, receive, send)
+            return
+        if self.profiler.mode == "cprofile":
+            # Only one cProfile can be active on the loop thread
+            async with self._cprofile_lock:
+                await self._profile(scope, receive, send)
+        else:
+            await self._profile(scope, receive, send)
+
+    async def _profile(self, scope, receive, send):
+        profile_id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        sampler = profile = None
+        if self.profiler.mode == "cprofile":
+            profile = cProfile.Profile()
+        else:
+            sampler = StackSampler(self.profiler.interval)
+
+        wall_started, cpu_started = time.perf_counter(), time.process_time()
+        if profile is not None:
+            profile.enable()
+        else:
+            sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if profile is not None:
+                profile.disable()
+            else:
+                await asyncio.to_thread(sampler.stop)
+            summary = {
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route_template(scope),
+                "status": status,
+                "mode": self.profiler.mode,
+                "wall_ms": round((time.perf_counter() - wall_started) * 1000, 3),
+                "process_cpu_ms": round((time.process_time() - cpu_started) * 1000, 3),
+                "created_at": datetime.utcnow().isoformat(),
+            }
+            await asyncio.to_thread(self._save, profile_id, summary, sampler, profile)
+
+    def _save(self, profile_id, summary, sampler, profile):
+        if profile is not None:
+            stats = pstats.Stats(profile, stream=io.StringIO())
+            stats.sort_stats("cumulative")
+            summary["top_functions"] = [
+                {"function": f"{func[2]} ({os.path.basename(func[0])}:{func[1]})",
+                 "calls": nc, "total_ms": round(tt * 1000, 3), "cumulative_ms": round(ct * 1000, 3)}
+                for func, (cc, nc, tt, ct, callers) in sorted(stats.stats.items(), key=lambda i: -i[1][3])[:50]
+            ]
+            self.profiler.store.save(profile_id, summary, stats=stats)
+        else:
+            summary["samples"] = sampler.samples
+            summary["interval_ms"] = self.profiler.interval * 1000
+            summary["call_tree"] = sampler.call_tree()
+            self.profiler.store.save(profile_id, summary, folded=sampler.collapsed())
@@ -0,0 +1,317 @@
+"""Rolling frequency log of job searches, used to prewarm the search cache.
+
+* ``CountMinSketch`` counts normalized query keys in a fixed ``depth x width``
+  grid of counters. Estimates can be too high but are never too low, and
+  memory stays constant no matter how many distinct queries arrive.
+* ``QueryLog`` records searches into a sketch and tracks a bounded set of
+  heavy-hitter candidates, which a sketch alone cannot enumerate. All
+  counters are halved every ``decay_interval`` seconds, so old popularity
+  fades. Each process persists its own sketch to Mongo. ``top()`` merges
+  the sketches of all workers, because sketches of the same shape add up.
+  With ``max_per_client``, one client adds at most that many searches to a
+  key per decay interval. A second sketch counts (client, key) pairs for
+  this, so a client repeating a search cannot push it into the top-K.
+* ``HyperLogLog`` estimates how many distinct clients searched for each
+  heavy-hitter candidate. ``top_by_clients()`` ranks on that, merging the
+  workers' estimators by register-wise maximum, so a client that hits several
+  workers still counts once. Autocomplete uses it to offer only queries that
+  several people have searched for.
+* ``Prewarmer`` periodically refreshes the top-K queries whose cache entries
+  are missing or about to expire. It also runs once at startup, so popular
+  searches are warm after a deploy or a cache flush.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from bson import Binary
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(value):
+    return " ".join(value.lower().split())
+
+
+def normalize_query(fields):
+    """Canonical key for a search: trimmed, lowercased, whitespace-collapsed values."""
+    normalized = {}
+    for name, value in sorted(fields.items()):
+        if isinstance(value, str):
+            value = normalize_text(value)
+        normalized[name] = value
+    return json.dumps(normalized, sort_keys=True)
+
+
+class CountMinSketch:
+    def __init__(self, width=2048, depth=4, counters=None):
+        self.width = width
+        self.depth = depth
+        self.counters = counters if counters is not None else np.zeros((depth, width), dtype=np.uint32)
+
+    def _columns(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=4 * self.depth).digest()
+        return np.frombuffer(digest, dtype="<u4") % self.width
+
+    def add(self, key, count=1):
+        rows = np.arange(self.depth)
+        columns = self._columns(key)
+        self.counters[rows, columns] += count
+        return int(self.counters[rows, columns].min())
+
+    def estimate(self, key):
+        return int(self.counters[np.arange(self.depth), self._columns(key)].min())
+
+    def merge(self, other):
+        self.counters += other.counters
+
+    def decay(self):
+        self.counters >>= 1
+
+    def to_bytes(self):
+        return self.counters.astype("<u4").tobytes()
+
+    @classmethod
+    def from_bytes(cls, data, width, depth):
+        counters = np.frombuffer(data, dtype="<u4").reshape(depth, width).astype(np.uint32)
+        return cls(width, depth, counters)
+
+
+class HyperLogLog:
+    """Approximate count of distinct items in ``2 ** p`` one-byte registers."""
+
+    def __init__(self, p=6, registers=None):
+        self.p = p
+        self.registers = registers if registers is not None else np.zeros(1 << p, dtype=np.uint8)
+
+    def add(self, item):
+        value = int.from_bytes(hashlib.blake2b(item.encode(), digest_size=8).digest(), "little")
+        index, rest = value & ((1 << self.p) - 1), value >> self.p
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = len(self.registers)
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if zeros == m:
+            return 0
+        raw = 0.7213 / (1 + 1.079 / m) * m * m / float(np.sum(np.exp2(-self.registers.astype(np.float64))))
+        # Small counts, the range autocomplete cares about, use linear counting
+        if raw <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))
+        return round(raw)
+
+    def to_bytes(self):
+        return self.registers.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        registers = np.frombuffer(data, dtype=np.uint8).copy()
+        return cls(int(math.log2(len(registers))), registers)
+
+
+class QueryLog:
+    def __init__(self, collection=None, name="job_search", worker_id=None, width=2048, depth=4,
+                 max_candidates=256, decay_interval=3600.0, flush_interval=30.0, retention=timedelta(days=7),
+                 max_per_client=0):
+        self.collection = collection
+        self.name = name
+        self.doc_id = f"{name}:{socket.gethostname()}:{worker_id or 0}"
+        self.flush_interval = flush_interval
+        self.max_candidates = max_candidates
+        self.decay_interval = decay_interval
+        self.retention = retention
+        self.max_per_client = max_per_client
+        self.sketch = CountMinSketch(width, depth)
+        # (client, key) pairs; overestimates only ever drop a search, never count one twice
+        self.per_client = CountMinSketch(4 * width, depth)
+        self.candidates = {}
+        self.clients = {}  # candidate key -> HyperLogLog of the clients that searched for it
+        self._decayed_at = time.monotonic()
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._task = None
+
+    def ensure_indexes(self):
+        """Create the TTL and lookup indexes; the app calls this at startup, off the event loop."""
+        if self.collection is not None:
+            self.collection.create_index("expires_at", expireAfterSeconds=0)
+            self.collection.create_index("log")
+
+    def record(self, key, client=None):
+        """Count one search for ``key``; returns its estimated count."""
+        with self._lock:
+            self._maybe_decay()
+            if self.max_per_client and client is not None:
+                if self.per_client.add(f"{client}\x00{key}") > self.max_per_client:
+                    return self.sketch.estimate(key)
+            estimate = self.sketch.add(key)
+            self.candidates[key] = estimate
+            if client is not None:
+                self.clients.setdefault(key, HyperLogLog()).add(client)
+            if len(self.candidates) > self.max_candidates:
+                evicted = min(self.candidates, key=self.candidates.get)
+                del self.candidates[evicted]
+                self.clients.pop(evicted, None)
+            self._dirty = True
+        return estimate
+
+    def distinct_clients(self, key):
+        """Estimated number of distinct clients this process has seen search for ``key``."""
+        with self._lock:
+            clients = self.clients.get(key)
+            return clients.estimate() if clients is not None else 0
+
+    def _maybe_decay(self):
+        if time.monotonic() - self._decayed_at < self.decay_interval:
+            return
+        self._decayed_at = time.monotonic()
+        self.sketch.decay()
+        self.per_client = CountMinSketch(self.per_client.width, self.per_client.depth)
+        self.candidates = {key: count >> 1 for key, count in self.candidates.items() if count > 1}
+        self.clients = {key: clients for key, clients in self.clients.items() if key in self.candidates}
+
+    def load(self):
+        """Resume this process's persisted sketch, e.g. after a restart."""
+        if self.collection is None:
+            return
+        doc = self.collection.find_one({"_id": self.doc_id})
+        if not doc or doc.get("width") != self.sketch.width or doc.get("depth") != self.sketch.depth:
+            return
+        with self._lock:
+            self.sketch = CountMinSketch.from_bytes(doc["counters"], doc["width"], doc["depth"])
+            self.candidates = dict(doc.get("candidates", []))
+            self.clients = {key: HyperLogLog.from_bytes(data) for key, data in doc.get("clients", [])}
+
+    def flush(self):
+        if self.collection is None or not self._dirty:
+            return
+        with self._lock:
+            counters = Binary(self.sketch.to_bytes())
+            candidates = list(self.candidates.items())
+            clients = [[key, Binary(hll.to_bytes())] for key, hll in self.clients.items()]
+            self._dirty = False
+        now = datetime.utcnow()
+        self.collection.update_one(
+            {"_id": self.doc_id},
+            {"$set": {
+                "log": self.name,
+                "width": self.sketch.width,
+                "depth": self.sketch.depth,
+                "counters": counters,
+                "candidates": candidates,
+                "clients": clients,
+                "updated_at": now,
+                "expires_at": now + self.retention,
+            }},
+            upsert=True,
+        )
+
+    def top(self, k):
+        """The ``k`` most frequent keys across all workers, as ``[(key, estimate)]``."""
+        with self._lock:
+            sketch = CountMinSketch(self.sketch.width, self.sketch.depth, self.sketch.counters.copy())
+            keys = set(self.candidates)
+        if self.collection is not None:
+            # Other workers' sketches; this process's persisted copy is superseded by the live one
+            for doc in self.collection.find({"log": self.name, "_id": {"$ne": self.doc_id},
+                                             "width": sketch.width, "depth": sketch.depth}):
+                sketch.merge(CountMinSketch.from_bytes(doc["counters"], doc["width"], doc["depth"]))
+                keys.update(key for key, _ in doc.get("candidates", []))
+        ranked = sorted(((key, sketch.estimate(key)) for key in keys), key=lambda item: (-item[1], item[0]))
+        return [item for item in ranked[:k] if item[1] > 0]
+
+    def top_by_clients(self, k):
+        """The ``k`` keys searched for by the most distinct clients across all workers, as ``[(key, clients)]``."""
+        with self._lock:
+            merged = {key: HyperLogLog(hll.p, hll.registers.copy()) for key, hll in self.clients.items()}
+        if self.collection is not None:
+            for doc in self.collection.find({"log": self.name, "_id": {"$ne": self.doc_id}}, {"clients": 1}):
+                for key, data in doc.get("clients", []):
+                    other = HyperLogLog.from_bytes(data)
+                    if key in merged:
+                        merged[key].merge(other)
+                    else:
+                        merged[key] = other
+        ranked = sorted(((key, hll.estimate()) for key, hll in merged.items()), key=lambda item: (-item[1], item[0]))
+        return [item for item in ranked[:k] if item[1] > 0]
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.warning("Flushing query log failed: %s", e)
+
+    def start(self):
+        if self.collection is not None and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+class Prewarmer:
+    """Keeps the cache entries of the most popular searches warm.
+
+    ``refresh(key)`` performs one search for a query key and stores it in the
+    cache. ``expires_in(key)`` returns the seconds left on the cached entry, or
+    None when it is missing. Both are blocking and run in a worker thread.
+    """
+
+    def __init__(self, query_log, refresh, expires_in, top_k=20, interval=60.0, refresh_ahead=120.0):
+        self.query_log = query_log
+        self.refresh = refresh
+        self.expires_in = expires_in
+        self.top_k = top_k
+        self.interval = interval
+        self.refresh_ahead = refresh_ahead
+        self._task = None
+
+    def run_once(self):
+        refreshed = 0
+        for key, _ in self.query_log.top(self.top_k):
+            remaining = self.expires_in(key)
+            if remaining is not None and remaining > self.refresh_ahead:
+                continue
+            try:
+                if not self.refresh(key):
+                    break  # upstream budget exhausted; try again next round
+            except Exception as e:
+                logger.warning("Prewarming %s failed: %s", key, e)
+                continue
+            refreshed += 1
+        return refreshed
+
+    async def _run(self):
+        while True:
+            try:
+                refreshed = await asyncio.to_thread(self.run_once)
+                if refreshed:
+                    logger.info("Prewarmed %d popular searches", refreshed)
+            except Exception as e:
+                logger.warning("Prewarm round failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.top_k > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,246 @@
+"""Per-request MongoDB command accounting, slow-query log and COLLSCAN detection.
+
+``QueryWatch`` is a pymongo command listener. Requests are wrapped by
+``QueryWatchMiddleware``, which puts a ``RequestStats`` in a ``ContextVar``.
+Each command issued while handling the request adds to it: the command
+count, the time spent in the database, and how often each query shape ran.
+When the request finishes, one warning is logged if it ran more than
+``max_commands`` commands, or the same shape more than ``max_repeats`` times.
+Both are the usual signatures of an N+1 loop. In debug mode the middleware
+also adds ``X-DB-Time`` (milliseconds) and ``X-DB-Queries`` to the response.
+Headers go out with ``http.response.start``, so the two values cover the work
+done before the body starts. Commands a streaming response runs while it
+sends the body, such as an export cursor's ``getMore`` batches, are left out.
+They are still counted for the end-of-request warning.
+
+A query shape is the filter with every value replaced by ``"?"``. Field
+names and operators are kept, so ``{"user_id": "u1", "applied_at": {"$lt": t}}``
+and the same query for another user share one shape. Commands slower than
+``slow_ms`` are logged with their shape and kept in a short ring buffer for
+the admin report.
+
+The first time a read or write shape is seen, its command is queued for
+``explain`` with the ``queryPlanner`` verbosity, which plans the query but
+does not run it. A worker thread runs the explains so the request never
+waits on them. A winning plan with a ``COLLSCAN`` stage is logged and counted
+in ``mongo_collscans_total``. Shapes with an empty filter are skipped, since
+scanning the whole collection is the point of those.
+"""
+import collections
+import contextvars
+import json
+import logging
+import queue
+import threading
+import time
+
+from pymongo import monitoring
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Where each explainable command keeps its filter
+_FILTER_FIELDS = {"find": "filter", "count": "query", "distinct": "query", "findAndModify": "query"}
+_EXPLAINABLE = set(_FILTER_FIELDS) | {"aggregate", "update", "delete"}
+_IGNORED_COMMANDS = {"explain", "hello", "ismaster", "isMaster", "ping", "endSessions", "buildInfo", "saslStart", "saslContinue"}
+_IGNORED_DATABASES = {"admin", "config", "local"}
+# Driver-level fields that explain either rejects or does not need
+_DRIVER_FIELDS = {"lsid", "txnNumber", "writeConcern", "readConcern", "autocommit", "startTransaction"}
+
+_stats = contextvars.ContextVar("query_stats", default=None)
+
+
+class RequestStats:
+    __slots__ = ("commands", "db_seconds", "shapes")
+
+    def __init__(self):
+        self.commands = 0
+        self.db_seconds = 0.0
+        self.shapes = collections.Counter()
+
+
+def shape(value):
+    """``value`` with literals replaced by ``"?"``; field names and operators are kept."""
+    if isinstance(value, dict):
+        return {key: _shape_field(key, item) for key, item in value.items()}
+    return "?"
+
+
+def _shape_field(key, value):
+    if key in ("$and", "$or", "$nor") and isinstance(value, list):
+        return [shape(clause) for clause in value]
+    if key in ("$in", "$nin", "$all"):
+        return ["?"]
+    if key == "$elemMatch":
+        return shape(value)
+    if isinstance(value, dict) and any(str(k).startswith("$") for k in value):
+        return shape(value)
+    return "?"
+
+
+def command_filter(name, command):
+    """The filter of a command, or None when it has none worth explaining."""
+    if name in _FILTER_FIELDS:
+        return command.get(_FILTER_FIELDS[name]) or {}
+    if name in ("update", "delete"):
+        statements = command.get("updates" if name == "update" else "deletes") or [{}]
+        return statements[0].get("q") or {}
+    if name == "aggregate":
+        pipeline = command.get("pipeline") or [{}]
+        first = pipeline[0]
+        if "$match" in first:
+            return first["$match"]
+        if "$geoNear" in first:
+            return first["$geoNear"].get("query") or {}
+    return None
+
+
+def shape_key(name, collection, query):
+    return f"{collection}.{name} {json.dumps(shape(query), sort_keys=True, default=str)}"
+
+
+def has_collscan(plan):
+    """True when ``plan`` (an explain result, or part of one) contains a COLLSCAN stage."""
+    if isinstance(plan, dict):
+        if plan.get("stage") == "COLLSCAN":
+            return True
+        return any(has_collscan(value) for key, value in plan.items() if key != "rejectedPlans")
+    if isinstance(plan, list):
+        return any(has_collscan(item) for item in plan)
+    return False
+
+
+class QueryWatch(monitoring.CommandListener):
+    def __init__(self, slow_ms=100.0, max_commands=25, max_repeats=10, explain=True,
+                 max_shapes=2000, slow_log_size=200):
+        self.slow_ms = slow_ms
+        self.max_commands = max_commands
+        self.max_repeats = max_repeats
+        self.explain = explain
+        self.max_shapes = max_shapes
+        self.client = None
+        self.slow_queries = collections.deque(maxlen=slow_log_size)
+        self.collscans = {}  # shape key -> first detection
+        self._pending = {}
+        self._shapes = set()
+        self._explain_queue = queue.Queue(maxsize=64)
+        self._worker = None
+
+    def start(self, client):
+        """Begin explaining new query shapes through ``client``."""
+        self.client = client
+        if self.explain and self._worker is None:
+            self._worker = threading.Thread(target=self._drain, name="query-explain", daemon=True)
+            self._worker.start()
+
+    def report(self):
+        return {
+            "collscans": sorted(self.collscans.values(), key=lambda item: item["detected_at"], reverse=True),
+            "slow_queries": list(reversed(self.slow_queries)),
+            "shapes_seen": len(self._shapes),
+        }
+
+    # Command listener
+    def started(self, event):
+        name = event.command_name
+        if name in _IGNORED_COMMANDS or event.database_name in _IGNORED_DATABASES:
+            return
+        collection = str(event.command.get("collection" if name == "getMore" else name, ""))
+        query = command_filter(name, event.command) if name in _EXPLAINABLE else None
+        key = shape_key(name, collection, query) if query is not None else f"{collection}.{name}"
+        stats = _stats.get()
+        if stats is not None:
+            stats.commands += 1
+            stats.shapes[key] += 1
+        self._pending[(event.request_id, event.connection_id)] = (key, stats)
+        if query and self.explain and key not in self._shapes and len(self._shapes) < self.max_shapes:
+            self._shapes.add(key)
+            self._queue_explain(event, collection, key)
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
+
+    def _finish(self, event, status):
+        pending = self._pending.pop((event.request_id, event.connection_id), None)
+        if pending is None:
+            return
+        key, stats = pending
+        seconds = event.duration_micros / 1e6
+        if stats is not None:
+            stats.db_seconds += seconds
+        if self.slow_ms and seconds * 1000 >= self.slow_ms:
+            metrics.MONGO_SLOW_QUERIES.inc(event.command_name)
+            self.slow_queries.append({
+                "shape": key, "duration_ms": round(seconds * 1000, 2), "status": status, "at": time.time(),
+            })
+            logger.warning("Slow Mongo query (%.1f ms, %s): %s", seconds * 1000, status, key)
+
+    # Explain sampling
+    def _queue_explain(self, event, collection, key):
+        command = {field: value for field, value in event.command.items()
+                   if not field.startswith("$") and field not in _DRIVER_FIELDS}
+        try:
+            self._explain_queue.put_nowait((event.database_name, collection, command, key))
+        except queue.Full:
+            # Dropped shapes get another chance the next time they run
+            self._shapes.discard(key)
+
+    def _drain(self):
+        while True:
+            database, collection, command, key = self._explain_queue.get()
+            try:
+                plan = self.client[database].command({"explain": command, "verbosity": "queryPlanner"})
+            except Exception as e:
+                logger.debug("Explain failed for %s: %s", key, e)
+                continue
+            if has_collscan(plan):
+                metrics.MONGO_COLLSCANS.inc(collection)
+                self.collscans[key] = {"shape": key, "collection": collection, "detected_at": time.time()}
+                logger.warning("Mongo query runs as a collection scan, consider an index: %s", key)
+
+    # Request accounting
+    def finish_request(self, scope, stats):
+        repeated = [(key, count) for key, count in stats.shapes.most_common(3) if count > self.max_repeats]
+        if (self.max_commands and stats.commands > self.max_commands) or repeated:
+            logger.warning(
+                "%s %s ran %d Mongo commands in %.1f ms; most repeated: %s",
+                scope["method"], metrics.route_template(scope), stats.commands, stats.db_seconds * 1000,
+                ", ".join(f"{key} x{count}" for key, count in stats.shapes.most_common(3)),
+            )
+
+
+class QueryWatchMiddleware:
+    """ASGI middleware that scopes ``QueryWatch`` accounting to one request."""
+
+    def __init__(self, app, watch, debug_headers=False):
+        self.app = app
+        self.watch = watch
+        self.debug_headers = debug_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _stats.set(stats)
+
+        async def send_wrapper(message):
+            # A snapshot at response start: commands run while streaming the body are not included
+            if self.debug_headers and message["type"] == "http.response.start":
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-db-time", f"{stats.db_seconds * 1000:.2f}".encode()),
+                    (b"x-db-queries", str(stats.commands).encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _stats.reset(token)
+            self.watch.finish_request(scope, stats)
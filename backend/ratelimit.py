@@ -0,0 +1,312 @@
+"""Admission control, per-client rate limiting and the upstream (Adzuna) budget.
+
+* ``TokenBucketLimiter`` implements token buckets keyed by client. The
+  buckets live in a ``MemoryBucketStore`` (per process), or optionally in a
+  ``MongoBucketStore`` that all workers and instances share. The Mongo
+  store refills and takes tokens atomically in one pipeline update.
+* ``QuotaCounter`` counts calls in fixed windows (e.g. per UTC day), in
+  memory or in Mongo. ``UpstreamBudget`` combines a rate bucket with a
+  daily quota for outbound calls. In-memory counters are per process, so
+  with several workers each one gets ``worker_share`` of the budget.
+* ``AdmissionMiddleware`` applies the per-client limit (429) and bounds
+  concurrency. It admits ``max_in_flight`` requests, queues up to
+  ``max_queued`` more for at most ``queue_timeout`` seconds, and sheds the
+  rest with 503. Every rejection carries ``Retry-After``.
+* ``client_key`` picks the bucket. It is the session user when the bearer
+  token resolves to one, and the client address otherwise.
+  ``X-Forwarded-For`` is honoured only when the peer is a trusted proxy.
+  Made-up tokens and forwarded addresses therefore cannot mint fresh
+  buckets.
+
+The Mongo-backed stores block, so the ``take_async`` variants call them from
+a worker thread. Their TTL indexes are created by ``ensure_indexes()``,
+which the app calls at startup, not at construction. A rate of 0 (or a
+quota of 0) disables the corresponding limit.
+"""
+import asyncio
+import ipaddress
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+
+import metrics
+
+EXEMPT_PATHS = ("/metrics", "/api/health")
+
+
+class MemoryBucketStore:
+    blocking = False
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, cost=1.0):
+        """Take ``cost`` tokens; returns ``(allowed, retry_after_seconds)``."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+
+class MongoBucketStore:
+    """Token buckets shared through a Mongo collection (TTL-indexed on ``expires_at``)."""
+
+    blocking = True
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def ensure_indexes(self):
+        self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def take(self, key, rate, burst, cost=1.0):
+        elapsed_s = {"$divide": [{"$subtract": ["$$NOW", {"$ifNull": ["$updated", "$$NOW"]}]}, 1000]}
+        idle_ms = int(burst / rate * 1000) + 1000
+        doc = self.collection.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {
+                    "tokens": {"$min": [burst, {"$add": [{"$ifNull": ["$tokens", burst]},
+                                                         {"$multiply": [elapsed_s, rate]}]}]},
+                    "updated": "$$NOW",
+                    "expires_at": {"$add": ["$$NOW", idle_ms]},
+                }},
+                {"$set": {"allowed": {"$gte": ["$tokens", cost]}}},
+                {"$set": {"tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", cost]}, "$tokens"]}}},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc["allowed"]:
+            return True, 0.0
+        return False, (cost - doc["tokens"]) / rate
+
+
+class TokenBucketLimiter:
+    def __init__(self, name, rate, burst, store):
+        self.name = name
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.store = store
+
+    @property
+    def enabled(self):
+        return self.rate > 0
+
+    def take(self, key, cost=1.0):
+        if not self.enabled:
+            return True, 0.0
+        return self.store.take(f"{self.name}:{key}", self.rate, self.burst, cost)
+
+    async def take_async(self, key, cost=1.0):
+        if self.enabled and self.store.blocking:
+            return await asyncio.to_thread(self.take, key, cost)
+        return self.take(key, cost)
+
+
+def _window_start(window, now):
+    if window == "day":
+        return now.replace(hour=0, minute=0, second=0, microsecond=0), timedelta(days=1)
+    return now.replace(minute=0, second=0, microsecond=0), timedelta(hours=1)
+
+
+class QuotaCounter:
+    """Fixed-window call counter (``window`` is ``"day"`` or ``"hour"``, in UTC)."""
+
+    def __init__(self, name, limit, window="day", collection=None):
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self.collection = collection
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    @property
+    def blocking(self):
+        return self.collection is not None and self.limit > 0
+
+    def ensure_indexes(self):
+        if self.collection is not None:
+            self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def take(self):
+        if self.limit <= 0:
+            return True, 0.0
+        now = datetime.utcnow()
+        start, length = _window_start(self.window, now)
+        retry_after = (start + length - now).total_seconds()
+        key = f"{self.name}:{start.isoformat()}"
+        if self.collection is not None:
+            doc = self.collection.find_one_and_update(
+                {"_id": key},
+                {"$inc": {"count": 1}, "$setOnInsert": {"expires_at": start + length + timedelta(hours=1)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            count = doc["count"]
+        else:
+            with self._lock:
+                count = self._counts.get(key, 0) + 1
+                self._counts = {key: count}
+        return count <= self.limit, 0.0 if count <= self.limit else retry_after
+
+
+def worker_share(total, worker_id, workers):
+    """This worker's part of a budget of ``total`` split across ``workers`` processes.
+
+    Shares differ by at most one, and add up to ``total``. A budget of 0
+    (disabled) stays 0, and a budget too small to give every worker a call
+    raises ``ValueError``, since a share of 0 would mean "unlimited".
+    """
+    if total <= 0 or workers <= 1:
+        return total
+    if total < workers:
+        raise ValueError(f"a budget of {total} cannot be split across {workers} workers; "
+                         "share it through Mongo (RATE_LIMIT_BACKEND=mongo) instead")
+    return total // workers + (1 if worker_id < total % workers else 0)
+
+
+class UpstreamBudget:
+    """Outbound budget for one upstream: a rate bucket plus a windowed quota."""
+
+    def __init__(self, name, limiter, quota):
+        self.name = name
+        self.limiter = limiter
+        self.quota = quota
+
+    def take(self):
+        allowed, retry_after = self.limiter.take("global")
+        if allowed:
+            allowed, retry_after = self.quota.take()
+        if not allowed:
+            metrics.REQUESTS_REJECTED.inc(f"{self.name}_budget")
+        return allowed, retry_after
+
+    async def take_async(self):
+        if (self.limiter.enabled and self.limiter.store.blocking) or self.quota.blocking:
+            return await asyncio.to_thread(self.take)
+        return self.take()
+
+
+def parse_networks(text):
+    """Addresses and CIDR networks from a comma-separated list, e.g. ``"10.0.0.0/8, 127.0.0.1"``."""
+    return tuple(ipaddress.ip_network(part.strip(), strict=False) for part in text.split(",") if part.strip())
+
+
+def _in_networks(address, networks):
+    try:
+        address = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def client_address(scope, trusted_proxies=()):
+    """The client IP. ``X-Forwarded-For`` is used only when the peer is a trusted proxy."""
+    client = scope.get("client")
+    peer = client[0] if client else "unknown"
+    if not trusted_proxies or not _in_networks(peer, trusted_proxies):
+        return peer
+    forwarded = dict(scope.get("headers") or ()).get(b"x-forwarded-for")
+    if not forwarded:
+        return peer
+    # Each proxy appends the address it received from, so walk back past our own proxies
+    hops = [hop.strip().decode("latin-1") for hop in forwarded.split(b",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _in_networks(hop, trusted_proxies):
+            return hop
+    return hops[0] if hops else peer
+
+
+def client_key(scope, resolve_token=None, trusted_proxies=()):
+    """Rate-limit key: the session user when ``resolve_token`` verifies the bearer token, else the client IP."""
+    if resolve_token is not None:
+        authorization = dict(scope.get("headers") or ()).get(b"authorization", b"")
+        if authorization[:7].lower() == b"bearer ":
+            user_id = resolve_token(authorization[7:].strip().decode("latin-1"))
+            if user_id:
+                return "user:" + user_id
+    return "ip:" + client_address(scope, trusted_proxies)
+
+
+async def _reject(send, status, detail, retry_after):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, limiter, max_in_flight=64, max_queued=256, queue_timeout=5.0, key=client_key):
+        self.app = app
+        self.limiter = limiter
+        self.key = key
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._slots = None
+        self._queued = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        allowed, retry_after = await self.limiter.take_async(self.key(scope))
+        if not allowed:
+            metrics.REQUESTS_REJECTED.inc("rate_limited")
+            await _reject(send, 429, "Too many requests", retry_after)
+            return
+
+        if self.max_in_flight <= 0:
+            await self.app(scope, receive, send)
+            return
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+
+        if self._slots.locked():
+            if self._queued >= self.max_queued:
+                metrics.REQUESTS_REJECTED.inc("queue_full")
+                await _reject(send, 503, "Server is overloaded", self.queue_timeout)
+                return
+            self._queued += 1
+            metrics.REQUESTS_QUEUED.inc()
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                metrics.REQUESTS_REJECTED.inc("queue_timeout")
+                await _reject(send, 503, "Server is overloaded", self.queue_timeout)
+                return
+            finally:
+                self._queued -= 1
+                metrics.REQUESTS_QUEUED.dec()
+                metrics.QUEUE_WAIT.observe(time.perf_counter() - started)
+        else:
+            await self._slots.acquire()
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._slots.release()
@@ -0,0 +1,373 @@
+"""Precomputed per-user job recommendation feeds.
+
+Each user has one document in the ``recommendations`` collection
+(unique on ``user_id``), so reading a feed is a single indexed lookup.
+
+Scoring is a vectorized batch:
+
+* Texts are hashed into ``DIMENSIONS``-wide bag-of-words vectors and
+  L2-normalized. The inputs are job titles and descriptions, career-path
+  skills, and the jobs a user applied to.
+* A user's profile combines their chosen career path's skills with the
+  jobs they applied to (``APPLIED_WEIGHT``). Profiles are stored in the
+  feed document for incremental updates.
+* Scores for a batch of users are one matrix product, profiles x recent
+  jobs, plus a recency boost. Jobs the user already applied to are masked
+  out. The top ``feed_size`` jobs are kept.
+
+``RecommendationEngine`` keeps the recent jobs in memory (a columnar
+``JobStore`` plus their score matrix) and handles
+refresh events on a background task:
+
+* ``user_changed(user_id)``: the user applied or picked a career path, so
+  their feed is rebuilt.
+* ``jobs_added(jobs)``: new listings are scored against every stored
+  profile. They are merged into feeds only where they beat the current
+  tail. Profiles and tail scores (``floor``) are cached in memory, so only
+  the feeds that change are read and written. The cache is reloaded every
+  ``RELOAD_INTERVAL`` to pick up feeds rebuilt by other workers.
+
+``rebuild_stale(max_age)`` rebuilds only the feeds that are missing or
+older than ``max_age``, which is what a restart needs. ``rebuild_all()``
+rebuilds everything, for example after the scoring changes.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import re
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+from bson import Binary
+from pymongo import UpdateOne
+
+from jobstore import JobStore
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = 512
+APPLIED_WEIGHT = 0.5
+RECENCY_WEIGHT = 0.1
+RECENCY_HALF_LIFE_DAYS = 14.0
+RELOAD_INTERVAL = timedelta(minutes=10)
+FEED_FIELDS = ("id", "title", "company", "location", "salary", "job_type", "experience_level", "apply_url")
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+
+def tokens(text):
+    return [token.rstrip(".") for token in _TOKEN.findall((text or "").lower())]
+
+
+def _bucket(token):
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=4).digest(), "little") % DIMENSIONS
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def vectorize(texts):
+    """Hashed, L2-normalized bag-of-words rows, one per text."""
+    matrix = np.zeros((len(texts), DIMENSIONS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for token in tokens(text):
+            matrix[row, _bucket(token)] += 1.0
+    return _normalize_rows(matrix)
+
+
+def _as_floor(score):
+    return -math.inf if score is None else score
+
+
+def job_text(job):
+    # The title counts twice: it says more about the role than the description
+    return f"{job.get('title', '')} {job.get('title', '')} {job.get('description', '')}"
+
+
+class RecommendationEngine:
+    def __init__(self, feeds, users, career_paths, applications, jobs,
+                 feed_size=50, max_jobs=10000, job_window=timedelta(days=30), batch_size=500):
+        self.feeds = feeds
+        self.users = users
+        self.career_paths = career_paths
+        self.applications = applications
+        self.jobs = jobs
+        self.feed_size = feed_size
+        self.max_jobs = max_jobs
+        self.job_window = job_window
+        self.batch_size = batch_size
+        self._jobs = None
+        self._job_matrix = None
+        self._job_loaded_at = None
+        self._jobs_lock = threading.Lock()
+        self._profile_rows = None  # user_id -> row of _profile_matrix and _profile_floors
+        self._profile_matrix = None
+        self._profile_floors = None
+        self._profile_pending = {}  # user_id -> (profile, floor), rebuilt since the last load
+        self._profiles_loaded_at = None
+        self._profiles_lock = threading.Lock()
+        self._loop = None
+        self._queue = None
+        self._task = None
+
+    def ensure_indexes(self):
+        self.feeds.create_index("user_id", unique=True)
+        self.feeds.create_index("updated_at")
+
+    # Recent jobs: a columnar store and the matching rows of normalized job vectors
+    def _recent_jobs(self):
+        """A consistent snapshot: the store (append-only), its job matrix and recency boosts."""
+        with self._jobs_lock:
+            return self._load_recent_jobs()
+
+    def _load_recent_jobs(self):
+        stale = self._job_loaded_at is None or datetime.utcnow() - self._job_loaded_at > RELOAD_INTERVAL
+        if stale:
+            since = datetime.utcnow() - self.job_window
+            cursor = (self.jobs.find({"fetched_at": {"$gte": since}}, {"_id": 0, "location_point": 0})
+                      .sort("fetched_at", -1).limit(self.max_jobs))
+            self._set_jobs(JobStore(cursor))
+        return self._jobs, self._job_matrix, self._recency(self._jobs)
+
+    def _set_jobs(self, store):
+        titles, descriptions = store.column("title"), store.column("description")
+        self._jobs = store
+        self._job_matrix = vectorize([job_text({"title": t, "description": d}) for t, d in zip(titles, descriptions)])
+        self._job_loaded_at = datetime.utcnow()
+
+    def _recency(self, store):
+        ages = np.array(store.ages_days(datetime.utcnow()), dtype=np.float32)
+        return RECENCY_WEIGHT * np.exp2(-ages / RECENCY_HALF_LIFE_DAYS)
+
+    # Stored profiles and feed floors, so merging new jobs only touches the feeds it changes
+    def _profile_snapshot(self):
+        """``(user_ids, profiles, floors)`` for every stored feed."""
+        with self._profiles_lock:
+            stale = self._profiles_loaded_at is None or datetime.utcnow() - self._profiles_loaded_at > RELOAD_INTERVAL
+            if stale:
+                rows, profiles, floors = {}, [], []
+                cursor = self.feeds.find({}, {"_id": 0, "user_id": 1, "profile": 1, "floor": 1})
+                for feed in cursor.batch_size(self.batch_size):
+                    rows[feed["user_id"]] = len(profiles)
+                    profiles.append(np.frombuffer(feed["profile"], dtype=np.float32))
+                    floors.append(_as_floor(feed.get("floor")))
+                self._profile_rows = rows
+                self._profile_matrix = np.array(profiles, dtype=np.float32).reshape(len(profiles), DIMENSIONS)
+                self._profile_floors = np.array(floors, dtype=np.float64)
+                self._profile_pending = {}
+                self._profiles_loaded_at = datetime.utcnow()
+            elif self._profile_pending:
+                pending, self._profile_pending = self._profile_pending, {}
+                for user_id in pending:
+                    self._profile_rows[user_id] = len(self._profile_rows)
+                self._profile_matrix = np.vstack([self._profile_matrix] + [profile for profile, _ in pending.values()])
+                self._profile_floors = np.concatenate([self._profile_floors, [floor for _, floor in pending.values()]])
+            return list(self._profile_rows), self._profile_matrix, self._profile_floors
+
+    def _remember(self, user_id, profile=None, floor=None):
+        """Keep the cached profile and floor of a feed in step with what was just written."""
+        with self._profiles_lock:
+            if self._profile_rows is None:
+                return
+            row = self._profile_rows.get(user_id)
+            if row is None:
+                if profile is not None:
+                    self._profile_pending[user_id] = (profile, _as_floor(floor))
+                return
+            if profile is not None:
+                self._profile_matrix[row] = profile
+            self._profile_floors[row] = _as_floor(floor)
+
+    def _tail_score(self, items):
+        """The score a new job must beat to enter a feed holding ``items``, or None while it has room."""
+        return items[-1]["score"] if len(items) >= self.feed_size else None
+
+    # Profiles
+    def _profiles(self, users):
+        """Profile vectors and applied job ids for a batch of ``users`` (docs with id, career_path_id)."""
+        user_ids = [user["id"] for user in users]
+        path_ids = {user.get("career_path_id") for user in users if user.get("career_path_id")}
+        skills = {
+            path["id"]: " ".join(path.get("skills", []))
+            for path in self.career_paths.find({"id": {"$in": list(path_ids)}}, {"_id": 0, "id": 1, "skills": 1})
+        }
+        applied = {user_id: set() for user_id in user_ids}
+        for application in self.applications.find({"user_id": {"$in": user_ids}}, {"_id": 0, "user_id": 1, "job_id": 1}):
+            if application.get("job_id"):
+                applied[application["user_id"]].add(application["job_id"])
+        applied_ids = set().union(*applied.values())
+        applied_text = {
+            job["id"]: job_text(job)
+            for job in self.jobs.find({"id": {"$in": list(applied_ids)}}, {"_id": 0, "id": 1, "title": 1, "description": 1})
+        }
+        skill_vectors = vectorize([skills.get(user.get("career_path_id"), "") for user in users])
+        applied_vectors = vectorize([
+            " ".join(applied_text.get(job_id, "") for job_id in sorted(applied[user["id"]])) for user in users
+        ])
+        profiles = _normalize_rows(skill_vectors + APPLIED_WEIGHT * applied_vectors)
+        return profiles, [applied[user["id"]] for user in users]
+
+    def _feed_items(self, scores, docs, exclude):
+        items = []
+        order = np.argsort(-scores)
+        for index in order:
+            doc = docs[index]
+            if doc.get("id") in exclude:
+                continue
+            items.append({**{field: doc.get(field) for field in FEED_FIELDS}, "score": round(float(scores[index]), 4)})
+            if len(items) >= self.feed_size:
+                break
+        return items
+
+    def _top_indexes(self, scores):
+        k = min(len(scores), self.feed_size * 2)  # head-room for excluded (already applied) jobs
+        if k == 0:
+            return np.array([], dtype=int)
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
+
+    def rebuild_users(self, users):
+        """Rebuild the feeds of a batch of users in one vectorized pass."""
+        if not users:
+            return 0
+        docs, job_matrix, recency = self._recent_jobs()
+        profiles, applied = self._profiles(users)
+        scores = profiles @ job_matrix.T + recency
+        now = datetime.utcnow()
+        changes, floors = [], []
+        for row, user in enumerate(users):
+            top = self._top_indexes(scores[row])
+            items = self._feed_items(scores[row][top], [docs[i] for i in top], applied[row])
+            floors.append(self._tail_score(items))
+            changes.append(UpdateOne({"user_id": user["id"]}, {"$set": {
+                "user_id": user["id"],
+                "career_path_id": user.get("career_path_id"),
+                "profile": Binary(profiles[row].tobytes()),
+                "applied": sorted(applied[row]),
+                "items": items,
+                "floor": floors[row],
+                "updated_at": now,
+            }}, upsert=True))
+        self.feeds.bulk_write(changes, ordered=False)
+        for row, user in enumerate(users):
+            self._remember(user["id"], profiles[row], floors[row])
+        return len(changes)
+
+    def rebuild_user(self, user_id):
+        user = self.users.find_one({"id": user_id}, {"_id": 0, "id": 1, "career_path_id": 1})
+        return self.rebuild_users([user]) if user else 0
+
+    def rebuild_all(self):
+        return self._rebuild_users_except(set())
+
+    def rebuild_stale(self, max_age):
+        """Rebuild the feeds that are missing or were last written more than ``max_age`` ago."""
+        cutoff = datetime.utcnow() - max_age
+        fresh = {feed["user_id"] for feed in self.feeds.find({"updated_at": {"$gte": cutoff}}, {"_id": 0, "user_id": 1})}
+        return self._rebuild_users_except(fresh)
+
+    def _rebuild_users_except(self, skip):
+        rebuilt, batch = 0, []
+        for user in self.users.find({}, {"_id": 0, "id": 1, "career_path_id": 1}).batch_size(self.batch_size):
+            if user["id"] in skip:
+                continue
+            batch.append(user)
+            if len(batch) >= self.batch_size:
+                rebuilt += self.rebuild_users(batch)
+                batch = []
+        return rebuilt + self.rebuild_users(batch)
+
+    def merge_jobs(self, jobs):
+        """Score new ``jobs`` against every stored profile and merge them into the feeds."""
+        jobs = [job for job in jobs if job.get("id")]
+        if not jobs:
+            return 0
+        new_ids = {job["id"] for job in jobs}
+        job_matrix = vectorize([job_text(job) for job in jobs])
+        with self._jobs_lock:
+            if self._jobs is not None:
+                known = set(self._jobs.column("id"))
+                fresh = [row for row, job in enumerate(jobs) if job["id"] not in known]
+                if len(self._jobs) + len(fresh) > self.max_jobs:
+                    self._job_loaded_at = None  # reload the most recent window on next use
+                else:
+                    self._jobs.extend(jobs[row] for row in fresh)
+                    self._job_matrix = np.vstack([self._job_matrix, job_matrix[fresh]])
+        jobs = JobStore(jobs)
+        recency = self._recency(jobs)
+        updated, now = 0, datetime.utcnow()
+        user_ids, profiles, floors = self._profile_snapshot()
+        for start in range(0, len(user_ids), self.batch_size):
+            best = (profiles[start:start + self.batch_size] @ job_matrix.T + recency).max(axis=1)
+            rows = np.flatnonzero(best > floors[start:start + self.batch_size])
+            if rows.size == 0:
+                continue
+            cursor = self.feeds.find({"user_id": {"$in": [user_ids[start + row] for row in rows]}},
+                                     {"_id": 0, "user_id": 1, "profile": 1, "applied": 1, "items": 1})
+            updated += self._merge_batch(list(cursor), jobs, job_matrix, recency, new_ids, now)
+        return updated
+
+    def _merge_batch(self, feeds, jobs, job_matrix, recency, new_ids, now):
+        if not feeds:
+            return 0
+        profiles = np.stack([np.frombuffer(feed["profile"], dtype=np.float32) for feed in feeds])
+        scores = profiles @ job_matrix.T + recency
+        changes, floors = [], {}
+        for row, feed in enumerate(feeds):
+            items = [item for item in feed.get("items", []) if item.get("id") not in new_ids]
+            floor = items[-1]["score"] if len(items) >= self.feed_size else -math.inf
+            candidates = self._feed_items(scores[row], jobs, set(feed.get("applied", [])))
+            candidates = [item for item in candidates if item["score"] > floor]
+            if not candidates:
+                continue
+            merged = sorted(items + candidates, key=lambda item: -item["score"])[:self.feed_size]
+            floors[feed["user_id"]] = self._tail_score(merged)
+            changes.append(UpdateOne({"user_id": feed["user_id"]},
+                                     {"$set": {"items": merged, "floor": floors[feed["user_id"]], "updated_at": now}}))
+        if changes:
+            self.feeds.bulk_write(changes, ordered=False)
+        for user_id, floor in floors.items():
+            self._remember(user_id, floor=floor)
+        return len(changes)
+
+    # Background refresh: events are coalesced and handled off the event loop
+    def user_changed(self, user_id):
+        self._enqueue(("user", user_id))
+
+    def jobs_added(self, jobs):
+        self._enqueue(("jobs", jobs))
+
+    def _enqueue(self, event):
+        if self._queue is not None:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+
+    async def _run(self):
+        while True:
+            events = [await self._queue.get()]
+            while not self._queue.empty():
+                events.append(self._queue.get_nowait())
+            user_ids = {payload for kind, payload in events if kind == "user"}
+            jobs = [job for kind, payload in events if kind == "jobs" for job in payload]
+            try:
+                if jobs:
+                    await asyncio.to_thread(self.merge_jobs, jobs)
+                for user_id in user_ids:
+                    await asyncio.to_thread(self.rebuild_user, user_id)
+            except Exception as e:
+                logger.warning("Refreshing recommendations failed: %s", e)
+
+    def start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue()
+            self._task = self._loop.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+            self._queue = None
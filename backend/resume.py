@@ -0,0 +1,351 @@
+"""Render resume templates to Markdown, HTML, DOCX and PDF, with a disk cache.
+
+A template is ``{"template_name": ..., "sections": [{"name", "content"}]}``.
+Section content is plain text: one line per line, and lines starting with
+"•" become bullets. ``fill`` replaces the placeholder name and email with a
+user's profile.
+
+The renderers only use the standard library:
+
+* DOCX is a minimal WordprocessingML package written with ``zipfile``.
+* PDF is written by hand with the built-in Helvetica fonts, wrapped to
+  Letter pages.
+
+Output is deterministic (fixed zip timestamps, no creation dates in the
+PDF), so equal inputs give byte-identical artifacts.
+
+``ArtifactCache`` stores rendered files on disk under a content hash of
+everything that went into them. Hits refresh the file's mtime. When the
+directory grows past ``max_bytes``, the least recently used files are
+deleted. ``byte_range`` parses HTTP Range headers for serving the files.
+"""
+import hashlib
+import html
+import io
+import json
+import os
+import threading
+import zipfile
+
+RENDERER_VERSION = 1
+FORMATS = {
+    "md": ("text/markdown; charset=utf-8", "md"),
+    "html": ("text/html; charset=utf-8", "html"),
+    "docx": ("application/vnd.openxmlformats-officedocument.wordprocessingml.document", "docx"),
+    "pdf": ("application/pdf", "pdf"),
+}
+PLACEHOLDERS = {"name": "Your Name", "email": "your.email@example.com"}
+BULLET = "•"
+
+
+def fill(template, profile):
+    """A copy of ``template`` with the placeholders replaced by the profile's non-empty values."""
+    replacements = [(PLACEHOLDERS[field], value) for field, value in profile.items()
+                    if field in PLACEHOLDERS and value]
+
+    def replace(text):
+        for placeholder, value in replacements:
+            text = text.replace(placeholder, value)
+        return text
+
+    return {**template, "sections": [{**section, "content": replace(section["content"])}
+                                     for section in template["sections"]]}
+
+
+def _lines(content):
+    """``(is_bullet, text)`` for each non-empty line of a section."""
+    for line in content.splitlines():
+        line = line.strip()
+        if line.startswith(BULLET):
+            yield True, line[len(BULLET):].strip()
+        elif line:
+            yield False, line
+
+
+def render_markdown(template):
+    out = [f"# {template['template_name']}", ""]
+    for section in template["sections"]:
+        out += [f"## {section['name']}", ""]
+        for is_bullet, text in _lines(section["content"]):
+            # Two trailing spaces keep consecutive plain lines on separate lines
+            out.append(f"- {text}" if is_bullet else f"{text}  ")
+        out.append("")
+    return "\n".join(out).encode("utf-8")
+
+
+def render_html(template):
+    title = html.escape(template["template_name"])
+    body = []
+    for section in template["sections"]:
+        body.append(f"<section><h2>{html.escape(section['name'])}</h2>")
+        bullets = []
+        for is_bullet, text in list(_lines(section["content"])) + [(False, None)]:
+            if is_bullet:
+                bullets.append(f"<li>{html.escape(text)}</li>")
+                continue
+            if bullets:
+                body.append("<ul>" + "".join(bullets) + "</ul>")
+                bullets = []
+            if text is not None:
+                body.append(f"<p>{html.escape(text)}</p>")
+        body.append("</section>")
+    return (
+        "<!DOCTYPE html>\n<html lang=\"en\"><head><meta charset=\"utf-8\">"
+        f"<title>{title}</title><style>"
+        "body{font-family:Helvetica,Arial,sans-serif;max-width:780px;margin:40px auto;color:#222;line-height:1.4}"
+        "h1{font-size:24px;margin-bottom:8px}h2{font-size:16px;border-bottom:1px solid #ccc;padding-bottom:2px}"
+        "p{margin:2px 0}ul{margin:4px 0 4px 20px;padding:0}"
+        f"</style></head><body><h1>{title}</h1>{''.join(body)}</body></html>\n"
+    ).encode("utf-8")
+
+
+# DOCX: the smallest package Word, LibreOffice and Google Docs accept
+_DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+_DOCX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/></Relationships>'
+)
+
+
+def _docx_paragraph(text, size=None, bold=False, indent=False, spacing_before=0):
+    properties = []
+    if spacing_before:
+        properties.append(f'<w:spacing w:before="{spacing_before}"/>')
+    if indent:
+        properties.append('<w:ind w:left="360" w:hanging="240"/>')
+    run = ("<w:b/>" if bold else "") + (f'<w:sz w:val="{size * 2}"/>' if size else "")
+    return (
+        f"<w:p>{'<w:pPr>' + ''.join(properties) + '</w:pPr>' if properties else ''}"
+        f"<w:r>{'<w:rPr>' + run + '</w:rPr>' if run else ''}"
+        f'<w:t xml:space="preserve">{html.escape(text, quote=False)}</w:t></w:r></w:p>'
+    )
+
+
+def render_docx(template):
+    paragraphs = [_docx_paragraph(template["template_name"], size=18, bold=True)]
+    for section in template["sections"]:
+        paragraphs.append(_docx_paragraph(section["name"], size=13, bold=True, spacing_before=240))
+        for is_bullet, text in _lines(section["content"]):
+            paragraphs.append(_docx_paragraph(f"{BULLET} {text}" if is_bullet else text, indent=is_bullet))
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+        + "".join(paragraphs)
+        + '<w:sectPr><w:pgSz w:w="12240" w:h="15840"/>'
+        '<w:pgMar w:top="1080" w:right="1080" w:bottom="1080" w:left="1080"/></w:sectPr>'
+        "</w:body></w:document>"
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as package:
+        for name, data in (("[Content_Types].xml", _DOCX_CONTENT_TYPES), ("_rels/.rels", _DOCX_RELS),
+                           ("word/document.xml", document)):
+            package.writestr(zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0)), data,
+                             compress_type=zipfile.ZIP_DEFLATED)
+    return buffer.getvalue()
+
+
+# PDF: Letter pages, standard Type 1 fonts (no embedding), WinAnsi text
+_PAGE_WIDTH, _PAGE_HEIGHT, _MARGIN = 612, 792, 54
+_AVERAGE_CHAR_WIDTH = 0.55  # of the font size; slightly wide for Helvetica, so lines never overflow
+
+
+def _pdf_text(text):
+    data = text.encode("cp1252", "replace")
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def _wrap(text, size, width):
+    per_line = max(10, int(width / (size * _AVERAGE_CHAR_WIDTH)))
+    lines, current = [], ""
+    for word in text.split():
+        candidate = f"{current} {word}" if current else word
+        if len(candidate) > per_line and current:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    return lines + [current] if current else lines
+
+
+def render_pdf(template):
+    pages, operations = [], []
+    y = _PAGE_HEIGHT - _MARGIN
+
+    def emit(text, font, size, indent=0, before=0):
+        nonlocal y, operations
+        y -= before
+        for line in _wrap(text, size, _PAGE_WIDTH - 2 * _MARGIN - indent) or [""]:
+            if y - size < _MARGIN:
+                pages.append(operations)
+                operations, y = [], _PAGE_HEIGHT - _MARGIN
+            y -= size * 1.3
+            operations.append(b"BT /%s %d Tf %d %.1f Td (%s) Tj ET" % (
+                font.encode(), size, _MARGIN + indent, y, _pdf_text(line)))
+
+    emit(template["template_name"], "F2", 18)
+    for section in template["sections"]:
+        emit(section["name"], "F2", 13, before=10)
+        for is_bullet, text in _lines(section["content"]):
+            if is_bullet:
+                emit(f"{BULLET} {text}", "F1", 10, indent=12)
+            else:
+                emit(text, "F1", 10)
+    pages.append(operations)
+
+    # Objects: 1 catalog, 2 page tree, 3-4 fonts, then a page and its content stream per page
+    objects = [None, None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>"]
+    kids = []
+    for operations in pages:
+        stream = b"\n".join(operations)
+        page_number = len(objects) + 1
+        kids.append(page_number)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+                       b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>"
+                       % (_PAGE_WIDTH, _PAGE_HEIGHT, page_number + 1))
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), len(kids))
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+RENDERERS = {"md": render_markdown, "html": render_html, "docx": render_docx, "pdf": render_pdf}
+
+
+def render(template, fmt):
+    return RENDERERS[fmt](template)
+
+
+class ArtifactCache:
+    """Rendered files on disk, keyed by content hash, evicted least recently used first."""
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(*parts):
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def path(self, key, extension):
+        return os.path.join(self.directory, f"{key}.{extension}")
+
+    def open(self, key, extension, build):
+        """An open binary file holding the artifact, calling ``build()`` for its bytes on a miss.
+
+        The file is opened before returning, so eviction by another thread or
+        worker cannot remove it from under the caller.
+        """
+        path = self.path(key, extension)
+        for _ in range(3):
+            try:
+                f = open(path, "rb")
+                os.utime(path)  # recently used
+                return f
+            except FileNotFoundError:
+                pass
+            data = build()
+            os.makedirs(self.directory, exist_ok=True)
+            temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporary, "wb") as out:
+                out.write(data)
+            os.replace(temporary, path)
+            self._added(len(data))
+        raise FileNotFoundError(path)
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _added(self, size):
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += size
+            if self._size > self.max_bytes:
+                self._size = self._evict()
+
+    def _evict(self):
+        """Delete the oldest files down to 90% of ``max_bytes``; returns the remaining size."""
+        entries = sorted(self._entries())  # rescan: other workers share the directory
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        return total
+
+
+def byte_range(header, size):
+    """``(start, end)`` (inclusive) for a single-range ``Range`` header, or None to send the whole file.
+
+    Raises ValueError when the range cannot be satisfied. Malformed headers
+    and multi-range requests are ignored, which HTTP allows.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            start, end = max(0, size - int(last)), size - 1
+    except ValueError:
+        return None
+    if start > end and first and last:
+        return None
+    if start >= size or end < start:
+        raise ValueError(f"bytes */{size}")
+    return start, min(end, size - 1)
+
+
+def read_chunks(f, start, end, chunk_size=64 * 1024):
+    """Bytes ``start..end`` (inclusive) of an open file, then close it."""
+    try:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
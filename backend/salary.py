@@ -0,0 +1,68 @@
+"""Parse display strings for pay and job growth into numbers.
+
+``parse_salary`` turns strings such as "$65,000 - $120,000", "$20/hour",
+"$15-25/hour" or "$90k+" into annualized ``(min, max)`` dollars. Hourly,
+daily, weekly and monthly figures are scaled to a full-time year.
+"Salary not specified", "N/A" and similar give ``(None, None)``.
+
+``parse_growth`` extracts the percentage from outlook strings like
+"13% growth (faster than average)". Words such as "decline" make it
+negative.
+
+The parsed values are stored next to the display strings at write time, so
+Mongo can filter and sort on them with an index.
+"""
+import re
+
+HOURS_PER_YEAR = 2080
+PERIODS = {
+    "hour": HOURS_PER_YEAR, "hr": HOURS_PER_YEAR, "hourly": HOURS_PER_YEAR,
+    "day": 260, "daily": 260,
+    "week": 52, "wk": 52, "weekly": 52,
+    "month": 12, "mo": 12, "monthly": 12,
+    "year": 1, "yr": 1, "annual": 1, "annually": 1, "annum": 1,
+}
+
+_AMOUNT = re.compile(r"(\d+(?:,\d{3})*(?:\.\d+)?)\s*([km])?\b", re.IGNORECASE)
+_PERIOD = re.compile(r"(?:/|\bper\b|\ban?\b)\s*(" + "|".join(sorted(PERIODS, key=len, reverse=True)) + r")\b"
+                     r"|\b(hourly|daily|weekly|monthly|annually|annual)\b", re.IGNORECASE)
+_GROWTH = re.compile(r"(-?\d+(?:\.\d+)?)\s*%")
+_DECLINE = re.compile(r"\b(decline|declining|decrease|shrink)", re.IGNORECASE)
+_MULTIPLIERS = {"k": 1000, "m": 1000000}
+
+
+def parse_salary(text):
+    """Annualized ``(min, max)`` from a pay string; ``(None, None)`` when there are no figures."""
+    if text is None:
+        return None, None
+    if isinstance(text, (int, float)):
+        return float(text), float(text)
+    amounts = []
+    for number, suffix in _AMOUNT.findall(text):
+        amounts.append(float(number.replace(",", "")) * _MULTIPLIERS.get(suffix.lower(), 1))
+    if not amounts:
+        return None, None
+    period = _PERIOD.search(text)
+    if period:
+        multiplier = PERIODS[(period.group(1) or period.group(2)).lower()]
+    else:
+        # No explicit period: small figures are hourly rates, everything else is yearly
+        multiplier = HOURS_PER_YEAR if max(amounts) < 500 else 1
+    low, high = min(amounts[:2]), max(amounts[:2])
+    return round(low * multiplier, 2), round(high * multiplier, 2)
+
+
+def parse_growth(text):
+    """Growth percentage from an outlook string, or None."""
+    if not text:
+        return None
+    match = _GROWTH.search(text)
+    if not match:
+        return None
+    value = float(match.group(1))
+    return -abs(value) if _DECLINE.search(text) else value
+
+
+def salary_fields(text):
+    low, high = parse_salary(text)
+    return {"salary_min": low, "salary_max": high}
@@ -1,23 +1,123 @@
-from fastapi import FastAPI, HTTPException, Request, Depends
+import os
+import sys
+import time
+IMPORT_STARTED = time.perf_counter()
+
+if __name__ == "__main__" and int(os.environ.get('WEB_CONCURRENCY', '1')) > 1:
+    # Hand over to the worker manager before building anything a forked child would inherit
+    os.execv(sys.executable, [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'workers.py')])
+
+from fastapi import FastAPI, HTTPException, Request, Depends, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pymongo import MongoClient
-from pydantic import BaseModel
+from pymongo import MongoClient, UpdateOne
+from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import List, Optional, Dict, Any
-import os
+import asyncio
+import functools
+import itertools
+import hashlib
+import hmac
+import io
+import json
+import logging
+import re
+import tempfile
 import uuid
 import requests
 from datetime import datetime, timedelta
-import uvicorn
+from urllib.parse import urlsplit
+
+import archive
+import autocomplete
+import catalog
+import dedup
+import export
+import geo
+import loopmon
+import metrics
+import profiling
+import querylog
+import querywatch
+import ratelimit
+import recommend
+import resume
+import salary
+import shmcache
+import tracing
+import transitions
+
+logger = logging.getLogger(__name__)
 
 # Environment variables
 MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
 DB_NAME = os.environ.get('DB_NAME', 'techpathfinder_db')
 ADZUNA_APP_ID = os.environ.get('ADZUNA_APP_ID')
 ADZUNA_API_KEY = os.environ.get('ADZUNA_API_KEY')
+ADZUNA_API_URL = os.environ.get('ADZUNA_API_URL', 'https://api.adzuna.com/v1/api/jobs/us/search/1')
+EMERGENT_AUTH_URL = os.environ.get('EMERGENT_AUTH_URL', 'https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data')
+BOOTSTRAP_SECTION_TIMEOUT = float(os.environ.get('BOOTSTRAP_SECTION_TIMEOUT', '5'))
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+LOOP_STRICT = os.environ.get('LOOP_STRICT', '0') == '1'
+WORKER_ID = os.environ.get('WORKER_ID')
+WORKER_COUNT = int(os.environ.get('WORKER_COUNT', '1'))  # set by workers.py
+CAREER_PATHS_CACHE_TTL = float(os.environ.get('CAREER_PATHS_CACHE_TTL', '300'))
+SESSION_CACHE_TTL = float(os.environ.get('SESSION_CACHE_TTL', '60'))
+JOB_SEARCH_CACHE_TTL = float(os.environ.get('JOB_SEARCH_CACHE_TTL', '600'))
+APPLICATION_ARCHIVE_AFTER_DAYS = float(os.environ.get('APPLICATION_ARCHIVE_AFTER_DAYS', '0'))  # opt-in; 0 disables
+MAINTENANCE_INTERVAL = float(os.environ.get('MAINTENANCE_INTERVAL', '3600'))
+JOB_RETENTION_DAYS = float(os.environ.get('JOB_RETENTION_DAYS', '30'))
+RECOMMENDATIONS_STALE_HOURS = float(os.environ.get('RECOMMENDATIONS_STALE_HOURS', '24'))  # feeds rebuilt at startup
+GAZETTEER_FILE = os.environ.get('GAZETTEER_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'gazetteer.csv'))
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')  # memory or mongo
+RATE_LIMIT_RPS = float(os.environ.get('RATE_LIMIT_RPS', '20'))
+RATE_LIMIT_BURST = float(os.environ.get('RATE_LIMIT_BURST', '40'))
+TRUSTED_PROXIES = os.environ.get('TRUSTED_PROXIES', '')  # addresses/CIDRs whose X-Forwarded-For is honoured
+SEARCH_RATE_LIMIT_PER_MIN = float(os.environ.get('SEARCH_RATE_LIMIT_PER_MIN', '30'))
+SEARCH_RATE_LIMIT_BURST = float(os.environ.get('SEARCH_RATE_LIMIT_BURST', '10'))
+MAX_IN_FLIGHT = int(os.environ.get('MAX_IN_FLIGHT', '64'))
+MAX_QUEUED = int(os.environ.get('MAX_QUEUED', '256'))
+QUEUE_TIMEOUT = float(os.environ.get('QUEUE_TIMEOUT', '5'))
+ADZUNA_MAX_RPS = float(os.environ.get('ADZUNA_MAX_RPS', '5'))
+ADZUNA_DAILY_QUOTA = int(os.environ.get('ADZUNA_DAILY_QUOTA', '250'))
+SEARCH_LOG_MAX_PER_CLIENT = int(os.environ.get('SEARCH_LOG_MAX_PER_CLIENT', '3'))  # searches one client adds to a query's popularity per hour
+PREWARM_TOP_K = int(os.environ.get('PREWARM_TOP_K', '20'))
+PREWARM_INTERVAL = float(os.environ.get('PREWARM_INTERVAL', '60'))
+PREWARM_REFRESH_AHEAD = float(os.environ.get('PREWARM_REFRESH_AHEAD', '120'))
+DEDUP_MAX_SESSIONS = int(os.environ.get('DEDUP_MAX_SESSIONS', '1000'))  # client/query pairs whose shown listings are remembered
+AUTOCOMPLETE_MAX_TERMS = int(os.environ.get('AUTOCOMPLETE_MAX_TERMS', '20000'))
+AUTOCOMPLETE_REBUILD_INTERVAL = float(os.environ.get('AUTOCOMPLETE_REBUILD_INTERVAL', '300'))
+AUTOCOMPLETE_MIN_COUNT = int(os.environ.get('AUTOCOMPLETE_MIN_COUNT', '5'))  # distinct clients needed before a query is suggested
+CAREER_TRANSITIONS_SYNC_INTERVAL = float(os.environ.get('CAREER_TRANSITIONS_SYNC_INTERVAL', '300'))
+CONTENT_DIR = os.environ.get('CONTENT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'catalog'))
+CONTENT_RELOAD_INTERVAL = float(os.environ.get('CONTENT_RELOAD_INTERVAL', '2'))  # 0 disables hot reload
+RESUME_CACHE_DIR = os.environ.get('RESUME_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'techpathfinder-resume-cache'))
+RESUME_CACHE_MAX_MB = float(os.environ.get('RESUME_CACHE_MAX_MB', '256'))
+DEBUG = os.environ.get('DEBUG', '0') == '1'  # adds X-DB-Time / X-DB-Queries response headers
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '100'))  # 0 disables the slow-query log
+QUERY_COUNT_WARN = int(os.environ.get('QUERY_COUNT_WARN', '25'))
+QUERY_REPEAT_WARN = int(os.environ.get('QUERY_REPEAT_WARN', '10'))
+QUERY_EXPLAIN = os.environ.get('QUERY_EXPLAIN', '1') == '1'
+
+tracer = tracing.tracer_from_env()
+profiler = profiling.profiler_from_env()
+loop_monitor = loopmon.monitor_from_env()
+# Shared across worker processes when started through workers.py
+cache = shmcache.cache_from_env()
 
 # MongoDB setup
-client = MongoClient(MONGO_URL)
+# Per-request command counts, slow queries and COLLSCAN plans of new query shapes
+query_watch = querywatch.QueryWatch(SLOW_QUERY_MS, QUERY_COUNT_WARN, QUERY_REPEAT_WARN, QUERY_EXPLAIN)
+mongo_listeners = [metrics.MongoCommandMetrics(), tracing.MongoCommandTracing(), query_watch]
+if LOOP_STRICT:
+    mongo_listeners.append(loopmon.MongoBlockingCallDetector())
+if MONGO_URL.startswith('mongomock://'):
+    # In-memory stand-in used by the local test and benchmark suites; reports to the same listeners
+    import mockmongo
+    client = mockmongo.client(mongo_listeners)
+else:
+    client = MongoClient(MONGO_URL, event_listeners=mongo_listeners)
 db = client[DB_NAME]
 
 # Collections
@@ -26,9 +126,64 @@ sessions_collection = db.sessions
 career_paths_collection = db.career_paths
 resources_collection = db.resources
 job_applications_collection = db.job_applications
+rate_limits_collection = db.rate_limits
+query_log_collection = db.query_log
+jobs_collection = db.jobs
+recommendations_collection = db.recommendations
+
+# Rate limiting: per-client buckets and the Adzuna budget, optionally shared through Mongo
+if RATE_LIMIT_BACKEND == 'mongo':
+    bucket_store = ratelimit.MongoBucketStore(rate_limits_collection)
+    quota_collection = rate_limits_collection
+    adzuna_rps, adzuna_quota = ADZUNA_MAX_RPS, ADZUNA_DAILY_QUOTA
+else:
+    bucket_store = ratelimit.MemoryBucketStore()
+    quota_collection = None
+    # Per-process buckets: each worker spends only its share of the Adzuna budget
+    adzuna_rps = ADZUNA_MAX_RPS / max(1, WORKER_COUNT)
+    adzuna_quota = ratelimit.worker_share(ADZUNA_DAILY_QUOTA, int(WORKER_ID or 0), WORKER_COUNT)
+client_limiter = ratelimit.TokenBucketLimiter("client", RATE_LIMIT_RPS, RATE_LIMIT_BURST, bucket_store)
+search_limiter = ratelimit.TokenBucketLimiter("search", SEARCH_RATE_LIMIT_PER_MIN / 60, SEARCH_RATE_LIMIT_BURST, bucket_store)
+adzuna_budget = ratelimit.UpstreamBudget(
+    "adzuna",
+    ratelimit.TokenBucketLimiter("adzuna", adzuna_rps, adzuna_rps, bucket_store),
+    ratelimit.QuotaCounter("adzuna", adzuna_quota, "day", quota_collection),
+)
+
+def verified_session_user(token: str):
+    # Only sessions already verified into the cache count; unknown tokens are keyed by client IP
+    cached = cache.get("sessions", token, record=False)  # a peek, not a session-cache lookup
+    if cached is not None and cached[1] >= datetime.utcnow():
+        return cached[0]["id"]
+    return None
+
+rate_limit_key = functools.partial(ratelimit.client_key, resolve_token=verified_session_user,
+                                   trusted_proxies=ratelimit.parse_networks(TRUSTED_PROXIES))
+
+# Popularity of job searches, persisted per worker and merged for prewarming
+search_log = querylog.QueryLog(query_log_collection, "job_search", WORKER_ID, max_per_client=SEARCH_LOG_MAX_PER_CLIENT)
+# Popularity of the query text alone, whatever the location and filters; feeds autocomplete
+query_text_log = querylog.QueryLog(query_log_collection, "query_text", WORKER_ID, max_per_client=SEARCH_LOG_MAX_PER_CLIENT)
+# Old applications move to monthly archive collections; expired sessions are pruned
+application_archiver = archive.MonthlyArchiver(
+    job_applications_collection, "applied_at", timedelta(days=APPLICATION_ARCHIVE_AFTER_DAYS),
+    indexes=[[("user_id", 1), ("applied_at", 1)], "applied_at"],
+)
+maintenance = archive.Maintenance({
+    "archive_applications": application_archiver.archive,
+    "prune_sessions": lambda: archive.prune_expired(sessions_collection, "expires_at"),
+}, MAINTENANCE_INTERVAL)
+recommender = recommend.RecommendationEngine(
+    recommendations_collection, users_collection, career_paths_collection,
+    job_applications_collection, jobs_collection,
+)
 
 app = FastAPI(title="TechPathfinder API", description="CS/IT Career Guidance Platform")
 
+# Admission control sits inside CORS so rejections still carry CORS headers
+app.add_middleware(ratelimit.AdmissionMiddleware, limiter=client_limiter, key=rate_limit_key,
+                   max_in_flight=MAX_IN_FLIGHT, max_queued=MAX_QUEUED, queue_timeout=QUEUE_TIMEOUT)
+
 # CORS setup
 app.add_middleware(
     CORSMiddleware,
@@ -37,8 +192,15 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(querywatch.QueryWatchMiddleware, watch=query_watch, debug_headers=DEBUG)
+app.add_middleware(metrics.MetricsMiddleware, started_at=IMPORT_STARTED)
+app.add_middleware(tracing.TracingMiddleware, tracer=tracer)
+app.add_middleware(profiling.ProfilingMiddleware, profiler=profiler)
+if LOOP_STRICT:
+    app.add_middleware(loopmon.StrictLoopMiddleware)
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 # Pydantic models
 class User(BaseModel):
@@ -97,181 +259,203 @@ class JobApplication(BaseModel):
     applied_at: datetime
     status: str  # applied, reviewed, interviewed, rejected, hired
 
+class CareerPathChoice(BaseModel):
+    career_path_id: str
+
 class JobSearchQuery(BaseModel):
     query: str
     location: Optional[str] = None
     job_type: Optional[str] = None  # full_time, part_time, internship
     experience_level: Optional[str] = None  # entry, mid, senior
+    # Local geo search over previously fetched jobs (no upstream call)
+    radius_km: Optional[float] = Field(None, gt=0)  # around latitude/longitude, else around the geocoded location
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+    bbox: Optional[List[float]] = None  # [min_lon, min_lat, max_lon, max_lat]
+    include_remote: bool = False
+    min_salary: Optional[float] = None  # annualized
+    sort: Optional[str] = None  # relevance, salary, date
+
+    # Out-of-range coordinates would fail inside $geoNear/$geoWithin as a 500; reject them as a 422 here
+    @field_validator("bbox")
+    @classmethod
+    def check_bbox(cls, bbox):
+        if bbox is None:
+            return bbox
+        if len(bbox) != 4:
+            raise ValueError("bbox must be [min_lon, min_lat, max_lon, max_lat]")
+        min_lon, min_lat, max_lon, max_lat = bbox
+        if not (-180 <= min_lon < max_lon <= 180 and -90 <= min_lat < max_lat <= 90):
+            raise ValueError("bbox needs -180 <= min_lon < max_lon <= 180 and -90 <= min_lat < max_lat <= 90")
+        return bbox
+
+    @model_validator(mode="after")
+    def check_geo(self):
+        if self.radius_km is not None and self.bbox is not None:
+            raise ValueError("use either radius_km or bbox, not both")
+        if (self.latitude is None) != (self.longitude is None):
+            raise ValueError("latitude and longitude must be given together")
+        return self
 
 # Authentication helpers
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
+@tracing.traced("auth.resolve_session_user")
+def resolve_session_user(token: str):
+    cached = cache.get("sessions", token)
+    if cached is not None and cached[1] >= datetime.utcnow():
+        return cached[0]
+
     session = sessions_collection.find_one({"session_token": token})
     
     if not session or session["expires_at"] < datetime.utcnow():
         raise HTTPException(status_code=401, detail="Invalid or expired session")
     
-    user = users_collection.find_one({"id": session["user_id"]})
+    user = users_collection.find_one({"id": session["user_id"]}, {"_id": 0})
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     
+    ttl = min(SESSION_CACHE_TTL, (session["expires_at"] - datetime.utcnow()).total_seconds())
+    cache.set("sessions", token, (user, session["expires_at"]), ttl)
     return user
 
-# Initialize career paths data
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return await asyncio.to_thread(resolve_session_user, credentials.credentials)
+
+def require_admin(request: Request):
+    token = request.headers.get("X-Admin-Token")
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API is disabled")
+    if not token or not hmac.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+# Outbound HTTP, timed per host and traced as a child span
+def outbound_get(url: str, **kwargs):
+    loopmon.check_sync_io("http", urlsplit(url).hostname)
+    started = time.perf_counter()
+    status = "error"
+    with tracing.span(f"GET {urlsplit(url).hostname}", "client", **{"http.url": url}) as span:
+        if span is not None:
+            kwargs["headers"] = {**kwargs.get("headers", {}), "traceparent": span.traceparent}
+        try:
+            response = requests.get(url, **kwargs)
+            status = str(response.status_code)
+            return response
+        finally:
+            if span is not None:
+                span.set_attribute("http.status_code", status)
+            metrics.record_outbound(url, status, time.perf_counter() - started)
+
+# Career path seed data: loaded lazily from a versioned file, upserted by content hash
+CAREER_PATHS_SEED_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'career_paths.json')
+CAREER_PATH_ID_NAMESPACE = uuid.UUID('6f1c2a9e-3b1d-4c55-9d8e-2f0b7c4e5a11')
+
+@functools.lru_cache(maxsize=1)
+def load_career_path_seed():
+    with open(CAREER_PATHS_SEED_FILE, encoding='utf-8') as f:
+        seed = json.load(f)
+    career_paths = []
+    for path in seed["career_paths"]:
+        # Numeric forms of the display strings, for server-side filtering and sorting
+        salary_min, salary_max = salary.parse_salary(path.get("salary_range"))
+        path = {**path, "salary_min": salary_min, "salary_max": salary_max,
+                "growth_pct": salary.parse_growth(path.get("job_outlook"))}
+        content_hash = hashlib.sha256(json.dumps(path, sort_keys=True).encode()).hexdigest()
+        career_paths.append({
+            **path,
+            "id": str(uuid.uuid5(CAREER_PATH_ID_NAMESPACE, path["title"])),
+            "content_hash": content_hash,
+            "seed_version": seed["version"],
+        })
+    return career_paths
+
 def initialize_career_paths():
-    if career_paths_collection.count_documents({}) == 0:
-        career_paths = [
-            {
-                "id": str(uuid.uuid4()),
-                "title": "Web Developer",
-                "description": "Build websites and web applications using modern technologies",
-                "icon": "🌐",
-                "skills": ["HTML", "CSS", "JavaScript", "React", "Node.js", "Python", "Git"],
-                "roadmap": [
-                    {"step": 1, "title": "HTML & CSS Fundamentals", "duration": "2-4 weeks", "description": "Learn the building blocks of web pages"},
-                    {"step": 2, "title": "JavaScript Basics", "duration": "4-6 weeks", "description": "Add interactivity to your websites"},
-                    {"step": 3, "title": "Frontend Framework (React)", "duration": "6-8 weeks", "description": "Build dynamic user interfaces"},
-                    {"step": 4, "title": "Backend Development", "duration": "8-10 weeks", "description": "Learn server-side programming"},
-                    {"step": 5, "title": "Database Management", "duration": "4-6 weeks", "description": "Store and manage application data"},
-                    {"step": 6, "title": "Deployment & DevOps", "duration": "3-4 weeks", "description": "Deploy your applications to the web"}
-                ],
-                "resources": [
-                    {"name": "freeCodeCamp", "url": "https://freecodecamp.org", "type": "course"},
-                    {"name": "MDN Web Docs", "url": "https://developer.mozilla.org", "type": "documentation"},
-                    {"name": "JavaScript30", "url": "https://javascript30.com", "type": "practice"},
-                    {"name": "React Official Tutorial", "url": "https://react.dev/learn", "type": "tutorial"}
-                ],
-                "salary_range": "$65,000 - $120,000",
-                "job_outlook": "13% growth (faster than average)",
-                "difficulty_level": "Beginner to Intermediate"
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "title": "Data Scientist",
-                "description": "Analyze large datasets to extract insights and build predictive models",
-                "icon": "📊",
-                "skills": ["Python", "R", "SQL", "Machine Learning", "Statistics", "Pandas", "NumPy", "Matplotlib"],
-                "roadmap": [
-                    {"step": 1, "title": "Python Programming", "duration": "4-6 weeks", "description": "Master Python fundamentals"},
-                    {"step": 2, "title": "Statistics & Math", "duration": "6-8 weeks", "description": "Essential mathematical foundations"},
-                    {"step": 3, "title": "Data Manipulation", "duration": "4-6 weeks", "description": "Learn Pandas and NumPy"},
-                    {"step": 4, "title": "Data Visualization", "duration": "3-4 weeks", "description": "Create compelling data visualizations"},
-                    {"step": 5, "title": "Machine Learning", "duration": "8-12 weeks", "description": "Build predictive models"},
-                    {"step": 6, "title": "Advanced Topics", "duration": "ongoing", "description": "Deep learning, NLP, computer vision"}
-                ],
-                "resources": [
-                    {"name": "Kaggle Learn", "url": "https://kaggle.com/learn", "type": "course"},
-                    {"name": "Coursera Data Science", "url": "https://coursera.org", "type": "specialization"},
-                    {"name": "Python for Data Analysis", "url": "https://wesmckinney.com/book/", "type": "book"},
-                    {"name": "Jupyter Notebooks", "url": "https://jupyter.org", "type": "tool"}
-                ],
-                "salary_range": "$95,000 - $165,000",
-                "job_outlook": "35% growth (much faster than average)",
-                "difficulty_level": "Intermediate to Advanced"
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "title": "Cybersecurity Analyst",
-                "description": "Protect organizations from cyber threats and security breaches",
-                "icon": "🔒",
-                "skills": ["Network Security", "Ethical Hacking", "Risk Assessment", "Incident Response", "Python", "Linux", "Cryptography"],
-                "roadmap": [
-                    {"step": 1, "title": "IT Fundamentals", "duration": "4-6 weeks", "description": "Computer networks and systems"},
-                    {"step": 2, "title": "Security Basics", "duration": "6-8 weeks", "description": "Core security principles"},
-                    {"step": 3, "title": "Network Security", "duration": "6-8 weeks", "description": "Firewalls, VPNs, and monitoring"},
-                    {"step": 4, "title": "Ethical Hacking", "duration": "8-10 weeks", "description": "Penetration testing techniques"},
-                    {"step": 5, "title": "Incident Response", "duration": "4-6 weeks", "description": "Handle security breaches"},
-                    {"step": 6, "title": "Certifications", "duration": "3-6 months", "description": "Security+, CEH, CISSP"}
-                ],
-                "resources": [
-                    {"name": "Cybrary", "url": "https://cybrary.it", "type": "platform"},
-                    {"name": "TryHackMe", "url": "https://tryhackme.com", "type": "practice"},
-                    {"name": "SANS Training", "url": "https://sans.org", "type": "training"},
-                    {"name": "Security+ Study Guide", "url": "https://comptia.org", "type": "certification"}
-                ],
-                "salary_range": "$85,000 - $140,000",
-                "job_outlook": "33% growth (much faster than average)",
-                "difficulty_level": "Intermediate"
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "title": "Software Engineer",
-                "description": "Design, develop, and maintain software applications and systems",
-                "icon": "💻",
-                "skills": ["Programming Languages", "Data Structures", "Algorithms", "System Design", "Git", "Testing", "Agile"],
-                "roadmap": [
-                    {"step": 1, "title": "Programming Fundamentals", "duration": "6-8 weeks", "description": "Choose a language and master basics"},
-                    {"step": 2, "title": "Data Structures & Algorithms", "duration": "8-12 weeks", "description": "Essential CS concepts"},
-                    {"step": 3, "title": "Object-Oriented Programming", "duration": "4-6 weeks", "description": "Design patterns and OOP principles"},
-                    {"step": 4, "title": "Software Development Practices", "duration": "6-8 weeks", "description": "Version control, testing, debugging"},
-                    {"step": 5, "title": "System Design", "duration": "8-10 weeks", "description": "Architecture and scalability"},
-                    {"step": 6, "title": "Specialization", "duration": "ongoing", "description": "Mobile, web, systems, or game development"}
-                ],
-                "resources": [
-                    {"name": "LeetCode", "url": "https://leetcode.com", "type": "practice"},
-                    {"name": "GitHub", "url": "https://github.com", "type": "platform"},
-                    {"name": "Clean Code", "url": "https://amazon.com", "type": "book"},
-                    {"name": "System Design Primer", "url": "https://github.com/donnemartin/system-design-primer", "type": "guide"}
-                ],
-                "salary_range": "$85,000 - $160,000",
-                "job_outlook": "25% growth (much faster than average)",
-                "difficulty_level": "Intermediate to Advanced"
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "title": "AI Engineer",
-                "description": "Develop artificial intelligence and machine learning solutions",
-                "icon": "🤖",
-                "skills": ["Python", "Machine Learning", "Deep Learning", "TensorFlow", "PyTorch", "NLP", "Computer Vision"],
-                "roadmap": [
-                    {"step": 1, "title": "Python & Math Foundations", "duration": "6-8 weeks", "description": "Linear algebra, calculus, statistics"},
-                    {"step": 2, "title": "Machine Learning Basics", "duration": "8-10 weeks", "description": "Supervised and unsupervised learning"},
-                    {"step": 3, "title": "Deep Learning", "duration": "10-12 weeks", "description": "Neural networks and frameworks"},
-                    {"step": 4, "title": "Specialization Areas", "duration": "12-16 weeks", "description": "NLP, computer vision, or reinforcement learning"},
-                    {"step": 5, "title": "MLOps", "duration": "6-8 weeks", "description": "Model deployment and monitoring"},
-                    {"step": 6, "title": "Advanced Research", "duration": "ongoing", "description": "Latest AI developments and research"}
-                ],
-                "resources": [
-                    {"name": "Fast.ai", "url": "https://fast.ai", "type": "course"},
-                    {"name": "Deep Learning Specialization", "url": "https://coursera.org", "type": "specialization"},
-                    {"name": "Papers With Code", "url": "https://paperswithcode.com", "type": "research"},
-                    {"name": "Hugging Face", "url": "https://huggingface.co", "type": "platform"}
-                ],
-                "salary_range": "$120,000 - $200,000",
-                "job_outlook": "23% growth (much faster than average)",
-                "difficulty_level": "Advanced"
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "title": "Cloud Engineer",
-                "description": "Design and manage cloud infrastructure and services",
-                "icon": "☁️",
-                "skills": ["AWS/Azure/GCP", "Docker", "Kubernetes", "Infrastructure as Code", "DevOps", "Linux", "Networking"],
-                "roadmap": [
-                    {"step": 1, "title": "Linux & Networking", "duration": "4-6 weeks", "description": "System administration basics"},
-                    {"step": 2, "title": "Cloud Platform Basics", "duration": "6-8 weeks", "description": "Choose AWS, Azure, or GCP"},
-                    {"step": 3, "title": "Containerization", "duration": "4-6 weeks", "description": "Docker and container orchestration"},
-                    {"step": 4, "title": "Infrastructure as Code", "duration": "6-8 weeks", "description": "Terraform, CloudFormation"},
-                    {"step": 5, "title": "CI/CD Pipelines", "duration": "4-6 weeks", "description": "Automated deployment processes"},
-                    {"step": 6, "title": "Monitoring & Security", "duration": "6-8 weeks", "description": "Cloud security and observability"}
-                ],
-                "resources": [
-                    {"name": "AWS Training", "url": "https://aws.amazon.com/training/", "type": "training"},
-                    {"name": "A Cloud Guru", "url": "https://acloudguru.com", "type": "platform"},
-                    {"name": "Docker Documentation", "url": "https://docs.docker.com", "type": "documentation"},
-                    {"name": "Kubernetes.io", "url": "https://kubernetes.io/docs/", "type": "documentation"}
-                ],
-                "salary_range": "$95,000 - $155,000",
-                "job_outlook": "15% growth (faster than average)",
-                "difficulty_level": "Intermediate to Advanced"
-            }
-        ]
-        career_paths_collection.insert_many(career_paths)
+    career_paths_collection.create_index("title", unique=True)
+    career_paths_collection.create_index("id")
+    career_paths_collection.create_index("salary_max")
+    career_paths_collection.create_index("growth_pct")
+    career_paths = load_career_path_seed()
+    existing = {
+        doc["title"]: doc.get("content_hash")
+        for doc in career_paths_collection.find(
+            {"title": {"$in": [path["title"] for path in career_paths]}},
+            {"_id": 0, "title": 1, "content_hash": 1}
+        )
+    }
+    changes = [
+        UpdateOne({"title": path["title"]}, {"$set": path}, upsert=True)
+        for path in career_paths
+        if existing.get(path["title"]) != path["content_hash"]
+    ]
+    if changes:
+        career_paths_collection.bulk_write(changes, ordered=False)
+        cache.invalidate("career_paths")
+    return len(changes)
+
+def seed_career_paths_in_background():
+    started = time.perf_counter()
+    try:
+        changed = initialize_career_paths()
+    except Exception as e:
+        logger.warning("Career path seeding failed: %s", e)
+        return
+    metrics.COLD_START.set(time.perf_counter() - started, "seed")
+    if changed:
+        completions.refresh()
+        career_transitions.refresh()
+    logger.info("Career path seed applied (%d changed) in %.1f ms", changed, (time.perf_counter() - started) * 1000)
+
+def rebuild_recommendations_in_background():
+    started = time.perf_counter()
+    try:
+        recommender.ensure_indexes()
+        rebuilt = recommender.rebuild_stale(timedelta(hours=RECOMMENDATIONS_STALE_HOURS))
+    except Exception as e:
+        logger.warning("Rebuilding recommendations failed: %s", e)
+        return
+    logger.info("Rebuilt %d stale recommendation feeds in %.1f ms", rebuilt, (time.perf_counter() - started) * 1000)
 
 # API Routes
 @app.on_event("startup")
 async def startup_event():
-    initialize_career_paths()
+    started = time.perf_counter()
+    loop_monitor.start()
+    query_watch.start(client)
+    # Seeding runs off the event loop so the worker accepts requests immediately;
+    # with several workers only the first one seeds
+    if WORKER_ID in (None, "0"):
+        asyncio.get_running_loop().run_in_executor(None, seed_career_paths_in_background)
+        asyncio.get_running_loop().run_in_executor(None, initialize_jobs_collection)
+        asyncio.get_running_loop().run_in_executor(None, initialize_applications_collection)
+        asyncio.get_running_loop().run_in_executor(None, initialize_rate_limits_collection)
+        asyncio.get_running_loop().run_in_executor(None, initialize_query_log_collection)
+        maintenance.start()
+        asyncio.get_running_loop().run_in_executor(None, rebuild_recommendations_in_background)
+    search_log.start()
+    query_text_log.start()
+    recommender.start()
+    asyncio.get_running_loop().create_task(start_search_prewarmer())
+    completions.start()
+    career_transitions.start()
+    content_catalog.start()
+    metrics.COLD_START.set(time.perf_counter() - started, "startup")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    loop_monitor.stop()
+    search_prewarmer.stop()
+    completions.stop()
+    career_transitions.stop()
+    content_catalog.stop()
+    recommender.stop()
+    maintenance.stop()
+    search_log.stop()
+    query_text_log.stop()
+    await asyncio.to_thread(search_log.flush)
+    await asyncio.to_thread(query_text_log.flush)
+    tracer.flush()
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 @app.get("/api/health")
 async def health_check():
@@ -284,17 +468,11 @@ async def initiate_login():
     auth_url = f"https://auth.emergentagent.com/?redirect={preview_url}/profile"
     return {"auth_url": auth_url}
 
-@app.post("/api/auth/profile")
-async def create_profile(request: Request):
-    # Get session ID from headers
-    session_id = request.headers.get("X-Session-ID")
-    if not session_id:
-        raise HTTPException(status_code=400, detail="Session ID required")
-    
+def login_with_session(session_id: str):
     # Call Emergent auth API
     try:
-        response = requests.get(
-            "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data",
+        response = outbound_get(
+            EMERGENT_AUTH_URL,
             headers={"X-Session-ID": session_id}
         )
         response.raise_for_status()
@@ -341,26 +519,118 @@ async def create_profile(request: Request):
         "expires_at": session["expires_at"]
     }
 
+@app.post("/api/auth/profile")
+async def create_profile(request: Request):
+    # Get session ID from headers
+    session_id = request.headers.get("X-Session-ID")
+    if not session_id:
+        raise HTTPException(status_code=400, detail="Session ID required")
+    return await asyncio.to_thread(login_with_session, session_id)
+
 @app.get("/api/user/profile")
 async def get_profile(current_user = Depends(get_current_user)):
     return current_user
 
+@app.put("/api/user/career-path")
+async def choose_career_path(choice: CareerPathChoice, current_user: dict = Depends(get_current_user)):
+    def save():
+        if not career_paths_collection.find_one({"id": choice.career_path_id}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Career path not found")
+        users_collection.update_one({"id": current_user["id"]}, {"$set": {"career_path_id": choice.career_path_id}})
+    await asyncio.to_thread(save)
+    # Cached session users carry the old profile
+    cache.invalidate("sessions")
+    recommender.user_changed(current_user["id"])
+    return {"career_path_id": choice.career_path_id}
+
+# Recommendations: precomputed per user, refreshed in the background
+@app.get("/api/recommendations")
+async def get_recommendations(limit: int = 20, current_user: dict = Depends(get_current_user)):
+    feed = await asyncio.to_thread(
+        recommendations_collection.find_one,
+        {"user_id": current_user["id"]},
+        {"_id": 0, "items": {"$slice": max(1, limit)}, "career_path_id": 1, "updated_at": 1}
+    )
+    if feed is None:
+        recommender.user_changed(current_user["id"])
+        return {"recommendations": [], "status": "pending"}
+    return {"recommendations": feed["items"], "career_path_id": feed.get("career_path_id"),
+            "updated_at": feed["updated_at"], "status": "ready"}
+
 # Career paths endpoints
+CAREER_PATH_SORTS = {"salary": [("salary_max", -1), ("salary_min", -1)], "growth": [("growth_pct", -1)]}
+
+def list_career_paths(min_salary: Optional[float] = None, sort: Optional[str] = None):
+    query = {} if min_salary is None else {"salary_max": {"$gte": min_salary}}
+    def load():
+        cursor = career_paths_collection.find(query, {"_id": 0})
+        if sort:
+            cursor = cursor.sort(CAREER_PATH_SORTS[sort])
+        return {"career_paths": list(cursor)}
+    key = "all" if min_salary is None and not sort else f"all?min_salary={min_salary}&sort={sort}"
+    return cache.get_or_set("career_paths", key, CAREER_PATHS_CACHE_TTL, load)
+
 @app.get("/api/career-paths")
-async def get_career_paths():
-    career_paths = list(career_paths_collection.find({}, {"_id": 0}))
-    return {"career_paths": career_paths}
+async def get_career_paths(min_salary: Optional[float] = None, sort: Optional[str] = None):
+    if sort and sort not in CAREER_PATH_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(CAREER_PATH_SORTS)}")
+    return await asyncio.to_thread(list_career_paths, min_salary, sort)
+
+# Career transitions: all-pairs shortest routes between paths, kept in memory by every worker
+def career_transition_source():
+    return career_paths_collection.find(
+        {}, {"_id": 0, "id": 1, "title": 1, "skills": 1, "roadmap.duration": 1, "content_hash": 1}
+    )
+
+career_transitions = transitions.TransitionGraph(career_transition_source, CAREER_TRANSITIONS_SYNC_INTERVAL)
+
+async def ensure_career_transitions():
+    if not career_transitions.ready:
+        await asyncio.to_thread(career_transitions.refresh)
+
+@app.get("/api/career-paths/{path_id}/transitions")
+async def get_career_transitions(path_id: str):
+    await ensure_career_transitions()
+    targets = career_transitions.reachable(path_id)
+    if targets is None:
+        raise HTTPException(status_code=404, detail="Career path not found")
+    return {"from_id": path_id, "transitions": targets}
+
+@app.get("/api/career-paths/{path_id}/transitions/{target_id}")
+async def get_career_transition(path_id: str, target_id: str):
+    await ensure_career_transitions()
+    route = career_transitions.route(path_id, target_id)
+    if route is None:
+        raise HTTPException(status_code=404, detail="No transition between these career paths")
+    return route
 
 @app.get("/api/career-paths/{path_id}")
 async def get_career_path(path_id: str):
-    career_path = career_paths_collection.find_one({"id": path_id}, {"_id": 0})
-    if not career_path:
-        raise HTTPException(status_code=404, detail="Career path not found")
+    career_path = cache.get("career_paths", path_id)
+    if career_path is None:
+        career_path = await asyncio.to_thread(career_paths_collection.find_one, {"id": path_id}, {"_id": 0})
+        if not career_path:
+            raise HTTPException(status_code=404, detail="Career path not found")
+        cache.set("career_paths", path_id, career_path, CAREER_PATHS_CACHE_TTL)
     return career_path
 
+# Static content (resume templates, job guidance): loaded from CONTENT_DIR, hot-reloaded by polling
+content_catalog = catalog.Catalog(CONTENT_DIR, CONTENT_RELOAD_INTERVAL)
+
+def content():
+    # Blocking on the very first load; call from a worker thread or after ensure_content()
+    if not content_catalog.snapshot.version:
+        content_catalog.reload()
+    return content_catalog.snapshot
+
+async def ensure_content():
+    # Loaded at startup off the event loop; a request that arrives first loads it in a thread too
+    if not content_catalog.snapshot.version:
+        await asyncio.to_thread(content_catalog.reload)
+    return content_catalog.snapshot
+
 # Blog/tips endpoints
-@app.get("/api/blog/posts")
-async def get_blog_posts():
+def list_blog_posts():
     posts = [
         {
             "id": str(uuid.uuid4()),
@@ -389,57 +659,222 @@ async def get_blog_posts():
     ]
     return {"posts": posts}
 
+@app.get("/api/blog/posts")
+async def get_blog_posts():
+    return list_blog_posts()
+
 # Internship/job guidance
 @app.get("/api/job-guidance")
 async def get_job_guidance():
-    guidance = {
-        "internship_tips": [
-            "Start applying early - many companies recruit 3-6 months in advance",
-            "Customize your resume for each application",
-            "Build projects that demonstrate relevant skills",
-            "Practice coding interviews on platforms like LeetCode",
-            "Network with professionals on LinkedIn",
-            "Attend career fairs and tech meetups"
-        ],
-        "application_process": [
-            "Research the company and role thoroughly",
-            "Tailor your cover letter to the specific position",
-            "Highlight relevant projects and experiences",
-            "Prepare for technical and behavioral interviews",
-            "Follow up appropriately after interviews",
-            "Be persistent but respectful"
-        ],
-        "resume_templates": [
-            {
-                "name": "Software Engineer Resume Template",
-                "description": "Perfect for software development roles",
-                "url": "https://docs.google.com/document/d/example1"
-            },
-            {
-                "name": "Data Science Resume Template",
-                "description": "Tailored for data science positions",
-                "url": "https://docs.google.com/document/d/example2"
-            },
-            {
-                "name": "Cybersecurity Resume Template",
-                "description": "Optimized for security roles",
-                "url": "https://docs.google.com/document/d/example3"
-            }
-        ],
-        "interview_prep": [
-            "Practice coding problems daily",
-            "Review data structures and algorithms",
-            "Prepare STAR method examples for behavioral questions",
-            "Research common interview questions for your target role",
-            "Mock interviews with peers or mentors",
-            "Prepare thoughtful questions to ask the interviewer"
-        ]
+    snapshot = await ensure_content()
+    return {section["id"]: section["items"] for section in snapshot.items("job_guidance")}
+
+# Jobs seen in search results, geocoded offline and kept for local geo search
+@functools.lru_cache(maxsize=1)
+def load_gazetteer():
+    return geo.Gazetteer.from_csv(GAZETTEER_FILE)
+
+def initialize_jobs_collection():
+    try:
+        jobs_collection.create_index([("location_point", "2dsphere")])
+        jobs_collection.create_index("id", unique=True)
+        jobs_collection.create_index("salary_max")
+        jobs_collection.create_index("expires_at", expireAfterSeconds=0)
+    except Exception as e:
+        logger.warning("Creating job indexes failed: %s", e)
+
+def store_jobs_in_background(jobs: List[dict]):
+    try:
+        store_jobs(jobs)
+    except Exception as e:
+        logger.warning("Storing jobs for geo search failed: %s", e)
+
+def store_jobs(jobs: List[dict]):
+    gazetteer = load_gazetteer()
+    now = datetime.utcnow()
+    docs, changes = [], []
+    for job in jobs:
+        if not job.get("id"):
+            continue
+        place = gazetteer.geocode(job.get("location"))
+        doc = {**job, "remote": geo.is_remote(job.get("location")), "fetched_at": now,
+               "expires_at": now + timedelta(days=JOB_RETENTION_DAYS)}
+        update = {"$set": doc}
+        if place is not None:
+            doc["location_point"] = geo.point(place["latitude"], place["longitude"])
+            doc["geocoded_city"] = f"{place['name']}, {place['state']}"
+        else:
+            update["$unset"] = {"location_point": "", "geocoded_city": ""}
+        docs.append(doc)
+        changes.append(UpdateOne({"id": job["id"]}, update, upsert=True))
+    if changes:
+        result = jobs_collection.bulk_write(changes, ordered=False)
+        # Newly seen listings are merged into the precomputed recommendation feeds
+        new_jobs = [docs[index] for index in result.upserted_ids]
+        if new_jobs:
+            recommender.jobs_added(new_jobs)
+
+JOB_SORTS = {"salary": [("salary_max", -1), ("salary_min", -1)], "date": [("posted_date", -1)]}
+
+def filter_jobs_by_salary(jobs: List[dict], min_salary: Optional[float], sort: Optional[str]):
+    """The in-memory equivalent of the salary filter/sort, for upstream and mock results."""
+    if min_salary is not None:
+        jobs = [job for job in jobs if (job.get("salary_max") or 0) >= min_salary]
+    if sort == "salary":
+        jobs = sorted(jobs, key=lambda job: -(job.get("salary_max") or 0))
+    return jobs
+
+def collapse_duplicates(jobs: List[dict], source: str, index: Optional[dedup.LSHIndex] = None):
+    """Drop near-duplicate listings (similar title, same company, near-identical description, any location)."""
+    jobs, collapsed = dedup.collapse(jobs, index)
+    if collapsed:
+        metrics.JOBS_COLLAPSED.inc(source, amount=collapsed)
+    return jobs, collapsed
+
+# Listings already shown to a client for a query, so later pages and other sources drop their near-duplicates
+session_listings = dedup.SessionIndexes(DEDUP_MAX_SESSIONS)
+
+def session_index(search_query: JobSearchQuery, client: str):
+    return session_listings.get(f"{client}\x00{querylog.normalize_text(search_query.query)}")
+
+def collapse_for_session(result: dict, index: dedup.LSHIndex):
+    # The cached result is shared between clients, so it is copied rather than edited
+    jobs, collapsed = collapse_duplicates(result["results"], "session", index)
+    if not collapsed:
+        return result
+    return {**result, "results": jobs, "count": len(jobs), "collapsed": result["collapsed"] + collapsed}
+
+def search_local_jobs(search_query: JobSearchQuery, index: Optional[dedup.LSHIndex] = None):
+    filters = []
+    for word in search_query.query.split():
+        pattern = {"$regex": re.escape(word), "$options": "i"}
+        filters.append({"$or": [{"title": pattern}, {"description": pattern}]})
+    if search_query.job_type:
+        filters.append({"job_type": search_query.job_type})
+    if search_query.experience_level:
+        filters.append({"experience_level": search_query.experience_level})
+    if search_query.min_salary is not None:
+        filters.append({"salary_max": {"$gte": search_query.min_salary}})
+    text_filter = {"$and": filters} if filters else {}
+    projection = {"_id": 0, "location_point": 0, "expires_at": 0, "fetched_at": 0}
+
+    if search_query.bbox is not None:
+        geo_filter = geo.within_box("location_point", search_query.bbox)
+        cursor = jobs_collection.find({**text_filter, **geo_filter}, projection)
+        if search_query.sort in JOB_SORTS:
+            cursor = cursor.sort(JOB_SORTS[search_query.sort])
+        jobs = list(cursor.limit(100))
+        result = {"mode": "bbox", "bbox": search_query.bbox}
+    else:
+        if search_query.latitude is not None and search_query.longitude is not None:
+            center = (search_query.latitude, search_query.longitude)
+        else:
+            place = load_gazetteer().geocode(search_query.location)
+            if place is None:
+                raise HTTPException(status_code=400, detail="Radius search needs latitude/longitude or a known location")
+            center = (place["latitude"], place["longitude"])
+        jobs = list(jobs_collection.aggregate([
+            geo.near("location_point", *center, search_query.radius_km, text_filter),
+            *([{"$sort": dict(JOB_SORTS[search_query.sort])}] if search_query.sort in JOB_SORTS else []),
+            {"$limit": 100},
+            {"$project": projection},
+        ]))
+        for job in jobs:
+            job["distance_km"] = round(job["distance_km"], 1)
+        result = {"mode": "radius", "center": {"latitude": center[0], "longitude": center[1]},
+                  "radius_km": search_query.radius_km}
+
+    if search_query.include_remote:
+        jobs += list(jobs_collection.find({**text_filter, "remote": True, "location_point": {"$exists": False}},
+                                          projection).limit(100))
+    jobs, collapsed = collapse_duplicates(jobs, "local", index)
+    return {"results": jobs, "count": len(jobs), "collapsed": collapsed, **result}
+
+# Adzuna search for a normalized query key; successful results are cached
+def fetch_adzuna_jobs(cache_key: str):
+    search_query = JobSearchQuery.model_validate_json(cache_key)
+    params = {
+        "app_id": ADZUNA_APP_ID,
+        "app_key": ADZUNA_API_KEY,
+        "what": search_query.query,
+        "results_per_page": 20
     }
-    return guidance
+    
+    if search_query.location:
+        params["where"] = search_query.location
+    if search_query.min_salary is not None:
+        params["salary_min"] = int(search_query.min_salary)
+    if search_query.sort in ("salary", "date", "relevance"):
+        params["sort_by"] = search_query.sort
+        
+    response = outbound_get(ADZUNA_API_URL, params=params)
+    response.raise_for_status()
+    
+    data = response.json()
+    jobs = []
+    
+    for job in data.get("results", []):
+        jobs.append({
+            "id": job.get("id", ""),
+            "title": job.get("title", ""),
+            "company": job.get("company", {}).get("display_name", ""),
+            "location": job.get("location", {}).get("display_name", ""),
+            "description": job.get("description", "")[:300] + "..." if len(job.get("description", "")) > 300 else job.get("description", ""),
+            "salary": f"${job.get('salary_min', 'N/A')} - ${job.get('salary_max', 'N/A')}" if job.get('salary_min') else "Salary not specified",
+            "salary_min": job.get("salary_min"),  # Adzuna reports annual figures
+            "salary_max": job.get("salary_max") or job.get("salary_min"),
+            "job_type": "full_time",  # Adzuna doesn't always provide this
+            "experience_level": "entry",  # Default for student-focused platform
+            "posted_date": job.get("created", ""),
+            "apply_url": job.get("redirect_url", "")
+        })
+    
+    jobs, collapsed = collapse_duplicates(jobs, "adzuna")
+    jobs = filter_jobs_by_salary(jobs, search_query.min_salary, search_query.sort)
+    result = {"results": jobs, "count": len(jobs), "collapsed": collapsed}
+    cache.set("job_search", cache_key, result, JOB_SEARCH_CACHE_TTL)
+    return result
+
+def prewarm_job_search(cache_key: str):
+    # Prewarming shares the Adzuna budget with live searches
+    allowed, _ = adzuna_budget.take()
+    if allowed:
+        store_jobs_in_background(fetch_adzuna_jobs(cache_key)["results"])
+    return allowed
+
+search_prewarmer = querylog.Prewarmer(
+    search_log, prewarm_job_search, lambda key: cache.expires_in("job_search", key),
+    top_k=PREWARM_TOP_K, interval=PREWARM_INTERVAL, refresh_ahead=PREWARM_REFRESH_AHEAD,
+)
+
+async def start_search_prewarmer():
+    # Resume this worker's popularity counts, then (first worker only) warm the top searches
+    try:
+        await asyncio.to_thread(search_log.load)
+        await asyncio.to_thread(query_text_log.load)
+    except Exception as e:
+        logger.warning("Loading query log failed: %s", e)
+    if ADZUNA_APP_ID and ADZUNA_API_KEY and WORKER_ID in (None, "0"):
+        search_prewarmer.start()
+
+def record_search(search_query: JobSearchQuery, cache_key: str, client: str):
+    # Only searches that were served count towards popularity; rejected ones would let a flood pick the top-K
+    search_log.record(cache_key, client)
+    query_text = querylog.normalize_text(search_query.query)
+    if query_text:
+        query_text_log.record(query_text, client)
+        completions.observe(query_text, query_text_log.distinct_clients(query_text))
 
 # Job search endpoint using Adzuna API
 @app.post("/api/jobs/search")
-async def search_jobs(search_query: JobSearchQuery):
+async def search_jobs(search_query: JobSearchQuery, request: Request):
+    if search_query.sort and search_query.sort not in ("relevance", "salary", "date"):
+        raise HTTPException(status_code=400, detail="sort must be one of: relevance, salary, date")
+    client = rate_limit_key(request.scope)
+    if search_query.radius_km is not None or search_query.bbox is not None:
+        # Served entirely from the local jobs index
+        return await asyncio.to_thread(search_local_jobs, search_query, session_index(search_query, client))
+
     if not ADZUNA_APP_ID or not ADZUNA_API_KEY:
         # Return mock data if API keys are not configured
         mock_jobs = [
@@ -480,45 +915,33 @@ async def search_jobs(search_query: JobSearchQuery):
                 "apply_url": "#"
             }
         ]
-        return {"results": mock_jobs, "count": len(mock_jobs)}
+        mock_jobs = filter_jobs_by_salary(
+            [{**job, **salary.salary_fields(job["salary"])} for job in mock_jobs],
+            search_query.min_salary, search_query.sort,
+        )
+        return {"results": mock_jobs, "count": len(mock_jobs), "collapsed": 0}
     
+    cache_key = querylog.normalize_query(search_query.model_dump())
+    cached = cache.get("job_search", cache_key)
+    if cached is not None:
+        record_search(search_query, cache_key, client)
+        return collapse_for_session(cached, session_index(search_query, client))
+
+    allowed, retry_after = await search_limiter.take_async(client)
+    if not allowed:
+        metrics.REQUESTS_REJECTED.inc("search_rate_limited")
+        raise HTTPException(status_code=429, detail="Too many searches",
+                            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))})
+    allowed, retry_after = await adzuna_budget.take_async()
+    if not allowed:
+        raise HTTPException(status_code=503, detail="Job search is temporarily unavailable",
+                            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))})
+    record_search(search_query, cache_key, client)
+
     try:
-        # Adzuna API integration
-        base_url = "https://api.adzuna.com/v1/api/jobs/us/search/1"
-        params = {
-            "app_id": ADZUNA_APP_ID,
-            "app_key": ADZUNA_API_KEY,
-            "what": search_query.query,
-            "results_per_page": 20
-        }
-        
-        if search_query.location:
-            params["where"] = search_query.location
-            
-        response = requests.get(base_url, params=params)
-        response.raise_for_status()
-        
-        data = response.json()
-        jobs = []
-        
-        for job in data.get("results", []):
-            jobs.append({
-                "id": job.get("id", ""),
-                "title": job.get("title", ""),
-                "company": job.get("company", {}).get("display_name", ""),
-                "location": job.get("location", {}).get("display_name", ""),
-                "description": job.get("description", "")[:300] + "..." if len(job.get("description", "")) > 300 else job.get("description", ""),
-                "salary": f"${job.get('salary_min', 'N/A')} - ${job.get('salary_max', 'N/A')}" if job.get('salary_min') else "Salary not specified",
-                "job_type": "full_time",  # Adzuna doesn't always provide this
-                "experience_level": "entry",  # Default for student-focused platform
-                "posted_date": job.get("created", ""),
-                "apply_url": job.get("redirect_url", "")
-            })
-        
-        return {"results": jobs, "count": len(jobs)}
-        
+        result = await asyncio.to_thread(fetch_adzuna_jobs, cache_key)
     except Exception as e:
-        print(f"Error fetching jobs from Adzuna: {str(e)}")
+        logger.warning("Error fetching jobs from Adzuna: %s", e)
         # Fallback to mock data on error
         mock_jobs = [
             {
@@ -534,7 +957,25 @@ async def search_jobs(search_query: JobSearchQuery):
                 "apply_url": "#"
             }
         ]
-        return {"results": mock_jobs, "count": len(mock_jobs)}
+        mock_jobs = filter_jobs_by_salary(
+            [{**job, **salary.salary_fields(job["salary"])} for job in mock_jobs],
+            search_query.min_salary, search_query.sort,
+        )
+        return {"results": mock_jobs, "count": len(mock_jobs), "collapsed": 0}
+    # Geocoding and storing the listings for radius search happen after the response
+    asyncio.get_running_loop().run_in_executor(None, store_jobs_in_background, result["results"])
+    return collapse_for_session(result, session_index(search_query, client))
+
+# Typeahead for the job search box: career-path titles, skills and popular searches
+def completion_source():
+    return list_career_paths()["career_paths"], query_text_log.top_by_clients(AUTOCOMPLETE_MAX_TERMS)
+
+completions = autocomplete.Autocompleter(completion_source, AUTOCOMPLETE_REBUILD_INTERVAL,
+                                         max_terms=AUTOCOMPLETE_MAX_TERMS, min_count=AUTOCOMPLETE_MIN_COUNT)
+
+@app.get("/api/autocomplete")
+async def autocomplete_search(q: str = "", limit: int = 10):
+    return {"query": q, "suggestions": completions.complete(q, max(1, limit))}
 
 # Apply for a job
 @app.post("/api/jobs/apply")
@@ -553,7 +994,8 @@ async def apply_for_job(application_data: dict, current_user: dict = Depends(get
             "status": "applied"
         }
         
-        job_applications_collection.insert_one(application)
+        await asyncio.to_thread(job_applications_collection.insert_one, application)
+        recommender.user_changed(current_user["id"])
         
         return {"message": "Application submitted successfully", "application_id": application["id"]}
         
@@ -561,125 +1003,264 @@ async def apply_for_job(application_data: dict, current_user: dict = Depends(get
         raise HTTPException(status_code=500, detail=f"Error submitting application: {str(e)}")
 
 # Get user's job applications
+def list_user_applications(user_id: str, include_archived: bool = False):
+    # Newest first; archived applications are all older than the hot ones, so they follow in the same order
+    applications = list(job_applications_collection.find(
+        {"user_id": user_id},
+        {"_id": 0}
+    ).sort("applied_at", -1))
+    if include_archived:
+        applications.extend(application_archiver.find_archived({"user_id": user_id}, {"_id": 0}))
+    return applications
+
+def initialize_applications_collection():
+    try:
+        job_applications_collection.create_index([("user_id", 1), ("applied_at", 1)])
+        job_applications_collection.create_index("applied_at")
+        sessions_collection.create_index("session_token")
+        sessions_collection.create_index("expires_at")
+    except Exception as e:
+        logger.warning("Creating application indexes failed: %s", e)
+
+def initialize_query_log_collection():
+    try:
+        search_log.ensure_indexes()
+    except Exception as e:
+        logger.warning("Creating query log indexes failed: %s", e)
+
+def initialize_rate_limits_collection():
+    if RATE_LIMIT_BACKEND != 'mongo':
+        return
+    try:
+        bucket_store.ensure_indexes()
+        adzuna_budget.quota.ensure_indexes()
+    except Exception as e:
+        logger.warning("Creating rate limit indexes failed: %s", e)
+
+# Application exports: streamed from a batched cursor, never materialized
+APPLICATION_EXPORT_FIELDS = ["id", "job_id", "user_id", "applicant_name", "email", "phone",
+                             "resume_url", "cover_letter", "applied_at", "status"]
+EXPORT_BATCH_SIZE = 1000
+
+def _applied_at_filter(since: Optional[datetime], until: Optional[datetime]):
+    bounds = {}
+    if since:
+        bounds["$gte"] = since
+    if until:
+        bounds["$lte"] = until
+    return {"applied_at": bounds} if bounds else {}
+
+def _export_response(docs, format: str, compress: bool, name: str):
+    if format not in export.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    media_type, extension = export.FORMATS[format]
+    filename = f"{name}.{extension}" + (".gz" if compress else "")
+    return StreamingResponse(
+        export.encode(docs, APPLICATION_EXPORT_FIELDS, format, compress),
+        media_type="application/gzip" if compress else media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@app.get("/api/jobs/my-applications/export")
+async def export_my_applications(format: str = "csv", compress: bool = True,
+                                 since: Optional[datetime] = None, until: Optional[datetime] = None,
+                                 include_archived: bool = False,
+                                 current_user: dict = Depends(get_current_user)):
+    query = {"user_id": current_user["id"], **_applied_at_filter(since, until)}
+    docs = (job_applications_collection
+            .find(query, {"_id": 0})
+            .sort("applied_at", 1)
+            .batch_size(EXPORT_BATCH_SIZE))
+    if include_archived:
+        # Archived months are older than anything still hot, so they come first
+        docs = itertools.chain(application_archiver.find_archived(query, {"_id": 0}, oldest_first=True), docs)
+    return _export_response(docs, format, compress, "applications")
+
+@app.get("/api/admin/applications/export", dependencies=[Depends(require_admin)])
+async def export_all_applications(format: str = "csv", compress: bool = True,
+                                  since: Optional[datetime] = None, until: Optional[datetime] = None,
+                                  partitions: int = 4, include_archived: bool = False):
+    # Bounds of the scan: the requested range, narrowed to the data actually present
+    def bound(direction):
+        doc = job_applications_collection.find_one(
+            _applied_at_filter(since, until), {"_id": 0, "applied_at": 1}, sort=[("applied_at", direction)]
+        )
+        return doc["applied_at"] if doc else None
+    start, end = await asyncio.gather(asyncio.to_thread(bound, 1), asyncio.to_thread(bound, -1))
+    if start is None:
+        docs = iter(())
+    else:
+        docs = export.parallel_scan(
+            job_applications_collection, {}, "applied_at", start, end,
+            partitions=max(1, min(partitions, 16)), projection={"_id": 0}, batch_size=EXPORT_BATCH_SIZE,
+        )
+    if include_archived:
+        archived = application_archiver.find_archived(_applied_at_filter(since, until), {"_id": 0}, oldest_first=True)
+        docs = itertools.chain(archived, docs)
+    return _export_response(docs, format, compress, "applications-all")
+
 @app.get("/api/jobs/my-applications")
-async def get_my_applications(current_user: dict = Depends(get_current_user)):
+async def get_my_applications(include_archived: bool = False, current_user: dict = Depends(get_current_user)):
     try:
-        applications = list(job_applications_collection.find(
-            {"user_id": current_user["id"]},
-            {"_id": 0}
-        ))
-        return applications
+        return await asyncio.to_thread(list_user_applications, current_user["id"], include_archived)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching applications: {str(e)}")
 
-# Enhanced resume templates with downloadable content
+# Resume templates: listed from the content catalog, downloadable as sections or rendered documents
+RESUME_TEMPLATE_LISTING_FIELDS = ("id", "name", "description", "preview_url", "category")
+
+def list_resume_templates():
+    return [
+        {**{field: template.get(field) for field in RESUME_TEMPLATE_LISTING_FIELDS},
+         "download_url": f"/api/resume-templates/{template['id']}/download"}
+        for template in content().items("resume_templates")
+    ]
+
 @app.get("/api/resume-templates") 
 async def get_resume_templates():
-    templates = [
-        {
-            "id": "software_engineer",
-            "name": "Software Engineer Resume",
-            "description": "Perfect template for software development roles with emphasis on technical skills and projects",
-            "preview_url": "https://images.unsplash.com/photo-1586281380349-632531db7ed4?w=400",
-            "download_url": "/api/resume-templates/software_engineer/download",
-            "category": "technical"
-        },
-        {
-            "id": "data_scientist", 
-            "name": "Data Science Resume",
-            "description": "Tailored for data science positions highlighting analytical skills and ML projects",
-            "preview_url": "https://images.unsplash.com/photo-1551288049-bebda4e38f71?w=400",
-            "download_url": "/api/resume-templates/data_scientist/download",
-            "category": "analytical"
-        },
-        {
-            "id": "web_developer",
-            "name": "Web Developer Resume",
-            "description": "Modern template for frontend/fullstack developers showcasing web technologies",
-            "preview_url": "https://images.unsplash.com/photo-1460925895917-afdab827c52f?w=400",
-            "download_url": "/api/resume-templates/web_developer/download", 
-            "category": "creative"
-        },
-        {
-            "id": "cybersecurity",
-            "name": "Cybersecurity Resume",
-            "description": "Professional template for security roles emphasizing certifications and security projects",
-            "preview_url": "https://images.unsplash.com/photo-1563013544-824ae1b704d3?w=400",
-            "download_url": "/api/resume-templates/cybersecurity/download",
-            "category": "security"
-        }
-    ]
-    return templates
+    await ensure_content()
+    return list_resume_templates()
+
+# Rendered blank templates are cached on disk by a hash of everything that went into them;
+# filled ones hold personal data, so they are rendered per request and never written out
+resume_artifacts = resume.ArtifactCache(RESUME_CACHE_DIR, int(RESUME_CACHE_MAX_MB * 1024 * 1024))
 
-# Download resume template (returns template content/structure)
 @app.get("/api/resume-templates/{template_id}/download")
-async def download_resume_template(template_id: str):
-    templates_content = {
-        "software_engineer": {
-            "template_name": "Software Engineer Resume",
-            "sections": [
-                {
-                    "name": "Header",
-                    "content": "Your Name\nSoftware Engineer\nEmail: your.email@example.com | Phone: (123) 456-7890\nLinkedIn: linkedin.com/in/yourname | GitHub: github.com/yourname"
-                },
-                {
-                    "name": "Professional Summary", 
-                    "content": "Passionate software engineer with [X] years of experience in full-stack development. Proficient in [languages/technologies]. Strong problem-solving skills and collaborative team player."
-                },
-                {
-                    "name": "Technical Skills",
-                    "content": "Languages: Python, JavaScript, Java, C++\nFrameworks: React, Node.js, Django, Spring Boot\nDatabases: PostgreSQL, MongoDB, Redis\nTools: Git, Docker, Kubernetes, AWS"
-                },
-                {
-                    "name": "Experience",
-                    "content": "[Job Title] at [Company] (Month Year - Present)\n• Developed and maintained web applications using React and Node.js\n• Collaborated with cross-functional teams to deliver high-quality software\n• Implemented automated testing procedures, increasing code coverage by X%"
-                },
-                {
-                    "name": "Projects",
-                    "content": "[Project Name] - [Brief Description]\n• Built using [technologies]\n• Implemented [key features]\n• GitHub: [repository link]"
-                },
-                {
-                    "name": "Education",
-                    "content": "[Degree] in [Field]\n[University Name] - [Graduation Year]\nRelevant Coursework: Data Structures, Algorithms, Software Engineering"
-                }
-            ]
-        },
-        "data_scientist": {
-            "template_name": "Data Science Resume",
-            "sections": [
-                {
-                    "name": "Header",
-                    "content": "Your Name\nData Scientist\nEmail: your.email@example.com | Phone: (123) 456-7890\nLinkedIn: linkedin.com/in/yourname | Portfolio: yourportfolio.com"
-                },
-                {
-                    "name": "Professional Summary",
-                    "content": "Data scientist with expertise in machine learning, statistical analysis, and data visualization. Experienced in extracting insights from complex datasets to drive business decisions."
-                },
-                {
-                    "name": "Technical Skills", 
-                    "content": "Languages: Python, R, SQL\nML Libraries: scikit-learn, TensorFlow, PyTorch\nVisualization: Matplotlib, Seaborn, Tableau\nTools: Jupyter, Git, Docker, Apache Spark"
-                },
-                {
-                    "name": "Experience",
-                    "content": "[Job Title] at [Company] (Month Year - Present)\n• Developed predictive models improving [metric] by X%\n• Analyzed large datasets using Python and SQL\n• Created interactive dashboards for stakeholder reporting"
-                },
-                {
-                    "name": "Projects",
-                    "content": "[Project Name] - [Brief Description]\n• Applied [ML techniques] to solve [problem]\n• Achieved [results/metrics]\n• Technologies: [tech stack]"
-                },
-                {
-                    "name": "Education",
-                    "content": "[Degree] in [Field]\n[University Name] - [Graduation Year]\nRelevant Coursework: Statistics, Machine Learning, Data Mining"
-                }
-            ]
-        }
-        # Add more templates as needed
-    }
-    
-    if template_id not in templates_content:
+async def download_resume_template(template_id: str, request: Request, format: str = "json", fill: bool = False,
+                                   credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
+    snapshot = await ensure_content()
+    template = snapshot.get("resume_templates", template_id)
+    if template is None:
         raise HTTPException(status_code=404, detail="Template not found")
-    
-    return templates_content[template_id]
+    if format != "json" and format not in resume.FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: json, {', '.join(resume.FORMATS)}")
+
+    profile = {}
+    if fill:
+        if credentials is None:
+            raise HTTPException(status_code=401, detail="Authentication required to fill a template")
+        user = await asyncio.to_thread(resolve_session_user, credentials.credentials)
+        profile = {field: user.get(field) for field in resume.PLACEHOLDERS}
+    template = resume.fill({"template_name": template["template_name"], "sections": template["sections"]}, profile)
+    if format == "json":
+        return template
+
+    key = resume.ArtifactCache.key(resume.RENDERER_VERSION, snapshot.version, template_id, format, template)
+    etag = f'"{key}"'
+    media_type, extension = resume.FORMATS[format]
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=3600" if fill else "public, max-age=3600",
+        "Content-Disposition": f'attachment; filename="{template_id}_resume.{extension}"',
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    if fill:
+        f = io.BytesIO(await asyncio.to_thread(resume.render, template, format))
+    else:
+        f = await asyncio.to_thread(resume_artifacts.open, key, extension, lambda: resume.render(template, format))
+    size = f.seek(0, io.SEEK_END)
+    range_header = request.headers.get("range")
+    if request.headers.get("if-range", etag) != etag:
+        range_header = None  # the client's partial copy is of a different version
+    try:
+        span = resume.byte_range(range_header, size)
+    except ValueError:
+        f.close()
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    start, end = span or (0, size - 1)
+    headers["Content-Length"] = str(end - start + 1)
+    if span:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return StreamingResponse(resume.read_chunks(f, start, end), status_code=206 if span else 200,
+                             media_type=media_type, headers=headers)
+
+# Admin: slow queries and collection scans seen by the query watch
+@app.get("/api/admin/db/queries", dependencies=[Depends(require_admin)])
+async def database_query_report():
+    return query_watch.report()
+
+@app.post("/api/admin/recommendations/rebuild", dependencies=[Depends(require_admin)])
+async def rebuild_recommendations():
+    started = time.perf_counter()
+    rebuilt = await asyncio.to_thread(recommender.rebuild_all)
+    return {"rebuilt": rebuilt, "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+# Admin: request profiles captured by the profiling middleware
+@app.get("/api/admin/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles(limit: int = 100):
+    return {"profiles": profiler.store.list(limit)}
+
+@app.get("/api/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+async def download_profile(profile_id: str, artifact: str = "json"):
+    path = profiler.store.path(profile_id, artifact)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=os.path.basename(path))
+
+# Bootstrap: the frontend's initial requests batched into one round-trip.
+# Each section maps to (requires_auth, loader) and returns the same payload as its own endpoint.
+BOOTSTRAP_SECTIONS = {
+    "profile": (True, lambda user: user),
+    "career_paths": (False, lambda user: list_career_paths()),
+    "resume_templates": (False, lambda user: list_resume_templates()),
+    "my_applications": (True, lambda user: list_user_applications(user["id"])),
+    "blog_posts": (False, lambda user: list_blog_posts()),
+}
+
+async def _load_bootstrap_section(name: str, user: Optional[dict], auth_error: Optional[str]):
+    requires_auth, loader = BOOTSTRAP_SECTIONS[name]
+    started = time.perf_counter()
+    try:
+        if requires_auth and user is None:
+            raise HTTPException(status_code=401, detail=auth_error or "Authentication required")
+        payload = await asyncio.wait_for(asyncio.to_thread(loader, user), BOOTSTRAP_SECTION_TIMEOUT)
+        error = None
+    except HTTPException as e:
+        payload, error = None, {"status": e.status_code, "detail": e.detail}
+    except asyncio.TimeoutError:
+        payload, error = None, {"status": 504, "detail": f"Timed out after {BOOTSTRAP_SECTION_TIMEOUT}s"}
+    except Exception as e:
+        payload, error = None, {"status": 500, "detail": str(e)}
+    return name, payload, error, round((time.perf_counter() - started) * 1000, 2)
+
+@app.get("/api/bootstrap")
+async def bootstrap(sections: Optional[str] = None,
+                    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
+    started = time.perf_counter()
+    requested = [s.strip() for s in sections.split(",") if s.strip()] if sections else list(BOOTSTRAP_SECTIONS)
+    unknown = [s for s in requested if s not in BOOTSTRAP_SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown sections: {', '.join(unknown)}")
+    requested = list(dict.fromkeys(requested))
+
+    # Authenticate once for every section that needs the user
+    user, auth_error = None, None
+    if any(BOOTSTRAP_SECTIONS[name][0] for name in requested):
+        if credentials is None:
+            auth_error = "Authentication required"
+        else:
+            try:
+                user = await asyncio.to_thread(resolve_session_user, credentials.credentials)
+            except HTTPException as e:
+                auth_error = e.detail
+
+    results = await asyncio.gather(*(_load_bootstrap_section(name, user, auth_error) for name in requested))
+
+    response = {"data": {}, "errors": {}, "timing": {}}
+    for name, payload, error, elapsed_ms in results:
+        if error is None:
+            response["data"][name] = payload
+        else:
+            response["errors"][name] = error
+        response["timing"][name] = elapsed_ms
+    response["total_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return response
+
+metrics.COLD_START.set(time.perf_counter() - IMPORT_STARTED, "import")
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get('PORT', '8001')))
\ No newline at end of file
@@ -0,0 +1,248 @@
+"""Cross-process cache backed by a shared memory-mapped file.
+
+All workers map the same file (``SHM_CACHE_PATH``, normally under
+``/dev/shm``), so one worker's entry is visible to every other worker.
+
+Layout: a header holds a table of namespaces, each a name and its version
+counter, followed by fixed-size slots. A namespace claims a table entry the
+first time any process uses it, so every namespace has its own counter. Each slot stores a sequence number, a key hash, the
+namespace version the entry was written under, an expiry timestamp and a
+pickled payload. A key hashes to a small probe window of slots.
+
+* Readers never lock. They use the slot's sequence number as a seqlock and
+  retry if a writer was active or the slot changed during the read.
+* Writers serialize on an ``flock`` of the backing file.
+* ``invalidate(namespace)`` bumps the namespace version. Every existing
+  entry of that namespace then reads as a miss in every worker.
+
+Payloads over 1 KiB are zlib-compressed. Values that still do not fit in a
+slot are simply not cached.
+"""
+import fcntl
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import time
+import zlib
+
+import metrics
+
+MAGIC = b"TPFCACH2"
+NAMESPACES = 64
+PROBE = 4
+_HEADER = struct.Struct("<8sII")
+_NAMESPACE = struct.Struct("<32sQ")  # name (NUL-padded), version
+_SLOT_HEADER = struct.Struct("<QQQdII")
+_COMPRESSED = 1
+_COMPRESS_ABOVE = 1024
+_HEADER_SIZE = _HEADER.size + NAMESPACES * _NAMESPACE.size
+
+
+def _key_hash(namespace, key):
+    digest = hashlib.blake2b(f"{namespace}\0{key}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+class SharedCache:
+    def __init__(self, path, slots=2048, slot_size=16384):
+        create = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if create:
+            self._lock()
+            try:
+                if os.fstat(self._fd).st_size == 0:
+                    os.ftruncate(self._fd, _HEADER_SIZE + slots * slot_size)
+                    os.pwrite(self._fd, _HEADER.pack(MAGIC, slots, slot_size), 0)
+            finally:
+                self._unlock()
+        magic, self.slots, self.slot_size = _HEADER.unpack(os.pread(self._fd, _HEADER.size, 0))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a shared cache file")
+        self.max_value_size = self.slot_size - _SLOT_HEADER.size
+        self._map = mmap.mmap(self._fd, _HEADER_SIZE + self.slots * self.slot_size)
+        self._namespaces = {}  # name -> offset of its version counter
+
+    @classmethod
+    def create_file(cls, slots=2048, slot_size=16384):
+        """Create a fresh backing file (in /dev/shm when available) and return its path."""
+        directory = "/dev/shm" if os.path.isdir("/dev/shm") else None
+        fd, path = tempfile.mkstemp(prefix="techpathfinder-cache-", dir=directory)
+        os.close(fd)
+        cls(path, slots, slot_size).close()
+        return path
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+    def _lock(self):
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+    def _unlock(self):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _find_namespace(self, name):
+        """Offset of ``name``'s version counter, the first free entry's offset, or None."""
+        free = None
+        for index in range(NAMESPACES):
+            offset = _HEADER.size + index * _NAMESPACE.size
+            entry = self._map[offset:offset + 32].rstrip(b"\0")
+            if entry == name:
+                return offset + 32, True
+            if not entry and free is None:
+                free = offset
+        return free, False
+
+    def _version_offset(self, namespace):
+        offset = self._namespaces.get(namespace)
+        if offset is not None:
+            return offset
+        name = namespace.encode()
+        if not name or len(name) > 32 or b"\0" in name:
+            raise ValueError(f"Invalid cache namespace: {namespace!r}")
+        offset, found = self._find_namespace(name)
+        if not found:
+            self._lock()
+            try:
+                # Another process may have claimed it in the meantime
+                offset, found = self._find_namespace(name)
+                if not found:
+                    if offset is None:
+                        raise ValueError(f"Shared cache has no room for namespace {namespace!r}")
+                    _NAMESPACE.pack_into(self._map, offset, name, 0)
+                    offset += 32
+            finally:
+                self._unlock()
+        self._namespaces[namespace] = offset
+        return offset
+
+    def version(self, namespace):
+        return struct.unpack_from("<Q", self._map, self._version_offset(namespace))[0]
+
+    def _slot_offsets(self, key_hash):
+        first = key_hash % self.slots
+        return [_HEADER_SIZE + ((first + i) % self.slots) * self.slot_size for i in range(PROBE)]
+
+    def _read_slot(self, offset):
+        for _ in range(8):
+            seq, key_hash, version, expires_at, length, flags = _SLOT_HEADER.unpack_from(self._map, offset)
+            if seq & 1:
+                continue
+            start = offset + _SLOT_HEADER.size
+            payload = self._map[start:start + length] if length <= self.max_value_size else b""
+            if struct.unpack_from("<Q", self._map, offset)[0] == seq:
+                if payload and flags & _COMPRESSED:
+                    payload = zlib.decompress(payload)
+                return key_hash, version, expires_at, payload
+        return None
+
+    def get(self, namespace, key, default=None, record=True):
+        """The cached value, or ``default``; ``record=False`` keeps the lookup out of the hit/miss metrics."""
+        key_hash = _key_hash(namespace, key)
+        current_version = self.version(namespace)
+        now = time.time()
+        for offset in self._slot_offsets(key_hash):
+            slot = self._read_slot(offset)
+            if slot is None or slot[0] != key_hash:
+                continue
+            _, version, expires_at, payload = slot
+            if version == current_version and expires_at > now and payload:
+                if record:
+                    metrics.record_cache(namespace, True)
+                return pickle.loads(payload)
+        if record:
+            metrics.record_cache(namespace, False)
+        return default
+
+    def expires_in(self, namespace, key):
+        """Seconds until the entry for ``key`` expires, or None when it is not cached."""
+        key_hash = _key_hash(namespace, key)
+        current_version = self.version(namespace)
+        now = time.time()
+        for offset in self._slot_offsets(key_hash):
+            slot = self._read_slot(offset)
+            if slot is not None and slot[0] == key_hash and slot[1] == current_version and slot[2] > now and slot[3]:
+                return slot[2] - now
+        return None
+
+    def set(self, namespace, key, value, ttl):
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        flags = 0
+        if len(payload) > _COMPRESS_ABOVE:
+            payload, flags = zlib.compress(payload, 1), _COMPRESSED
+        if len(payload) > self.max_value_size:
+            return False
+        key_hash = _key_hash(namespace, key)
+        now = time.time()
+        version_offset = self._version_offset(namespace)  # may claim the namespace, which takes the lock
+        self._lock()
+        try:
+            version = struct.unpack_from("<Q", self._map, version_offset)[0]
+            target, target_expiry = None, None
+            for offset in self._slot_offsets(key_hash):
+                seq, slot_hash, slot_version, expires_at, _, _ = _SLOT_HEADER.unpack_from(self._map, offset)
+                if slot_hash == key_hash or slot_hash == 0 or expires_at <= now:
+                    target = offset
+                    break
+                if target is None or expires_at < target_expiry:
+                    target, target_expiry = offset, expires_at
+            seq = struct.unpack_from("<Q", self._map, target)[0]
+            struct.pack_into("<Q", self._map, target, seq + 1)
+            start = target + _SLOT_HEADER.size
+            self._map[start:start + len(payload)] = payload
+            _SLOT_HEADER.pack_into(self._map, target, seq + 1, key_hash, version, now + ttl, len(payload), flags)
+            struct.pack_into("<Q", self._map, target, seq + 2)
+        finally:
+            self._unlock()
+        return True
+
+    def delete(self, namespace, key):
+        key_hash = _key_hash(namespace, key)
+        self._lock()
+        try:
+            for offset in self._slot_offsets(key_hash):
+                seq, slot_hash = struct.unpack_from("<QQ", self._map, offset)
+                if slot_hash == key_hash:
+                    struct.pack_into("<Q", self._map, offset, seq + 1)
+                    _SLOT_HEADER.pack_into(self._map, offset, seq + 1, 0, 0, 0.0, 0, 0)
+                    struct.pack_into("<Q", self._map, offset, seq + 2)
+        finally:
+            self._unlock()
+
+    def invalidate(self, namespace):
+        """Drop every entry of ``namespace`` in all processes by bumping its version."""
+        offset = self._version_offset(namespace)
+        self._lock()
+        try:
+            struct.pack_into("<Q", self._map, offset, struct.unpack_from("<Q", self._map, offset)[0] + 1)
+        finally:
+            self._unlock()
+
+    def get_or_set(self, namespace, key, ttl, loader):
+        value = self.get(namespace, key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(namespace, key, value, ttl)
+        return value
+
+
+_MISSING = object()
+
+
+def cache_from_env():
+    """Attach to ``SHM_CACHE_PATH`` (set by the worker manager) or create a private cache."""
+    slots = int(os.environ.get("SHM_CACHE_SLOTS", "2048"))
+    slot_size = int(os.environ.get("SHM_CACHE_SLOT_BYTES", "16384"))
+    path = os.environ.get("SHM_CACHE_PATH")
+    if path:
+        return SharedCache(path, slots, slot_size)
+    # Single process: the mapping keeps the unlinked file alive
+    path = SharedCache.create_file(slots, slot_size)
+    try:
+        return SharedCache(path, slots, slot_size)
+    finally:
+        os.unlink(path)
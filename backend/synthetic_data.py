@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Synthetic data generator for scale-testing the backend collections.
+
+Bulk-loads realistic users, sessions (a configurable fraction already
+expired), job applications with a heavy-tailed per-user count, and extra
+career paths.
+
+Output is deterministic per --seed and --now, which defaults to a fixed date
+rather than today. Documents are generated in fixed-size chunks, each with
+its own seeded RNG, so the same seed produces the same data whatever the
+number of --workers. Chunks are loaded in parallel processes with unordered
+bulk inserts.
+
+Examples:
+    python synthetic_data.py --users 1000000 --career-paths 5000 --workers 8 --drop
+    python synthetic_data.py --mongo-url mongodb://localhost:27017 --db techpathfinder_bench --users 50000
+
+From Python (benchmarks, tests), ``load(db, SyntheticConfig(...))`` fills an
+existing database object, including an in-memory stand-in, sequentially.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+
+from pymongo import MongoClient
+
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Priya", "Wei", "Amara", "Diego", "Fatima", "Noah",
+               "Aisha", "Liam", "Mei", "Omar", "Sofia", "Kenji", "Zara", "Lucas", "Ines", "Tariq"]
+LAST_NAMES = ["Smith", "Khan", "Garcia", "Chen", "Okafor", "Müller", "Silva", "Patel", "Kim", "Novak",
+              "Hughes", "Ahmed", "Rossi", "Tanaka", "Dubois", "Ivanova", "Mensah", "Lopez", "Nguyen", "Haddad"]
+ROLE_PREFIXES = ["Junior", "Associate", "Senior", "Lead", "Staff", "Principal", "Applied", "Platform"]
+ROLES = ["Web Developer", "Data Scientist", "Cybersecurity Analyst", "Software Engineer", "AI Engineer",
+         "Cloud Engineer", "Data Engineer", "Mobile Developer", "DevOps Engineer", "QA Engineer",
+         "Game Developer", "Embedded Engineer", "Site Reliability Engineer", "Product Analyst"]
+DOMAINS = ["Fintech", "Healthcare", "E-commerce", "Gaming", "Education", "Automotive", "Energy", "Media"]
+SKILLS = ["Python", "JavaScript", "TypeScript", "React", "Node.js", "SQL", "Go", "Rust", "Java", "C++",
+          "Docker", "Kubernetes", "AWS", "Azure", "GCP", "Linux", "Git", "Machine Learning", "Statistics",
+          "Pandas", "TensorFlow", "PyTorch", "Networking", "Cryptography", "Terraform", "GraphQL", "Kotlin",
+          "Swift", "Testing", "System Design", "Data Structures", "Algorithms", "Spark", "Airflow"]
+STEP_TITLES = ["Fundamentals", "Core Tooling", "Frameworks", "Databases", "Testing & Quality",
+               "Deployment", "System Design", "Specialization", "Portfolio Projects", "Interview Prep"]
+DURATIONS = ["2-4 weeks", "3-4 weeks", "4-6 weeks", "6-8 weeks", "8-10 weeks", "8-12 weeks", "3-6 months", "ongoing"]
+DIFFICULTIES = ["Beginner", "Beginner to Intermediate", "Intermediate", "Intermediate to Advanced", "Advanced"]
+STATUSES = ["applied"] * 6 + ["reviewed"] * 2 + ["interviewed", "rejected", "hired"]
+ICONS = ["🌐", "📊", "🔒", "💻", "🤖", "☁️", "📱", "🎮", "🛠️", "🧪"]
+# Fixed reference time, so the default output is the same on every run
+DEFAULT_NOW = datetime(2025, 1, 1)
+
+
+@dataclass
+class SyntheticConfig:
+    users: int = 10000
+    sessions_per_user: int = 3
+    expired_session_fraction: float = 0.6
+    application_skew: float = 1.2
+    max_applications_per_user: int = 500
+    career_paths: int = 1000
+    seed: int = 1
+    chunk_size: int = 5000
+    # Reference time for timestamps and session expiry
+    now: datetime = DEFAULT_NOW
+
+
+def _rng(seed, kind, chunk):
+    digest = hashlib.sha256(f"{seed}:{kind}:{chunk}".encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def _uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def user_chunk(config, chunk):
+    """Users ``[chunk * chunk_size, ...)`` with their sessions and applications."""
+    rng = _rng(config.seed, "users", chunk)
+    start = chunk * config.chunk_size
+    stop = min(config.users, start + config.chunk_size)
+    users, sessions, applications = [], [], []
+    for n in range(start, stop):
+        user_id = _uuid(rng)
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        created_at = config.now - timedelta(days=rng.uniform(0, 730))
+        last_login = created_at + (config.now - created_at) * rng.random()
+        users.append({
+            "id": user_id,
+            "email": f"{first.lower()}.{last.lower()}.{n}@example.com",
+            "name": f"{first} {last}",
+            "picture": None,
+            "created_at": created_at,
+            "last_login": last_login,
+            "synthetic": True,
+        })
+        for _ in range(rng.randint(0, config.sessions_per_user * 2)):
+            session_created = created_at + (config.now - created_at) * rng.random()
+            expires_at = session_created + timedelta(days=7)
+            if rng.random() >= config.expired_session_fraction:
+                expires_at = config.now + timedelta(days=rng.uniform(0.1, 7))
+            sessions.append({
+                "session_token": _uuid(rng),
+                "user_id": user_id,
+                "expires_at": expires_at,
+                "created_at": session_created,
+                "synthetic": True,
+            })
+        # Pareto-distributed application counts: most users apply a few times, a few apply a lot
+        count = min(config.max_applications_per_user, int(rng.paretovariate(config.application_skew)) - 1)
+        for _ in range(count):
+            applications.append({
+                "id": _uuid(rng),
+                "job_id": f"synthetic_job_{rng.randrange(200000)}",
+                "user_id": user_id,
+                "applicant_name": f"{first} {last}",
+                "email": f"{first.lower()}.{last.lower()}.{n}@example.com",
+                "phone": f"555-{rng.randrange(10000):04d}",
+                "resume_url": None,
+                "cover_letter": "I am excited to apply for this role.",
+                "applied_at": created_at + (config.now - created_at) * rng.random(),
+                "status": rng.choice(STATUSES),
+                "synthetic": True,
+            })
+    return users, sessions, applications
+
+
+def career_path_chunk(config, chunk):
+    rng = _rng(config.seed, "career_paths", chunk)
+    start = chunk * config.chunk_size
+    stop = min(config.career_paths, start + config.chunk_size)
+    paths = []
+    for n in range(start, stop):
+        path_id = _uuid(rng)
+        title = f"{rng.choice(ROLE_PREFIXES)} {rng.choice(ROLES)} ({rng.choice(DOMAINS)}) #{n}"
+        low = rng.randrange(45, 140) * 1000
+        high = low + rng.randrange(20, 90) * 1000
+        steps = rng.sample(STEP_TITLES, rng.randint(4, 8))
+        growth = rng.randint(2, 40)
+        path = {
+            "title": title,
+            "description": f"Synthetic career path for {title}",
+            "icon": rng.choice(ICONS),
+            "skills": rng.sample(SKILLS, rng.randint(4, 9)),
+            "roadmap": [{"step": i + 1, "title": step, "duration": rng.choice(DURATIONS),
+                         "description": f"{step} for {title}"} for i, step in enumerate(steps)],
+            "resources": [{"name": f"Resource {i}", "url": f"https://example.com/{n}/{i}",
+                           "type": rng.choice(["course", "book", "tool", "practice"])} for i in range(3)],
+            "salary_range": f"${low:,} - ${high:,}",
+            "job_outlook": f"{growth}% growth",
+            "difficulty_level": rng.choice(DIFFICULTIES),
+            # Numeric fields the server derives for seeded paths
+            "salary_min": float(low),
+            "salary_max": float(high),
+            "growth_pct": float(growth),
+            "synthetic": True,
+        }
+        # Stable across runs, so transition syncs see unchanged paths as unchanged
+        content_hash = hashlib.sha256(json.dumps(path, sort_keys=True).encode()).hexdigest()
+        paths.append({"id": path_id, **path, "content_hash": content_hash})
+    return paths
+
+
+def _insert(collection, docs, batch_size=5000):
+    for i in range(0, len(docs), batch_size):
+        collection.insert_many(docs[i:i + batch_size], ordered=False)
+
+
+def _load_user_chunk(db, config, chunk):
+    users, sessions, applications = user_chunk(config, chunk)
+    _insert(db.users, users)
+    _insert(db.sessions, sessions)
+    _insert(db.job_applications, applications)
+    return {"users": len(users), "sessions": len(sessions), "job_applications": len(applications)}
+
+
+def _load_career_path_chunk(db, config, chunk):
+    paths = career_path_chunk(config, chunk)
+    _insert(db.career_paths, paths)
+    return {"career_paths": len(paths)}
+
+
+def _chunks(total, size):
+    return range((total + size - 1) // size)
+
+
+def load(db, config):
+    """Load synthetic data into ``db`` in-process; returns document counts."""
+    totals = {}
+    for chunk in _chunks(config.users, config.chunk_size):
+        _merge(totals, _load_user_chunk(db, config, chunk))
+    for chunk in _chunks(config.career_paths, config.chunk_size):
+        _merge(totals, _load_career_path_chunk(db, config, chunk))
+    return totals
+
+
+def _merge(totals, counts):
+    for key, value in counts.items():
+        totals[key] = totals.get(key, 0) + value
+
+
+def _worker(mongo_url, db_name, config_dict, kind, chunk):
+    config = SyntheticConfig(**config_dict)
+    db = MongoClient(mongo_url)[db_name]
+    if kind == "users":
+        return _load_user_chunk(db, config, chunk)
+    return _load_career_path_chunk(db, config, chunk)
+
+
+def load_parallel(mongo_url, db_name, config, workers=os.cpu_count()):
+    """Load synthetic data with ``workers`` processes, one chunk per task."""
+    config_dict = asdict(config)
+    tasks = [("users", c) for c in _chunks(config.users, config.chunk_size)]
+    tasks += [("career_paths", c) for c in _chunks(config.career_paths, config.chunk_size)]
+    totals = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_worker, mongo_url, db_name, config_dict, kind, chunk) for kind, chunk in tasks]
+        for future in futures:
+            _merge(totals, future.result())
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default=os.environ.get("DB_NAME", "techpathfinder_db"))
+    parser.add_argument("--users", type=int, default=SyntheticConfig.users)
+    parser.add_argument("--sessions-per-user", type=int, default=SyntheticConfig.sessions_per_user,
+                        help="average sessions per user")
+    parser.add_argument("--expired-fraction", type=float, default=SyntheticConfig.expired_session_fraction)
+    parser.add_argument("--application-skew", type=float, default=SyntheticConfig.application_skew,
+                        help="Pareto shape of applications per user (lower = heavier tail)")
+    parser.add_argument("--max-applications", type=int, default=SyntheticConfig.max_applications_per_user)
+    parser.add_argument("--career-paths", type=int, default=SyntheticConfig.career_paths)
+    parser.add_argument("--seed", type=int, default=SyntheticConfig.seed)
+    parser.add_argument("--now", type=datetime.fromisoformat, default=None,
+                        help=f"reference date for timestamps and session expiry (default: {DEFAULT_NOW:%Y-%m-%d})")
+    parser.add_argument("--chunk-size", type=int, default=SyntheticConfig.chunk_size)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--drop", action="store_true", help="drop synthetic documents before loading")
+    args = parser.parse_args(argv)
+
+    config = SyntheticConfig(
+        users=args.users, sessions_per_user=args.sessions_per_user,
+        expired_session_fraction=args.expired_fraction, application_skew=args.application_skew,
+        max_applications_per_user=args.max_applications, career_paths=args.career_paths,
+        seed=args.seed, chunk_size=args.chunk_size,
+    )
+    if args.now is not None:
+        config.now = args.now
+    if args.drop:
+        db = MongoClient(args.mongo_url)[args.db]
+        for name in ("users", "sessions", "job_applications", "career_paths"):
+            db[name].delete_many({"synthetic": True})
+
+    started = time.perf_counter()
+    totals = load_parallel(args.mongo_url, args.db, config, args.workers)
+    elapsed = time.perf_counter() - started
+    for name, count in sorted(totals.items()):
+        print(f"{name}: {count:,}")
+    print(f"Loaded {sum(totals.values()):,} documents in {elapsed:.1f}s "
+          f"({sum(totals.values()) / elapsed:,.0f} docs/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""Lightweight request tracing.
+
+Every traced request gets a root span; Mongo commands and outbound HTTP calls
+become child spans. The active span travels in a ``contextvars.ContextVar``,
+so it follows the request into ``asyncio.to_thread`` and FastAPI's threadpool.
+
+Sampling happens in two steps. A request is sampled up front with probability
+``sample_rate``. When ``slow_threshold_ms`` is set, unsampled requests are still
+recorded, and they are kept only if they turn out slower than the threshold.
+Finished traces go to a background exporter thread, which either appends
+them to a JSONL file or posts OTLP/JSON to a collector.
+"""
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+import requests
+from pymongo import monitoring
+
+from metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_id(nbytes):
+    return os.urandom(nbytes).hex()
+
+
+class Trace:
+    __slots__ = ("trace_id", "sampled", "spans")
+
+    def __init__(self, trace_id, sampled):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.spans = []
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "attributes",
+                 "start_time", "end_time", "_started", "duration_ms", "status")
+
+    def __init__(self, trace, name, parent_id=None, kind="internal", attributes=None):
+        self.trace = trace
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self.end_time = None
+        self.duration_ms = None
+        self.status = "ok"
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def finish(self, status=None):
+        if self.end_time is not None:
+            return
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+        self.end_time = self.start_time + self.duration_ms / 1000
+        if status is not None:
+            self.status = status
+        self.trace.spans.append(self)
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace.trace_id}-{self.span_id}-{'01' if self.trace.sampled else '00'}"
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+def current_span():
+    return _current_span.get()
+
+
+def _child(name, kind, attributes):
+    parent = _current_span.get()
+    if parent is None:
+        return None
+    return Span(parent.trace, name, parent.span_id, kind, attributes)
+
+
+@contextmanager
+def span(name, kind="internal", **attributes):
+    """Open a child span of the active span; a no-op outside a traced request."""
+    child = _child(name, kind, attributes)
+    if child is None:
+        yield None
+        return
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.set_attribute("error", repr(e))
+        child.finish("error")
+        raise
+    finally:
+        _current_span.reset(token)
+        child.finish()
+
+
+def traced(name):
+    """Decorator wrapping a sync function in a child span."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class JsonlExporter:
+    """Appends one JSON line per finished trace."""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, trace):
+        record = {"trace_id": trace.trace_id, "spans": [s.to_dict() for s in trace.spans]}
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+
+
+class OtlpHttpExporter:
+    """Posts traces as OTLP/JSON to ``<endpoint>/v1/traces``."""
+
+    def __init__(self, endpoint, service_name="techpathfinder-api", timeout=2.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def _span(self, s):
+        return {
+            "traceId": s.trace.trace_id,
+            "spanId": s.span_id,
+            "parentSpanId": s.parent_id or "",
+            "name": s.name,
+            "kind": {"server": 2, "client": 3}.get(s.kind, 1),
+            "startTimeUnixNano": str(int(s.start_time * 1e9)),
+            "endTimeUnixNano": str(int(s.end_time * 1e9)),
+            "attributes": [{"key": k, "value": {"stringValue": str(v)}} for k, v in s.attributes.items()],
+            "status": {"code": 2 if s.status == "error" else 1},
+        }
+
+    def export(self, trace):
+        payload = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": "tracing"}, "spans": [self._span(s) for s in trace.spans]}],
+        }]}
+        requests.post(self.url, json=payload, timeout=self.timeout)
+
+
+class Tracer:
+    def __init__(self, exporter=None, sample_rate=0.0, slow_threshold_ms=None, max_queue=1000):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.slow_threshold_ms = slow_threshold_ms
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._worker = None
+        if exporter is not None:
+            self._worker = threading.Thread(target=self._drain, name="trace-exporter", daemon=True)
+            self._worker.start()
+
+    @property
+    def enabled(self):
+        return self.exporter is not None and (self.sample_rate > 0 or bool(self.slow_threshold_ms))
+
+    def start_trace(self, name, traceparent=None, **attributes):
+        """Open a root span, or return None when the request should not be recorded."""
+        trace_id, parent_id, sampled = None, None, None
+        if traceparent:
+            parts = traceparent.split("-")
+            if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+                trace_id, parent_id, sampled = parts[1], parts[2], parts[3] == "01"
+        if sampled is None:
+            sampled = random.random() < self.sample_rate
+        if not sampled and not self.slow_threshold_ms:
+            return None
+        trace = Trace(trace_id or _new_id(16), sampled)
+        return Span(trace, name, parent_id, "server", attributes)
+
+    def finish_trace(self, root, status=None):
+        root.finish(status)
+        trace = root.trace
+        if trace.sampled or (self.slow_threshold_ms and root.duration_ms >= self.slow_threshold_ms):
+            try:
+                self._queue.put_nowait(trace)
+            except queue.Full:
+                logger.warning("Trace export queue full, dropping trace %s", trace.trace_id)
+
+    def flush(self, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not self._queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def _drain(self):
+        while True:
+            trace = self._queue.get()
+            try:
+                self.exporter.export(trace)
+            except Exception as e:
+                logger.warning("Failed to export trace %s: %s", trace.trace_id, e)
+
+
+def tracer_from_env():
+    kind = os.environ.get("TRACE_EXPORTER", "none").lower()
+    if kind == "jsonl":
+        exporter = JsonlExporter(os.environ.get("TRACE_FILE", "traces.jsonl"))
+    elif kind == "otlp":
+        exporter = OtlpHttpExporter(os.environ.get("TRACE_OTLP_ENDPOINT", "http://localhost:4318"))
+    else:
+        exporter = None
+    slow_ms = float(os.environ.get("TRACE_SLOW_MS", "0")) or None
+    return Tracer(exporter, float(os.environ.get("TRACE_SAMPLE_RATE", "0")), slow_ms)
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a root span per HTTP request."""
+
+    def __init__(self, app, tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or ())
+        traceparent = headers.get(b"traceparent", b"").decode("latin-1") or None
+        root = self.tracer.start_trace(f"{scope['method']} {route_template(scope)}", traceparent,
+                                       **{"http.method": scope["method"], "http.target": scope["path"]})
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-trace-id", root.trace.trace_id.encode())]
+            await send(message)
+
+        token = _current_span.set(root)
+        status = "ok"
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            _current_span.reset(token)
+            if root.attributes.get("http.status_code", 500) >= 500:
+                status = "error"
+            self.tracer.finish_trace(root, status)
+
+
+class MongoCommandTracing(monitoring.CommandListener):
+    """Turns MongoDB commands issued inside a traced request into child spans."""
+
+    def __init__(self):
+        self._pending = {}
+
+    def started(self, event):
+        child = _child(f"mongo.{event.command_name}", "client", {
+            "db.name": event.database_name,
+            "db.collection": str(event.command.get(event.command_name, "")),
+        })
+        if child is not None:
+            self._pending[(event.request_id, event.connection_id)] = child
+
+    def succeeded(self, event):
+        child = self._pending.pop((event.request_id, event.connection_id), None)
+        if child is not None:
+            child.finish()
+
+    def failed(self, event):
+        child = self._pending.pop((event.request_id, event.connection_id), None)
+        if child is not None:
+            child.set_attribute("error", str(event.failure))
+            child.finish("error")
@@ -0,0 +1,275 @@
+"""Precomputed shortest transitions between career paths.
+
+Career paths form a weighted directed graph. An edge A -> B exists when the
+two paths share at least ``min_shared`` skills. Its weight is the estimated
+weeks to make the move:
+
+    overhead_weeks + roadmap_weeks(B) * (share of B's skills that A lacks)
+
+``roadmap_weeks`` sums the midpoints of B's roadmap step durations
+("4-6 weeks" -> 5, "3-6 months" -> ~19.5; "ongoing" counts as 0).
+
+``TransitionGraph`` keeps the all-pairs shortest distances and a next-hop
+matrix, computed with a vectorized Floyd-Warshall. Reading the cost of a
+transition is one matrix lookup. The route is rebuilt by following next
+hops, one step per hop. Hop counts and each path's list of reachable
+targets (cheapest first) are computed once per graph version, so
+``reachable`` is a lookup.
+
+``sync`` compares content hashes with the current graph. A new path, or a
+changed path whose edges only got cheaper, is folded in with O(n^2) row,
+column and relaxation updates. Removed paths, or edges that got more
+expensive, trigger a full recompute. Updates build new arrays and swap
+them in, so readers never see a half-updated graph.
+"""
+import asyncio
+import logging
+import math
+import re
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+WEEKS_PER_UNIT = {"day": 1 / 7, "week": 1, "month": 52 / 12, "year": 52}
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(?:\s*-\s*(\d+(?:\.\d+)?))?\s*(day|week|month|year)s?", re.IGNORECASE)
+
+
+def duration_weeks(text):
+    """Midpoint of a duration like "2-4 weeks" in weeks; 0 when there is none ("ongoing")."""
+    match = _DURATION.search(text or "")
+    if not match:
+        return 0.0
+    low = float(match.group(1))
+    high = float(match.group(2) or low)
+    return (low + high) / 2 * WEEKS_PER_UNIT[match.group(3).lower()]
+
+
+def roadmap_weeks(path):
+    return sum(duration_weeks(step.get("duration")) for step in path.get("roadmap", []))
+
+
+class _Node:
+    __slots__ = ("id", "title", "skills", "keys", "weeks", "content_hash")
+
+    def __init__(self, path):
+        self.id = path["id"]
+        self.title = path.get("title", "")
+        self.skills = list(path.get("skills", []))
+        self.keys = {skill.lower() for skill in self.skills}
+        self.weeks = roadmap_weeks(path)
+        self.content_hash = path.get("content_hash")
+
+
+class _State:
+    """One immutable version of the graph."""
+
+    __slots__ = ("nodes", "index", "weights", "dist", "next_hop", "reachable")
+
+    def __init__(self, nodes, weights, dist, next_hop):
+        self.nodes = nodes
+        self.index = {node.id: i for i, node in enumerate(nodes)}
+        self.weights = weights
+        self.dist = dist
+        self.next_hop = next_hop
+        self.reachable = _reachable(nodes, dist, next_hop)
+
+
+def hop_counts(dist, next_hop):
+    """Edges on each shortest route (0 on the diagonal and where unreachable)."""
+    n = len(dist)
+    targets = np.broadcast_to(np.arange(n)[None, :], (n, n))
+    current = np.broadcast_to(np.arange(n)[:, None], (n, n)).copy()
+    active = np.isfinite(dist) & (current != targets)
+    hops = np.zeros((n, n), dtype=int)
+    # Every pair takes one step per round; routes are at most n - 1 hops long
+    while active.any():
+        current = np.where(active, next_hop[current, targets], current)
+        hops += active
+        active &= current != targets
+    return hops
+
+
+def _reachable(nodes, dist, next_hop):
+    hops = hop_counts(dist, next_hop)
+    lists = []
+    for a, order in enumerate(np.argsort(dist, axis=1, kind="stable")):
+        lists.append([
+            {"id": nodes[b].id, "title": nodes[b].title, "total_weeks": round(float(dist[a, b]), 1), "hops": int(hops[a, b])}
+            for b in order if b != a and math.isfinite(dist[a, b])
+        ])
+    return lists
+
+
+def floyd_warshall(weights):
+    """All-pairs distances and next hops (-1 where unreachable) for an edge-weight matrix."""
+    n = len(weights)
+    dist = weights.copy()
+    np.fill_diagonal(dist, 0)
+    next_hop = np.where(np.isfinite(dist), np.arange(n)[None, :], -1)
+    for k in range(n):
+        via = dist[:, k, None] + dist[None, k, :]
+        better = via < dist
+        dist = np.where(better, via, dist)
+        next_hop = np.where(better, next_hop[:, k, None], next_hop)
+    return dist, next_hop
+
+
+class TransitionGraph:
+    """All-pairs career transitions, kept in sync with ``source()`` (an iterable of career-path docs)."""
+
+    def __init__(self, source=None, interval=300.0, overhead_weeks=2.0, min_shared=1):
+        self.source = source
+        self.interval = interval
+        self.overhead_weeks = overhead_weeks
+        self.min_shared = min_shared
+        self._state = _State([], np.zeros((0, 0)), np.zeros((0, 0)), np.zeros((0, 0), dtype=int))
+        self._task = None
+
+    @property
+    def ready(self):
+        return bool(self._state.nodes)
+
+    def edge_weeks(self, a, b):
+        """Weight of the edge ``a -> b``, or inf when the paths have too little in common."""
+        if a is b:
+            return 0.0
+        shared = len(a.keys & b.keys)
+        if shared < self.min_shared or not b.keys:
+            return math.inf
+        return self.overhead_weeks + b.weeks * (1 - shared / len(b.keys))
+
+    def _edges(self, nodes, u):
+        """Weights out of and into ``nodes[u]``."""
+        out = np.array([self.edge_weeks(nodes[u], node) for node in nodes])
+        into = np.array([self.edge_weeks(node, nodes[u]) for node in nodes])
+        return out, into
+
+    def rebuild(self, paths):
+        nodes = [_Node(path) for path in paths]
+        weights = np.array([[self.edge_weeks(a, b) for b in nodes] for a in nodes], dtype=float).reshape(len(nodes), len(nodes))
+        dist, next_hop = floyd_warshall(weights)
+        self._state = _State(nodes, weights, dist, next_hop)
+
+    def update(self, path):
+        """Add or replace one career path; incremental unless one of its edges got more expensive."""
+        state = self._state
+        node = _Node(path)
+        nodes = list(state.nodes)
+        u = state.index.get(node.id)
+        n = len(nodes) + (u is None)
+        weights = np.full((n, n), math.inf)
+        weights[:len(nodes), :len(nodes)] = state.weights
+        dist = np.full((n, n), math.inf)
+        dist[:len(nodes), :len(nodes)] = state.dist
+        next_hop = np.full((n, n), -1)
+        next_hop[:len(nodes), :len(nodes)] = state.next_hop
+        if u is None:
+            u = len(nodes)
+            nodes.append(node)
+        else:
+            nodes[u] = node
+        out, into = self._edges(nodes, u)
+        if np.any(out > weights[u]) or np.any(into > weights[:, u]):
+            # Old routes through u may now be too cheap: start over
+            weights[u, :], weights[:, u] = out, into
+            dist, next_hop = floyd_warshall(weights)
+            self._state = _State(nodes, weights, dist, next_hop)
+            return
+        weights[u, :], weights[:, u] = out, into
+        dist[u, u], next_hop[u, u] = 0, u
+
+        # From u: first edge u -> k, then the shortest k -> j (which cannot need u's new edges)
+        candidates = out[:, None] + dist
+        best = np.argmin(candidates, axis=0)
+        row = candidates[best, np.arange(n)]
+        improved = row < dist[u]
+        dist[u] = np.where(improved, row, dist[u])
+        next_hop[u] = np.where(improved, best, next_hop[u])
+
+        # Into u: the shortest i -> k, then the edge k -> u
+        candidates = dist + into[None, :]
+        best = np.argmin(candidates, axis=1)
+        column = candidates[np.arange(n), best]
+        improved = column < dist[:, u]
+        first = np.where(best == np.arange(n), u, next_hop[np.arange(n), best])
+        dist[:, u] = np.where(improved, column, dist[:, u])
+        next_hop[:, u] = np.where(improved, first, next_hop[:, u])
+
+        # Everything else: routes that now pass through u
+        via = dist[:, u, None] + dist[None, u, :]
+        better = via < dist
+        dist = np.where(better, via, dist)
+        next_hop = np.where(better, next_hop[:, u, None], next_hop)
+        self._state = _State(nodes, weights, dist, next_hop)
+
+    def sync(self, paths):
+        """Apply the differences between ``paths`` and the current graph; returns how many paths changed."""
+        paths = [path for path in paths if path.get("id")]
+        state = self._state
+        current = {node.id: node.content_hash for node in state.nodes}
+        incoming = {path["id"] for path in paths}
+        changed = [path for path in paths
+                   if path["id"] not in current or path.get("content_hash") is None
+                   or current[path["id"]] != path.get("content_hash")]
+        if set(current) - incoming or len(changed) > len(paths) // 2:
+            self.rebuild(paths)
+            return len(changed) + len(set(current) - incoming)
+        for path in changed:
+            self.update(path)
+        return len(changed)
+
+    def _step(self, state, a, b):
+        source, target = state.nodes[a], state.nodes[b]
+        return {
+            "from_id": source.id, "from": source.title,
+            "to_id": target.id, "to": target.title,
+            "weeks": round(float(state.weights[a, b]), 1),
+            "shared_skills": [skill for skill in target.skills if skill.lower() in source.keys],
+            "skills_to_learn": [skill for skill in target.skills if skill.lower() not in source.keys],
+        }
+
+    def route(self, from_id, to_id):
+        """The cheapest transition from one path to another; None when either is unknown or unreachable."""
+        state = self._state
+        a, b = state.index.get(from_id), state.index.get(to_id)
+        if a is None or b is None or not math.isfinite(state.dist[a, b]):
+            return None
+        steps, current = [], a
+        while current != b:
+            following = int(state.next_hop[current, b])
+            steps.append(self._step(state, current, following))
+            current = following
+        return {
+            "from": {"id": from_id, "title": state.nodes[a].title},
+            "to": {"id": to_id, "title": state.nodes[b].title},
+            "total_weeks": round(float(state.dist[a, b]), 1),
+            "steps": steps,
+        }
+
+    def reachable(self, from_id):
+        """Every path reachable from ``from_id`` with its total weeks and hop count, cheapest first."""
+        state = self._state
+        a = state.index.get(from_id)
+        return None if a is None else state.reachable[a]
+
+    def refresh(self):
+        return self.sync(list(self.source()))
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.warning("Refreshing career transitions failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.source is not None and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
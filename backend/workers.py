@@ -0,0 +1,116 @@
+"""Pre-fork worker manager for serving with several processes.
+
+The parent binds the listening socket and creates the shared cache file
+(see ``shmcache``). It then forks ``workers`` children. Each child imports
+the app and runs its own uvicorn server on the inherited socket, and the
+kernel spreads incoming connections across them.
+
+Start it with ``python workers.py`` (``WEB_CONCURRENCY`` workers on ``PORT``, default 8001).
+``python server.py`` with ``WEB_CONCURRENCY`` above 1 execs this script
+before it builds anything. The app is never imported in the parent: a
+MongoClient is not fork-safe, and neither are the app's background threads,
+so each child builds its own. Warm data is shared through the cache file
+instead, so only the first worker pays for a cold read. Children that
+exit unexpectedly are restarted. SIGTERM/SIGINT are forwarded to the
+children, and the manager waits for them to drain.
+
+Environment seen by children: ``WORKER_ID`` (0..N-1), ``WORKER_COUNT`` (N)
+and ``SHM_CACHE_PATH``.
+"""
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+import shmcache
+
+logger = logging.getLogger(__name__)
+
+
+def _bind(host, port, backlog=2048):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock, worker_id, workers, log_level):
+    import uvicorn
+
+    os.environ["WORKER_ID"] = str(worker_id)
+    os.environ["WORKER_COUNT"] = str(workers)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    config = uvicorn.Config(app, log_level=log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(app="server:app", host="0.0.0.0", port=8001, workers=2, log_level="info"):
+    logging.basicConfig(level=log_level.upper())
+    sock = _bind(host, port)
+    cache_path = shmcache.SharedCache.create_file(
+        int(os.environ.get("SHM_CACHE_SLOTS", "2048")), int(os.environ.get("SHM_CACHE_SLOT_BYTES", "16384")),
+    )
+    os.environ["SHM_CACHE_PATH"] = cache_path
+    children = {}
+    stopping = False
+
+    def spawn(worker_id):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(app, sock, worker_id, workers, log_level)
+            except BaseException:
+                logger.exception("Worker %d crashed", worker_id)
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = worker_id
+        logger.info("Started worker %d (pid %d)", worker_id, pid)
+
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    logger.info("Serving %s on %s:%d with %d workers (cache %s)", app, host, port, workers, cache_path)
+    for worker_id in range(workers):
+        spawn(worker_id)
+
+    try:
+        while children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            worker_id = children.pop(pid, None)
+            if worker_id is None or stopping:
+                continue
+            logger.warning("Worker %d (pid %d) exited with status %d; restarting", worker_id, pid, status)
+            time.sleep(1)
+            spawn(worker_id)
+    finally:
+        sock.close()
+        try:
+            os.unlink(cache_path)
+        except FileNotFoundError:
+            pass
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    serve(workers=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)),
+          port=int(os.environ.get("PORT", "8001")))
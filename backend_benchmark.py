@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+TechPathfinder Backend Benchmark Suite
+
+Drives concurrent workloads against the API and reports throughput and
+p50/p95/p99 latency per route as JSON.
+
+By default the app runs in-process (ASGI, no network). It uses an in-memory
+Mongo stand-in (MONGO_URL=mongomock://) and local stubs for Adzuna and
+Emergent auth. Pass --mongo-url to benchmark against a local mongod, or
+--base-url to drive an already running server.
+
+Examples:
+    python backend_benchmark.py --workload all --output bench.json
+    python backend_benchmark.py --workload browse_mix --save-baseline bench_baseline.json
+    python backend_benchmark.py --workload all --compare bench_baseline.json --tolerance 0.25
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+from synthetic_data import SyntheticConfig, load as load_synthetic  # noqa: E402
+from tests.stubs import UpstreamStub  # noqa: E402
+
+SEARCH_QUERIES = ["python", "react developer", "data science intern", "cloud engineer",
+                  "cybersecurity", "machine learning", "frontend", "devops", "sql analyst"]
+SEARCH_LOCATIONS = [None, None, "New York, NY", "Austin, TX", "Remote", "Seattle, WA"]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+
+    def record(self, route, seconds, ok):
+        self.samples.setdefault(route, []).append(seconds * 1000)
+        if not ok:
+            self.errors[route] = self.errors.get(route, 0) + 1
+
+    def report(self, elapsed):
+        routes = {}
+        for route, values in sorted(self.samples.items()):
+            values.sort()
+            routes[route] = {
+                "requests": len(values),
+                "errors": self.errors.get(route, 0),
+                "throughput_rps": round(len(values) / elapsed, 2) if elapsed else None,
+                "p50_ms": round(percentile(values, 50), 3),
+                "p95_ms": round(percentile(values, 95), 3),
+                "p99_ms": round(percentile(values, 99), 3),
+                "max_ms": round(values[-1], 3),
+            }
+        total = sum(len(v) for v in self.samples.values())
+        return {
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(total / elapsed, 2) if elapsed else None,
+            "routes": routes,
+        }
+
+
+class Benchmark:
+    def __init__(self, client, concurrency, requests_per_workload, seed):
+        self.client = client
+        self.concurrency = concurrency
+        self.requests = requests_per_workload
+        self.random = random.Random(seed)
+        self.tokens = []
+        self.career_path_ids = []
+
+    async def call(self, recorder, route, method, url, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        recorder.record(route, time.perf_counter() - started, ok)
+        return response
+
+    async def run(self, name, jobs):
+        """Run ``jobs`` (coroutine factories taking a Recorder) with bounded concurrency."""
+        recorder = Recorder()
+        queue = asyncio.Queue()
+        for job in jobs:
+            queue.put_nowait(job)
+
+        async def worker():
+            while True:
+                try:
+                    job = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await job(recorder)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        report = recorder.report(time.perf_counter() - started)
+        report["workload"] = name
+        report["concurrency"] = self.concurrency
+        return report
+
+    async def login(self, recorder):
+        response = await self.call(recorder, "POST /api/auth/profile", "POST", "/api/auth/profile",
+                                   headers={"X-Session-ID": uuid.UUID(int=self.random.getrandbits(128)).hex})
+        if response is not None and response.status_code == 200:
+            self.tokens.append(response.json()["session_token"])
+
+    async def ensure_sessions(self, count):
+        recorder = Recorder()
+        while len(self.tokens) < count:
+            await self.login(recorder)
+
+    async def ensure_career_paths(self):
+        if not self.career_path_ids:
+            response = await self.client.get("/api/career-paths")
+            self.career_path_ids = [p["id"] for p in response.json().get("career_paths", [])]
+
+    # Workloads
+    async def login_storm(self):
+        return await self.run("login_storm", [self.login] * self.requests)
+
+    async def search_mix(self):
+        def job():
+            body = {"query": self.random.choice(SEARCH_QUERIES)}
+            location = self.random.choice(SEARCH_LOCATIONS)
+            if location:
+                body["location"] = location
+            return lambda r: self.call(r, "POST /api/jobs/search", "POST", "/api/jobs/search", json=body)
+        return await self.run("search_mix", [job() for _ in range(self.requests)])
+
+    async def apply_burst(self):
+        await self.ensure_sessions(max(1, self.concurrency))
+
+        def job(i):
+            token = self.tokens[i % len(self.tokens)]
+            headers = {"Authorization": f"Bearer {token}"}
+            if i % 5 == 4:
+                return lambda r: self.call(r, "GET /api/jobs/my-applications", "GET",
+                                           "/api/jobs/my-applications", headers=headers)
+            body = {"job_id": f"stub_job_{i}", "applicant_name": "Bench User", "email": "bench@example.com",
+                    "phone": "555-0100", "cover_letter": "Benchmark application"}
+            return lambda r: self.call(r, "POST /api/jobs/apply", "POST", "/api/jobs/apply",
+                                       json=body, headers=headers)
+        return await self.run("apply_burst", [job(i) for i in range(self.requests)])
+
+    async def browse_mix(self):
+        await self.ensure_career_paths()
+        await self.ensure_sessions(1)
+        token = self.tokens[0]
+        pages = [
+            (30, "GET /api/career-paths", lambda: "/api/career-paths", {}),
+            (15, "GET /api/career-paths/{path_id}",
+             lambda: f"/api/career-paths/{self.random.choice(self.career_path_ids or ['missing'])}", {}),
+            (10, "GET /api/blog/posts", lambda: "/api/blog/posts", {}),
+            (10, "GET /api/resume-templates", lambda: "/api/resume-templates", {}),
+            (10, "GET /api/resume-templates/{template_id}/download",
+             lambda: f"/api/resume-templates/{self.random.choice(['software_engineer', 'data_scientist'])}/download", {}),
+            (10, "GET /api/job-guidance", lambda: "/api/job-guidance", {}),
+            (10, "GET /api/bootstrap", lambda: "/api/bootstrap", {"Authorization": f"Bearer {token}"}),
+            (5, "GET /api/health", lambda: "/api/health", {}),
+        ]
+        weights = [page[0] for page in pages]
+
+        def job():
+            _, route, url, headers = self.random.choices(pages, weights)[0]
+            path = url()
+            return lambda r: self.call(r, route, "GET", path, headers=headers)
+        return await self.run("browse_mix", [job() for _ in range(self.requests)])
+
+
+WORKLOADS = ["login_storm", "search_mix", "apply_burst", "browse_mix"]
+
+# Run in a fresh interpreter: import the app, run startup, serve one request
+COLD_START_SNIPPET = """
+import asyncio, json, os, sys, time
+started = time.perf_counter()
+sys.path.insert(0, os.path.join(sys.argv[1], "backend"))
+import httpx, server
+imported = time.perf_counter()
+
+async def first_request():
+    async with server.app.router.lifespan_context(server.app):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await client.get("/api/health")
+        return time.perf_counter()
+
+served = asyncio.run(first_request())
+print(json.dumps({"import_s": imported - started, "first_request_s": served - started}))
+"""
+
+
+def measure_cold_start(runs, mongo_url):
+    samples = []
+    env = {**os.environ, "MONGO_URL": mongo_url}
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", COLD_START_SNIPPET, ROOT], env=env,
+                                capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "runs": runs,
+        "import_ms_median": round(statistics.median(s["import_s"] for s in samples) * 1000, 1),
+        "first_request_ms_median": round(statistics.median(s["first_request_s"] for s in samples) * 1000, 1),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regressions of ``results`` against ``baseline``."""
+    regressions = []
+    for name, workload in results["workloads"].items():
+        base_workload = baseline.get("workloads", {}).get(name)
+        if not base_workload:
+            continue
+        for route, stats in workload["routes"].items():
+            base = base_workload["routes"].get(route)
+            if not base:
+                continue
+            if base["p95_ms"] and stats["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{name} {route}: p95 {stats['p95_ms']}ms > baseline {base['p95_ms']}ms")
+            if base["throughput_rps"] and stats["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+                regressions.append(f"{name} {route}: throughput {stats['throughput_rps']}rps "
+                                   f"< baseline {base['throughput_rps']}rps")
+            if stats["errors"] > base["errors"]:
+                regressions.append(f"{name} {route}: {stats['errors']} errors (baseline {base['errors']})")
+    cold, base_cold = results.get("cold_start"), baseline.get("cold_start")
+    if cold and base_cold:
+        for key in ("import_ms_median", "first_request_ms_median"):
+            if cold[key] > base_cold[key] * (1 + tolerance):
+                regressions.append(f"cold start {key}: {cold[key]}ms > baseline {base_cold[key]}ms")
+    return regressions
+
+
+async def run_benchmarks(args, stub):
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=30)
+        lifespan = None
+    else:
+        os.environ.update(stub.env())
+        os.environ["MONGO_URL"] = args.mongo_url
+        # Measure the app itself; export these to benchmark load shedding instead
+        for name in ("RATE_LIMIT_RPS", "SEARCH_RATE_LIMIT_PER_MIN", "ADZUNA_MAX_RPS", "ADZUNA_DAILY_QUOTA"):
+            os.environ.setdefault(name, "0")
+        os.environ.setdefault("DB_NAME", "techpathfinder_bench")
+        import server
+        if args.mongo_url != "mongomock://" and args.fresh_db:
+            server.client.drop_database(server.DB_NAME)
+        if args.synthetic_users or args.synthetic_career_paths:
+            load_synthetic(server.db, SyntheticConfig(users=args.synthetic_users,
+                                                      career_paths=args.synthetic_career_paths, seed=args.seed))
+        lifespan = server.app.router.lifespan_context(server.app)
+        await lifespan.__aenter__()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://bench", timeout=30)
+
+    try:
+        bench = Benchmark(client, args.concurrency, args.requests, args.seed)
+        workloads = WORKLOADS if "all" in args.workload else args.workload
+        results = {"concurrency": args.concurrency, "requests_per_workload": args.requests,
+                   "target": args.base_url or f"in-process ({args.mongo_url})", "workloads": {}}
+        for name in workloads:
+            results["workloads"][name] = await getattr(bench, name)()
+        return results
+    finally:
+        await client.aclose()
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workload", nargs="+", default=["all"], choices=WORKLOADS + ["all"])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="requests per workload")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mongo-url", default=os.environ.get("BENCH_MONGO_URL", "mongomock://"))
+    parser.add_argument("--fresh-db", action="store_true", help="drop the benchmark database first")
+    parser.add_argument("--synthetic-users", type=int, default=0,
+                        help="preload this many synthetic users (with sessions and applications)")
+    parser.add_argument("--synthetic-career-paths", type=int, default=0,
+                        help="preload this many synthetic career paths")
+    parser.add_argument("--base-url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--upstream-latency-ms", type=float, default=0.0, help="latency added by the stubs")
+    parser.add_argument("--cold-start-runs", type=int, default=0,
+                        help="also measure import and time-to-first-request over N fresh interpreters")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--save-baseline", help="also write the report as a baseline file")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args(argv)
+
+    with UpstreamStub(latency=args.upstream_latency_ms / 1000) as stub:
+        results = asyncio.run(run_benchmarks(args, stub))
+    if args.cold_start_runs:
+        results["cold_start"] = measure_cold_start(args.cold_start_runs, args.mongo_url)
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        results["regressions"] = regressions
+        exit_code = 1 if regressions else 0
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(output + "\n")
+    for regression in results.get("regressions", []):
+        print(f"❌ REGRESSION {regression}", file=sys.stderr)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,566 +1,723 @@
 #!/usr/bin/env python3
 """
-TechPathfinder Backend API Testing Suite
-Tests all backend endpoints according to test_result.md requirements
+TechPathfinder Backend API Test Suite
+
+Runs the API checks in-process against the ASGI app (no network, no deployed
+preview). Mongo is an in-memory stand-in (MONGO_URL=mongomock://) unless
+--mongo-url points at a real mongod. Adzuna and Emergent auth are served by
+the local stubs in tests/stubs.py. Independent test cases run concurrently.
+
+Every request is timed, and the Mongo commands it issues are counted. Routes
+declare budgets in BUDGETS, for example at most 1 Mongo command for
+GET /api/career-paths. The run fails when a case fails or any request
+exceeds its route's budget.
+
+Counting works per request, even with concurrent cases. A global pymongo
+CommandListener counts every command. Against a real mongod that includes
+getMore. The in-memory client (backend/mockmongo.py) reports one command per
+top-level collection call. The request's counter lives in a context
+variable, which carries into the worker threads the app uses. Work the app
+hands to background tasks, such as recommendation refreshes, is not charged
+to the request.
+
+Cases are named case_* rather than test_* so that pytest, which runs the unit
+tests in tests/, does not collect them. A case that cannot run against the
+chosen Mongo calls skip(), for example geo search under mongomock.
+
+Resume artifacts, exported traces and request profiles are written to a fresh
+temporary directory. The admin, profiling and debug-header endpoints are
+enabled with test tokens unless the environment sets them.
+
+The app runs in strict loop mode (LOOP_STRICT=1) unless the environment says
+otherwise, so a Mongo command or outbound HTTP call made on the event loop
+fails its request.
+
+Examples:
+    python backend_test.py
+    python backend_test.py --concurrency 8 --json test_report.json
+    python backend_test.py --mongo-url mongodb://localhost:27017 --fresh-db
+    python backend_test.py --latency-scale 3   # slow CI machine
 """
 
-import requests
+import argparse
+import asyncio
+import contextvars
 import json
+import os
+import shutil
 import sys
-from datetime import datetime
+import tempfile
+import time
+import traceback
 import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 
-# Backend URL from frontend/.env
-BACKEND_URL = "https://9a02cb3f-b17a-42e2-8ece-2337c532d6e6.preview.emergentagent.com"
-API_BASE = f"{BACKEND_URL}/api"
-
-class BackendTester:
-    def __init__(self):
-        self.session = requests.Session()
-        self.test_results = []
-        self.session_token = None
-        
-    def log_test(self, test_name, success, details="", response_data=None):
-        """Log test results"""
-        status = "✅ PASS" if success else "❌ FAIL"
-        print(f"{status} {test_name}")
-        if details:
-            print(f"   Details: {details}")
-        if response_data and not success:
-            print(f"   Response: {response_data}")
-        print()
-        
-        self.test_results.append({
-            "test": test_name,
-            "success": success,
-            "details": details,
-            "response": response_data
-        })
-    
-    def test_health_check(self):
-        """Test GET /api/health endpoint"""
-        try:
-            response = self.session.get(f"{API_BASE}/health", timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("status") == "healthy" and "service" in data:
-                    self.log_test("Health Check", True, f"Service: {data.get('service')}")
-                    return True
-                else:
-                    self.log_test("Health Check", False, "Invalid response format", data)
-                    return False
-            else:
-                self.log_test("Health Check", False, f"HTTP {response.status_code}", response.text)
-                return False
-                
-        except Exception as e:
-            self.log_test("Health Check", False, f"Connection error: {str(e)}")
-            return False
-    
-    def test_career_paths_list(self):
-        """Test GET /api/career-paths endpoint"""
-        try:
-            response = self.session.get(f"{API_BASE}/career-paths", timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                career_paths = data.get("career_paths", [])
-                
-                if len(career_paths) == 6:
-                    # Verify expected career paths exist
-                    expected_titles = [
-                        "Web Developer", "Data Scientist", "Cybersecurity Analyst",
-                        "Software Engineer", "AI Engineer", "Cloud Engineer"
-                    ]
-                    actual_titles = [cp.get("title") for cp in career_paths]
-                    
-                    missing_titles = [title for title in expected_titles if title not in actual_titles]
-                    if not missing_titles:
-                        # Verify structure of first career path
-                        first_path = career_paths[0]
-                        required_fields = ["id", "title", "description", "icon", "skills", "roadmap", "resources", "salary_range"]
-                        missing_fields = [field for field in required_fields if field not in first_path]
-                        
-                        if not missing_fields:
-                            self.log_test("Career Paths List", True, f"Found all 6 career paths with complete data")
-                            return True, career_paths
-                        else:
-                            self.log_test("Career Paths List", False, f"Missing fields: {missing_fields}")
-                            return False, None
-                    else:
-                        self.log_test("Career Paths List", False, f"Missing career paths: {missing_titles}")
-                        return False, None
-                else:
-                    self.log_test("Career Paths List", False, f"Expected 6 career paths, got {len(career_paths)}")
-                    return False, None
-            else:
-                self.log_test("Career Paths List", False, f"HTTP {response.status_code}", response.text)
-                return False, None
-                
-        except Exception as e:
-            self.log_test("Career Paths List", False, f"Connection error: {str(e)}")
-            return False, None
-    
-    def test_career_path_detail(self, career_paths):
-        """Test GET /api/career-paths/{path_id} endpoint"""
-        if not career_paths:
-            self.log_test("Career Path Detail", False, "No career paths available for testing")
-            return False
-            
-        try:
-            # Test with valid ID
-            test_path = career_paths[0]
-            path_id = test_path["id"]
-            
-            response = self.session.get(f"{API_BASE}/career-paths/{path_id}", timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("id") == path_id and data.get("title") == test_path["title"]:
-                    # Verify roadmap structure
-                    roadmap = data.get("roadmap", [])
-                    if roadmap and isinstance(roadmap, list) and len(roadmap) > 0:
-                        first_step = roadmap[0]
-                        if "step" in first_step and "title" in first_step and "duration" in first_step:
-                            self.log_test("Career Path Detail (Valid ID)", True, f"Retrieved {data.get('title')} with {len(roadmap)} roadmap steps")
-                        else:
-                            self.log_test("Career Path Detail (Valid ID)", False, "Invalid roadmap structure")
-                            return False
-                    else:
-                        self.log_test("Career Path Detail (Valid ID)", False, "Missing or empty roadmap")
-                        return False
-                else:
-                    self.log_test("Career Path Detail (Valid ID)", False, "Response data doesn't match request")
-                    return False
-            else:
-                self.log_test("Career Path Detail (Valid ID)", False, f"HTTP {response.status_code}", response.text)
-                return False
-            
-            # Test with invalid ID
-            invalid_id = str(uuid.uuid4())
-            response = self.session.get(f"{API_BASE}/career-paths/{invalid_id}", timeout=10)
-            
-            if response.status_code == 404:
-                self.log_test("Career Path Detail (Invalid ID)", True, "Correctly returned 404 for invalid ID")
-                return True
-            else:
-                self.log_test("Career Path Detail (Invalid ID)", False, f"Expected 404, got {response.status_code}")
-                return False
-                
-        except Exception as e:
-            self.log_test("Career Path Detail", False, f"Connection error: {str(e)}")
-            return False
-    
-    def test_auth_login(self):
-        """Test GET /api/auth/login endpoint"""
-        try:
-            response = self.session.get(f"{API_BASE}/auth/login", timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                auth_url = data.get("auth_url")
-                
-                if auth_url and "auth.emergentagent.com" in auth_url:
-                    self.log_test("Auth Login", True, "Returns valid Emergent auth URL")
-                    return True
-                else:
-                    self.log_test("Auth Login", False, "Invalid or missing auth_url", data)
-                    return False
-            else:
-                self.log_test("Auth Login", False, f"HTTP {response.status_code}", response.text)
-                return False
-                
-        except Exception as e:
-            self.log_test("Auth Login", False, f"Connection error: {str(e)}")
-            return False
-    
-    def test_auth_profile(self):
-        """Test POST /api/auth/profile endpoint"""
-        try:
-            # Test without session ID (should fail)
-            response = self.session.post(f"{API_BASE}/auth/profile", timeout=10)
-            
-            if response.status_code == 400:
-                self.log_test("Auth Profile (No Session)", True, "Correctly rejects request without session ID")
-            else:
-                self.log_test("Auth Profile (No Session)", False, f"Expected 400, got {response.status_code}")
-                return False
-            
-            # Test with invalid session ID (should fail)
-            headers = {"X-Session-ID": "invalid-session-id"}
-            response = self.session.post(f"{API_BASE}/auth/profile", headers=headers, timeout=10)
-            
-            if response.status_code == 401:
-                self.log_test("Auth Profile (Invalid Session)", True, "Correctly rejects invalid session ID")
-                return True
-            else:
-                self.log_test("Auth Profile (Invalid Session)", False, f"Expected 401, got {response.status_code}")
-                return False
-                
-        except Exception as e:
-            self.log_test("Auth Profile", False, f"Connection error: {str(e)}")
-            return False
-    
-    def test_job_guidance(self):
-        """Test GET /api/job-guidance endpoint"""
-        try:
-            response = self.session.get(f"{API_BASE}/job-guidance", timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Check for required sections
-                required_sections = ["internship_tips", "application_process", "resume_templates", "interview_prep"]
-                missing_sections = [section for section in required_sections if section not in data]
-                
-                if not missing_sections:
-                    # Verify content quality
-                    internship_tips = data.get("internship_tips", [])
-                    resume_templates = data.get("resume_templates", [])
-                    
-                    if len(internship_tips) >= 5 and len(resume_templates) >= 3:
-                        # Check resume template structure
-                        if resume_templates and "name" in resume_templates[0] and "description" in resume_templates[0]:
-                            self.log_test("Job Guidance", True, f"Complete guidance with {len(internship_tips)} tips and {len(resume_templates)} templates")
-                            return True
-                        else:
-                            self.log_test("Job Guidance", False, "Invalid resume template structure")
-                            return False
-                    else:
-                        self.log_test("Job Guidance", False, f"Insufficient content: {len(internship_tips)} tips, {len(resume_templates)} templates")
-                        return False
-                else:
-                    self.log_test("Job Guidance", False, f"Missing sections: {missing_sections}")
-                    return False
-            else:
-                self.log_test("Job Guidance", False, f"HTTP {response.status_code}", response.text)
-                return False
-                
-        except Exception as e:
-            self.log_test("Job Guidance", False, f"Connection error: {str(e)}")
-            return False
-    
-    def test_blog_posts(self):
-        """Test GET /api/blog/posts endpoint"""
-        try:
-            response = self.session.get(f"{API_BASE}/blog/posts", timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                posts = data.get("posts", [])
-                
-                if len(posts) >= 3:
-                    # Verify post structure
-                    first_post = posts[0]
-                    required_fields = ["id", "title", "excerpt", "author", "created_at", "tags"]
-                    missing_fields = [field for field in required_fields if field not in first_post]
-                    
-                    if not missing_fields:
-                        # Check content quality
-                        motivation_posts = [post for post in posts if "motivation" in post.get("tags", [])]
-                        if motivation_posts:
-                            self.log_test("Blog Posts", True, f"Found {len(posts)} posts including motivation content")
-                            return True
-                        else:
-                            self.log_test("Blog Posts", False, "No motivation content found")
-                            return False
-                    else:
-                        self.log_test("Blog Posts", False, f"Missing fields in posts: {missing_fields}")
-                        return False
-                else:
-                    self.log_test("Blog Posts", False, f"Expected at least 3 posts, got {len(posts)}")
-                    return False
-            else:
-                self.log_test("Blog Posts", False, f"HTTP {response.status_code}", response.text)
-                return False
-                
-        except Exception as e:
-            self.log_test("Blog Posts", False, f"Connection error: {str(e)}")
-            return False
+import httpx
+from pymongo import monitoring
 
-    def test_job_search(self):
-        """Test POST /api/jobs/search endpoint"""
-        try:
-            # Test basic job search
-            search_data = {
-                "query": "software engineer",
-                "location": "San Francisco",
-                "job_type": "full_time"
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+from tests.stubs import UpstreamStub  # noqa: E402
+
+
+@dataclass(frozen=True)
+class Budget:
+    max_ms: float
+    max_queries: int
+
+
+# Per-route budgets, applied to every request of the route. Keys are "METHOD /path/template"
+BUDGETS = {
+    "GET /api/health": Budget(50, 0),
+    "GET /api/career-paths": Budget(250, 1),
+    "GET /api/career-paths/{path_id}": Budget(250, 1),
+    "GET /api/career-paths/{path_id}/transitions": Budget(250, 1),
+    "GET /api/career-paths/{path_id}/transitions/{target_id}": Budget(250, 1),
+    "GET /api/auth/login": Budget(50, 0),
+    "POST /api/auth/profile": Budget(500, 3),
+    "GET /api/user/profile": Budget(250, 2),
+    "GET /api/job-guidance": Budget(100, 0),
+    "GET /api/blog/posts": Budget(100, 0),
+    "POST /api/jobs/search": Budget(1000, 2),
+    "GET /api/autocomplete": Budget(100, 0),
+    "GET /api/resume-templates": Budget(100, 0),
+    "GET /api/resume-templates/{template_id}/download": Budget(500, 2),
+    "POST /api/jobs/apply": Budget(500, 3),
+    "GET /api/jobs/my-applications": Budget(250, 3),
+    "GET /api/jobs/my-applications/export": Budget(500, 3),
+    "GET /api/bootstrap": Budget(1000, 5),
+    "PUT /api/user/career-path": Budget(500, 4),
+    "GET /api/recommendations": Budget(250, 3),
+    "GET /metrics": Budget(100, 0),
+    "GET /api/admin/db/queries": Budget(100, 0),
+    "GET /api/admin/profiles": Budget(250, 0),
+}
+
+
+# Mongo command counting, attributed to the request running in the current context
+_commands = contextvars.ContextVar("request_commands", default=None)
+
+
+class CommandCounter(monitoring.CommandListener):
+    def started(self, event):
+        commands = _commands.get()
+        if commands is not None:
+            commands.append(event.command_name)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+class Recorder:
+    def __init__(self, app, latency_scale=1.0):
+        self.app = app
+        self.latency_scale = latency_scale
+        self.samples = {}
+
+    def route(self, method, path):
+        import metrics
+        return f"{method} {metrics.route_template({'type': 'http', 'method': method, 'path': path, 'app': self.app})}"
+
+    def record(self, method, url, elapsed_ms, commands):
+        path = httpx.URL(url).path
+        self.samples.setdefault(self.route(method, path), []).append((elapsed_ms, len(commands), url, commands))
+
+    def violations(self):
+        found = []
+        for route, samples in sorted(self.samples.items()):
+            budget = BUDGETS.get(route)
+            if budget is None:
+                continue
+            for elapsed_ms, queries, url, commands in samples:
+                if elapsed_ms > budget.max_ms * self.latency_scale:
+                    found.append(f"{route}: {url} took {elapsed_ms:.1f}ms "
+                                 f"(budget {budget.max_ms * self.latency_scale:.0f}ms)")
+                if queries > budget.max_queries:
+                    found.append(f"{route}: {url} issued {queries} Mongo commands "
+                                 f"(budget {budget.max_queries}): {', '.join(commands)}")
+        return found
+
+    def report(self):
+        routes = {}
+        for route, samples in sorted(self.samples.items()):
+            budget = BUDGETS.get(route)
+            routes[route] = {
+                "requests": len(samples),
+                "max_ms": round(max(s[0] for s in samples), 2),
+                "max_queries": max(s[1] for s in samples),
+                "budget_ms": budget.max_ms * self.latency_scale if budget else None,
+                "budget_queries": budget.max_queries if budget else None,
             }
-            
-            response = self.session.post(f"{API_BASE}/jobs/search", 
-                                       json=search_data, timeout=15)
-            
-            if response.status_code == 200:
-                data = response.json()
-                results = data.get("results", [])
-                count = data.get("count", 0)
-                
-                if results and count > 0:
-                    # Verify job structure
-                    first_job = results[0]
-                    required_fields = ["id", "title", "company", "location", "description", "salary", "job_type"]
-                    missing_fields = [field for field in required_fields if field not in first_job]
-                    
-                    if not missing_fields:
-                        self.log_test("Job Search API", True, f"Found {count} jobs with complete structure")
-                        
-                        # Test different search parameters
-                        search_data2 = {"query": "data scientist"}
-                        response2 = self.session.post(f"{API_BASE}/jobs/search", 
-                                                    json=search_data2, timeout=15)
-                        
-                        if response2.status_code == 200:
-                            self.log_test("Job Search (Different Query)", True, "Successfully handled different search parameters")
-                            return True
-                        else:
-                            self.log_test("Job Search (Different Query)", False, f"HTTP {response2.status_code}")
-                            return False
-                    else:
-                        self.log_test("Job Search API", False, f"Missing fields in job results: {missing_fields}")
-                        return False
-                else:
-                    self.log_test("Job Search API", False, "No job results returned")
-                    return False
-            else:
-                self.log_test("Job Search API", False, f"HTTP {response.status_code}", response.text)
-                return False
-                
-        except Exception as e:
-            self.log_test("Job Search API", False, f"Connection error: {str(e)}")
-            return False
+        return routes
 
-    def test_resume_templates(self):
-        """Test GET /api/resume-templates endpoint"""
-        try:
-            response = self.session.get(f"{API_BASE}/resume-templates", timeout=10)
-            
-            if response.status_code == 200:
-                templates = response.json()
-                
-                if isinstance(templates, list) and len(templates) >= 3:
-                    # Verify template structure
-                    first_template = templates[0]
-                    required_fields = ["id", "name", "description", "download_url", "category"]
-                    missing_fields = [field for field in required_fields if field not in first_template]
-                    
-                    if not missing_fields:
-                        # Check for expected template IDs
-                        template_ids = [t.get("id") for t in templates]
-                        expected_ids = ["software_engineer", "data_scientist", "web_developer", "cybersecurity"]
-                        found_expected = [tid for tid in expected_ids if tid in template_ids]
-                        
-                        if len(found_expected) >= 2:
-                            self.log_test("Resume Templates API", True, f"Found {len(templates)} templates with proper structure")
-                            return True, templates
-                        else:
-                            self.log_test("Resume Templates API", False, f"Missing expected template IDs: {expected_ids}")
-                            return False, None
-                    else:
-                        self.log_test("Resume Templates API", False, f"Missing fields: {missing_fields}")
-                        return False, None
-                else:
-                    self.log_test("Resume Templates API", False, f"Expected at least 3 templates, got {len(templates) if isinstance(templates, list) else 'invalid format'}")
-                    return False, None
-            else:
-                self.log_test("Resume Templates API", False, f"HTTP {response.status_code}", response.text)
-                return False, None
-                
-        except Exception as e:
-            self.log_test("Resume Templates API", False, f"Connection error: {str(e)}")
-            return False, None
-
-    def test_resume_template_download(self, templates):
-        """Test GET /api/resume-templates/{template_id}/download endpoint"""
-        if not templates:
-            self.log_test("Resume Template Download", False, "No templates available for testing")
-            return False
-            
-        try:
-            # Test with valid template IDs
-            test_templates = ["software_engineer", "data_scientist"]
-            success_count = 0
-            
-            for template_id in test_templates:
-                response = self.session.get(f"{API_BASE}/resume-templates/{template_id}/download", timeout=10)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    # Verify template content structure
-                    if "template_name" in data and "sections" in data:
-                        sections = data.get("sections", [])
-                        if sections and isinstance(sections, list):
-                            # Check section structure
-                            first_section = sections[0]
-                            if "name" in first_section and "content" in first_section:
-                                self.log_test(f"Resume Template Download ({template_id})", True, 
-                                            f"Downloaded template with {len(sections)} sections")
-                                success_count += 1
-                            else:
-                                self.log_test(f"Resume Template Download ({template_id})", False, 
-                                            "Invalid section structure")
-                        else:
-                            self.log_test(f"Resume Template Download ({template_id})", False, 
-                                        "Missing or invalid sections")
-                    else:
-                        self.log_test(f"Resume Template Download ({template_id})", False, 
-                                    "Missing template_name or sections")
-                else:
-                    self.log_test(f"Resume Template Download ({template_id})", False, 
-                                f"HTTP {response.status_code}")
-            
-            # Test with invalid template ID
-            response = self.session.get(f"{API_BASE}/resume-templates/invalid_template/download", timeout=10)
-            if response.status_code == 404:
-                self.log_test("Resume Template Download (Invalid ID)", True, "Correctly returned 404 for invalid template")
-                success_count += 1
-            else:
-                self.log_test("Resume Template Download (Invalid ID)", False, f"Expected 404, got {response.status_code}")
-            
-            return success_count >= 2
-                
-        except Exception as e:
-            self.log_test("Resume Template Download", False, f"Connection error: {str(e)}")
-            return False
 
-    def test_job_application_auth_required(self):
-        """Test POST /api/jobs/apply endpoint (authentication required)"""
+class Api:
+    """An HTTP client that times each request and counts its Mongo commands."""
+
+    def __init__(self, client, recorder):
+        self.client = client
+        self.recorder = recorder
+
+    async def request(self, method, url, **kwargs):
+        commands = []
+        token = _commands.set(commands)
+        started = time.perf_counter()
         try:
-            # Test without authentication (should fail)
-            application_data = {
-                "job_id": "test_job_123",
-                "applicant_name": "John Smith",
-                "email": "john.smith@email.com",
-                "phone": "555-0123",
-                "cover_letter": "I am interested in this position..."
-            }
-            
-            response = self.session.post(f"{API_BASE}/jobs/apply", json=application_data, timeout=10)
-            
-            if response.status_code == 403:
-                self.log_test("Job Application (No Auth)", True, "Correctly requires authentication")
-                return True
-            elif response.status_code == 401:
-                self.log_test("Job Application (No Auth)", True, "Correctly requires authentication (401)")
-                return True
-            else:
-                self.log_test("Job Application (No Auth)", False, f"Expected 401/403, got {response.status_code}")
-                return False
-                
-        except Exception as e:
-            self.log_test("Job Application (No Auth)", False, f"Connection error: {str(e)}")
-            return False
+            response = await self.client.request(method, url, **kwargs)
+        finally:
+            _commands.reset(token)
+        self.recorder.record(method, url, (time.perf_counter() - started) * 1000, commands)
+        return response
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url, **kwargs):
+        return await self.request("PUT", url, **kwargs)
+
+    async def login(self):
+        """A fresh user; returns their bearer-auth headers."""
+        response = await self.post("/api/auth/profile", headers={"X-Session-ID": f"test-{uuid.uuid4()}"})
+        check(response.status_code == 200, f"login: HTTP {response.status_code}")
+        return {"Authorization": f"Bearer {response.json()['session_token']}"}
+
+
+class CheckFailed(AssertionError):
+    pass
+
+
+class CaseSkipped(Exception):
+    pass
+
+
+def check(condition, message):
+    if not condition:
+        raise CheckFailed(message)
+
+
+def skip(reason):
+    raise CaseSkipped(reason)
+
+
+def json_of(response, expected_status=200):
+    check(response.status_code == expected_status,
+          f"{response.request.method} {response.request.url.path}: expected HTTP {expected_status}, "
+          f"got {response.status_code}: {response.text[:200]}")
+    return response.json()
+
+
+CASES = []
+
+
+def case(name):
+    def register(function):
+        CASES.append((name, function))
+        return function
+    return register
+
+
+# Test cases: each is independent and returns a short detail string
+
+EXPECTED_CAREER_PATHS = ["Web Developer", "Data Scientist", "Cybersecurity Analyst",
+                         "Software Engineer", "AI Engineer", "Cloud Engineer"]
+EXPECTED_TEMPLATES = ["software_engineer", "data_scientist", "web_developer", "cybersecurity"]
 
-    def test_my_applications_auth_required(self):
-        """Test GET /api/jobs/my-applications endpoint (authentication required)"""
+
+async def career_paths(api):
+    paths = json_of(await api.get("/api/career-paths"))["career_paths"]
+    return {path["title"]: path for path in paths}
+
+
+@case("Health Check")
+async def case_health_check(api):
+    data = json_of(await api.get("/api/health"))
+    check(data.get("status") == "healthy" and "service" in data, f"unexpected payload: {data}")
+    return f"Service: {data['service']}"
+
+
+@case("Career Paths List")
+async def case_career_paths_list(api):
+    paths = await career_paths(api)
+    missing = [title for title in EXPECTED_CAREER_PATHS if title not in paths]
+    check(not missing, f"missing career paths: {missing}")
+    required = ["id", "title", "description", "icon", "skills", "roadmap", "resources", "salary_range"]
+    missing_fields = [field for field in required if field not in paths["Web Developer"]]
+    check(not missing_fields, f"missing fields: {missing_fields}")
+    return f"Found all {len(EXPECTED_CAREER_PATHS)} career paths with complete data"
+
+
+@case("Career Path Detail")
+async def case_career_path_detail(api):
+    path = (await career_paths(api))["Data Scientist"]
+    data = json_of(await api.get(f"/api/career-paths/{path['id']}"))
+    check(data["id"] == path["id"] and data["title"] == path["title"], "detail does not match the listing")
+    roadmap = data.get("roadmap") or []
+    check(roadmap and all(key in roadmap[0] for key in ("step", "title", "duration")), "invalid roadmap")
+    json_of(await api.get(f"/api/career-paths/{uuid.uuid4()}"), 404)
+    return f"Retrieved {data['title']} with {len(roadmap)} roadmap steps; unknown id is a 404"
+
+
+@case("Career Paths Salary Filter")
+async def case_career_paths_salary(api):
+    paths = json_of(await api.get("/api/career-paths", params={"min_salary": 150000, "sort": "salary"}))["career_paths"]
+    check(paths and all(path["salary_max"] >= 150000 for path in paths), "min_salary not applied")
+    maxima = [path["salary_max"] for path in paths]
+    check(maxima == sorted(maxima, reverse=True), f"not sorted by salary: {maxima}")
+    growth = [path["growth_pct"] for path in
+              json_of(await api.get("/api/career-paths", params={"sort": "growth"}))["career_paths"]]
+    check(growth == sorted(growth, reverse=True), f"not sorted by growth: {growth}")
+    none = json_of(await api.get("/api/career-paths", params={"min_salary": 10 ** 9}))["career_paths"]
+    check(none == [], f"{len(none)} paths pay over $1B")
+    json_of(await api.get("/api/career-paths", params={"sort": "bogus"}), 400)
+    return f"{len(paths)} paths pay at least $150k; growth sort and empty filter work"
+
+
+@case("Career Transitions")
+async def case_career_transitions(api):
+    paths = await career_paths(api)
+    source, target = paths["Web Developer"]["id"], paths["Cloud Engineer"]["id"]
+    route = json_of(await api.get(f"/api/career-paths/{source}/transitions/{target}"))
+    check(route["steps"] and route["steps"][0]["from_id"] == source and route["steps"][-1]["to_id"] == target,
+          "route does not connect the two paths")
+    reachable = json_of(await api.get(f"/api/career-paths/{source}/transitions"))["transitions"]
+    check(len(reachable) == len(paths) - 1, f"expected {len(paths) - 1} reachable paths, got {len(reachable)}")
+    weeks = [target["total_weeks"] for target in reachable]
+    check(weeks == sorted(weeks), f"reachable paths are not cheapest first: {weeks}")
+    json_of(await api.get(f"/api/career-paths/{uuid.uuid4()}/transitions"), 404)
+    return f"Web Developer -> Cloud Engineer in {len(route['steps'])} steps, {route['total_weeks']} weeks"
+
+
+@case("Auth Login")
+async def case_auth_login(api):
+    data = json_of(await api.get("/api/auth/login"))
+    check("auth.emergentagent.com" in (data.get("auth_url") or ""), f"unexpected auth_url: {data}")
+    return "Returns valid Emergent auth URL"
+
+
+@case("Auth Profile")
+async def case_auth_profile(api):
+    json_of(await api.post("/api/auth/profile"), 400)
+    json_of(await api.post("/api/auth/profile", headers={"X-Session-ID": "invalid-session-id"}), 401)
+    headers = await api.login()
+    profile = json_of(await api.get("/api/user/profile", headers=headers))
+    check(profile.get("email", "").endswith("@example.com"), f"unexpected profile: {profile}")
+    return "Rejects missing/invalid sessions; valid session resolves the user"
+
+
+@case("Job Guidance")
+async def case_job_guidance(api):
+    data = json_of(await api.get("/api/job-guidance"))
+    missing = [s for s in ("internship_tips", "application_process", "resume_templates", "interview_prep") if s not in data]
+    check(not missing, f"missing sections: {missing}")
+    check(len(data["internship_tips"]) >= 5 and len(data["resume_templates"]) >= 3, "insufficient content")
+    check("name" in data["resume_templates"][0] and "description" in data["resume_templates"][0],
+          "invalid resume template structure")
+    return f"{len(data['internship_tips'])} tips and {len(data['resume_templates'])} templates"
+
+
+@case("Blog Posts")
+async def case_blog_posts(api):
+    posts = json_of(await api.get("/api/blog/posts"))["posts"]
+    check(len(posts) >= 3, f"expected at least 3 posts, got {len(posts)}")
+    missing = [f for f in ("id", "title", "excerpt", "author", "created_at", "tags") if f not in posts[0]]
+    check(not missing, f"missing fields: {missing}")
+    check(any("motivation" in post["tags"] for post in posts), "no motivation content")
+    return f"Found {len(posts)} posts"
+
+
+@case("Job Search")
+async def case_job_search(api):
+    data = json_of(await api.post("/api/jobs/search", json={
+        "query": "software engineer", "location": "San Francisco", "job_type": "full_time"}))
+    check(data["results"] and data["count"] == len(data["results"]), "no job results")
+    required = ["id", "title", "company", "location", "description", "salary", "job_type"]
+    missing = [f for f in required if f not in data["results"][0]]
+    check(not missing, f"missing fields in job results: {missing}")
+    check("collapsed" in data, "duplicate count not reported")
+    cached = json_of(await api.post("/api/jobs/search", json={
+        "query": "software engineer", "location": "San Francisco", "job_type": "full_time"}))
+    check(cached == data, "repeated search returned different results")
+    other = json_of(await api.post("/api/jobs/search", json={"query": "data scientist", "min_salary": 60000,
+                                                             "sort": "salary"}))
+    maxima = [job["salary_max"] for job in other["results"]]
+    check(all(value >= 60000 for value in maxima) and maxima == sorted(maxima, reverse=True),
+          "min_salary/sort not applied")
+    json_of(await api.post("/api/jobs/search", json={"query": "x", "sort": "bogus"}), 400)
+    return f"Found {data['count']} jobs ({data['collapsed']} duplicates collapsed)"
+
+
+@case("Autocomplete")
+async def case_autocomplete(api):
+    suggestions = json_of(await api.get("/api/autocomplete", params={"q": "data"}))["suggestions"]
+    check(suggestions, "no suggestions for 'data'")
+    return f"{len(suggestions)} suggestions for 'data'"
+
+
+@case("Resume Templates")
+async def case_resume_templates(api):
+    templates = json_of(await api.get("/api/resume-templates"))
+    ids = [template["id"] for template in templates]
+    check(ids == EXPECTED_TEMPLATES, f"unexpected template ids: {ids}")
+    missing = [f for f in ("id", "name", "description", "download_url", "category") if f not in templates[0]]
+    check(not missing, f"missing fields: {missing}")
+    return f"Found {len(templates)} templates"
+
+
+@case("Resume Template Download")
+async def case_resume_template_download(api):
+    for template_id in EXPECTED_TEMPLATES:
+        data = json_of(await api.get(f"/api/resume-templates/{template_id}/download"))
+        check(data.get("template_name") and data.get("sections"), f"{template_id}: missing template_name or sections")
+        check("name" in data["sections"][0] and "content" in data["sections"][0], f"{template_id}: invalid sections")
+    json_of(await api.get("/api/resume-templates/invalid_template/download"), 404)
+    pdf = await api.get("/api/resume-templates/software_engineer/download", params={"format": "pdf"})
+    check(pdf.status_code == 200 and pdf.content.startswith(b"%PDF"), "PDF rendering failed")
+    partial = await api.get("/api/resume-templates/software_engineer/download", params={"format": "pdf"},
+                            headers={"Range": "bytes=0-99"})
+    check(partial.status_code == 206 and partial.content == pdf.content[:100], "range request failed")
+    headers = await api.login()
+    email = json_of(await api.get("/api/user/profile", headers=headers))["email"]
+    filled = await api.get("/api/resume-templates/software_engineer/download", params={"format": "md", "fill": "true"},
+                           headers=headers)
+    check(filled.status_code == 200 and email in filled.text, "filled template does not carry the user's email")
+    import server
+    cached = os.listdir(server.RESUME_CACHE_DIR) if os.path.isdir(server.RESUME_CACHE_DIR) else []
+    check(not any(name.endswith(".md") for name in cached), "filled template was written to the artifact cache")
+    return f"Downloaded {len(EXPECTED_TEMPLATES)} templates; PDF with range support; filled copies not cached"
+
+
+@case("Job Application (No Auth)")
+async def case_job_application_auth_required(api):
+    response = await api.post("/api/jobs/apply", json={"job_id": "test_job_123", "applicant_name": "John Smith",
+                                                       "email": "john.smith@email.com"})
+    check(response.status_code in (401, 403), f"expected 401/403, got {response.status_code}")
+    return f"Requires authentication ({response.status_code})"
+
+
+@case("My Applications (No Auth)")
+async def case_my_applications_auth_required(api):
+    response = await api.get("/api/jobs/my-applications")
+    check(response.status_code in (401, 403), f"expected 401/403, got {response.status_code}")
+    return f"Requires authentication ({response.status_code})"
+
+
+@case("Apply and Export")
+async def case_apply_and_export(api):
+    headers = await api.login()
+    for n in range(3):
+        json_of(await api.post("/api/jobs/apply", headers=headers, json={
+            "job_id": f"test_job_{n}", "job_title": f"Engineer {n}", "company": "TechCorp",
+            "applicant_name": "Test User", "email": "test@example.com"}))
+    applications = json_of(await api.get("/api/jobs/my-applications", headers=headers))
+    check(len(applications) == 3, f"expected 3 applications, got {len(applications)}")
+    export = await api.get("/api/jobs/my-applications/export", headers=headers,
+                           params={"format": "csv", "compress": "false"})
+    check(export.status_code == 200 and len(export.text.strip().splitlines()) == 4, "CSV export is incomplete")
+    return "Applied 3 times; listed and exported all 3"
+
+
+@case("Bootstrap")
+async def case_bootstrap(api):
+    headers = await api.login()
+    data = json_of(await api.get("/api/bootstrap", headers=headers))
+    check(not data["errors"], f"section errors: {data['errors']}")
+    check(set(data["data"]) >= {"profile", "career_paths", "resume_templates", "my_applications", "blog_posts"},
+          f"missing sections: {sorted(data['data'])}")
+    anonymous = json_of(await api.get("/api/bootstrap", params={"sections": "career_paths,profile"}))
+    check("profile" in anonymous["errors"] and "career_paths" in anonymous["data"], "anonymous bootstrap is wrong")
+    return f"{len(data['data'])} sections in one round-trip"
+
+
+@case("Search Rate Limit")
+async def case_search_rate_limit(api):
+    burst = int(float(os.environ["SEARCH_RATE_LIMIT_BURST"]))
+
+    async def search_from(host, queries):
+        # Anonymous searches are limited per client address; each host gets its own bucket
+        transport = httpx.ASGITransport(app=api.recorder.app, client=(host, 40000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+            caller = Api(client, api.recorder)
+            return [await caller.post("/api/jobs/search", json={"query": query}) for query in queries]
+
+    queries = [f"limit {uuid.uuid4().hex[:8]}" for _ in range(burst + 1)]
+    responses = await search_from("198.51.100.7", queries)
+    statuses = [response.status_code for response in responses]
+    check(statuses == [200] * burst + [429], f"unexpected statuses: {statuses}")
+    check(int(responses[-1].headers.get("Retry-After", "0")) >= 1, "429 without Retry-After")
+    import server
+    popular = {key for key, _ in server.search_log.top(1000)}
+    check(not any(queries[-1] in key for key in popular), "the rejected search counted towards popularity")
+    other = await search_from("198.51.100.8", [f"limit {uuid.uuid4().hex[:8]}"])
+    check(other[0].status_code == 200, f"another client got HTTP {other[0].status_code}")
+    return f"Search {burst + 1} from one client was a 429; another client was unaffected"
+
+
+@case("Geo Radius Validation")
+async def case_geo_radius_validation(api):
+    for radius_km in (0, -5):
+        json_of(await api.post("/api/jobs/search", json={"query": "engineer", "location": "Austin, TX",
+                                                         "radius_km": radius_km}), 422)
+    json_of(await api.post("/api/jobs/search", json={"query": "engineer", "location": "Atlantis",
+                                                     "radius_km": 10}), 400)
+    for invalid in ({"bbox": [1, 2, 3]}, {"bbox": [10, 0, -10, 5]}, {"latitude": 91, "longitude": 0, "radius_km": 5},
+                    {"bbox": [-125, 45, -120, 50], "radius_km": 5}):
+        json_of(await api.post("/api/jobs/search", json={"query": "engineer", **invalid}), 422)
+    return "Non-positive radius, bad coordinates and bbox are 422s; an unknown location is a 400"
+
+
+@case("Geo Radius Search")
+async def case_geo_radius_search(api):
+    import server
+    if server.MONGO_URL.startswith("mongomock://"):
+        skip("mongomock has no $geoNear or $geoWithin; run with --mongo-url")
+    marker = f"geo{uuid.uuid4().hex[:8]}"
+    await asyncio.to_thread(server.store_jobs, [
+        {"id": f"{marker}_{n}", "title": f"{marker} Engineer", "company": company, "location": city,
+         "description": f"{city} office", "salary_min": 90000, "salary_max": 120000}
+        for n, (city, company) in enumerate([("Austin, TX", "CloudWorks"), ("Seattle, WA", "SecureNet")])
+    ])
+    near = json_of(await api.post("/api/jobs/search", json={"query": marker, "location": "Austin, TX",
+                                                            "radius_km": 50}))
+    check([job["location"] for job in near["results"]] == ["Austin, TX"], f"radius search: {near['results']}")
+    check(near["results"][0]["distance_km"] < 1, "distance not reported")
+    box = json_of(await api.post("/api/jobs/search", json={"query": marker, "bbox": [-125, 45, -120, 50]}))
+    check([job["location"] for job in box["results"]] == ["Seattle, WA"], f"bbox search: {box['results']}")
+    return "Radius and bounding-box searches return only the jobs inside them"
+
+
+@case("Recommendations")
+async def case_recommendations(api):
+    headers = await api.login()
+    path = (await career_paths(api))["Data Scientist"]
+    json_of(await api.put("/api/user/career-path", headers=headers, json={"career_path_id": str(uuid.uuid4())}), 404)
+    json_of(await api.put("/api/user/career-path", headers=headers, json={"career_path_id": path["id"]}))
+    # Feeds are rebuilt in the background after the profile changes
+    for _ in range(100):
+        feed = json_of(await api.get("/api/recommendations", headers=headers, params={"limit": 5}))
+        if feed["status"] == "ready":
+            break
+        await asyncio.sleep(0.05)
+    check(feed["status"] == "ready" and feed["career_path_id"] == path["id"], f"feed not rebuilt: {feed}")
+    items = feed["recommendations"]
+    check(len(items) <= 5 and all("id" in item and "score" in item for item in items), f"invalid items: {items}")
+    return f"Feed ready with {len(items)} recommendations"
+
+
+@case("Archived Applications")
+async def case_archived_applications(api):
+    import archive
+    import server
+    headers = await api.login()
+    user_id = json_of(await api.get("/api/user/profile", headers=headers))["id"]
+    for n in range(2):
+        json_of(await api.post("/api/jobs/apply", headers=headers, json={
+            "job_id": f"archived_job_{n}", "job_title": f"Engineer {n}", "company": "TechCorp",
+            "applicant_name": "Test User", "email": "test@example.com"}))
+    # Backdate one application and move it the way maintenance does when archiving is enabled
+    await asyncio.to_thread(server.job_applications_collection.update_one,
+                            {"user_id": user_id, "job_id": "archived_job_0"},
+                            {"$set": {"applied_at": datetime(2024, 1, 15)}})
+    archiver = archive.MonthlyArchiver(server.job_applications_collection, "applied_at", timedelta(days=365))
+    await asyncio.to_thread(archiver.archive)
+    hot = json_of(await api.get("/api/jobs/my-applications", headers=headers))
+    check([a["job_id"] for a in hot] == ["archived_job_1"], f"hot applications: {hot}")
+    every = json_of(await api.get("/api/jobs/my-applications", headers=headers, params={"include_archived": "true"}))
+    archived = [a["job_id"] for a in every if a.get("archived")]
+    check([a["job_id"] for a in every] == ["archived_job_1", "archived_job_0"] and archived == ["archived_job_0"],
+          f"with archived, newest first: {every}")
+    export = await api.get("/api/jobs/my-applications/export", headers=headers,
+                           params={"format": "csv", "compress": "false", "include_archived": "true"})
+    lines = export.text.strip().splitlines()
+    check(export.status_code == 200 and len(lines) == 3 and "archived_job_0" in lines[1],
+          f"export misses the archive: {lines}")
+    return "Archived application is hidden by default, listed and exported on request"
+
+
+@case("Prometheus Metrics")
+async def case_metrics(api):
+    json_of(await api.get("/api/health"))
+    response = await api.get("/metrics")
+    check(response.status_code == 200 and response.headers["content-type"].startswith("text/plain"),
+          f"GET /metrics: HTTP {response.status_code}")
+    expected = ['http_request_duration_seconds_bucket{method="GET",route="/api/health"',
+                "mongo_command_duration_seconds_count", "app_cold_start_seconds"]
+    missing = [name for name in expected if name not in response.text]
+    check(not missing, f"missing series: {missing}")
+    return f"{len(response.text.splitlines())} lines of Prometheus text"
+
+
+@case("Tracing")
+async def case_tracing(api):
+    trace_id, parent_id = uuid.uuid4().hex, uuid.uuid4().hex[:16]
+    response = await api.get("/api/career-paths", headers={"traceparent": f"00-{trace_id}-{parent_id}-01"})
+    check(response.status_code == 200 and response.headers.get("x-trace-id") == trace_id,
+          f"trace id not propagated: {response.headers.get('x-trace-id')}")
+    # Sampled traces are exported from a background thread
+    trace = None
+    for _ in range(100):
+        if os.path.exists(os.environ["TRACE_FILE"]):
+            with open(os.environ["TRACE_FILE"], encoding="utf-8") as f:
+                trace = next((json.loads(line) for line in f if trace_id in line), None)
+        if trace is not None:
+            break
+        await asyncio.sleep(0.05)
+    check(trace is not None, "sampled trace was not exported")
+    root = next((span for span in trace["spans"] if span.get("parent_id") == parent_id), None)
+    check(root is not None, f"no span is a child of the caller's span: {trace['spans']}")
+    return f"Trace {trace_id[:8]}… exported with {len(trace['spans'])} spans"
+
+
+@case("Profiling")
+async def case_profiling(api):
+    admin = {"X-Admin-Token": os.environ["ADMIN_TOKEN"]}
+    plain = await api.get("/api/blog/posts")
+    check("x-profile-id" not in plain.headers, "request profiled without the token")
+    response = await api.get("/api/blog/posts", headers={"X-Profile": os.environ["PROFILE_TOKEN"]})
+    profile_id = response.headers.get("x-profile-id")
+    check(response.status_code == 200 and profile_id, "token did not trigger a profile")
+    profiles = json_of(await api.get("/api/admin/profiles", headers=admin))["profiles"]
+    profile = next((p for p in profiles if p["id"] == profile_id), None)
+    check(profile is not None and profile["route"] == "/api/blog/posts", f"profile not listed: {profiles}")
+    json_of(await api.get("/api/admin/profiles"), 403)
+    return f"Profile {profile_id} captured in {profile['wall_ms']}ms"
+
+
+@case("Query Watch")
+async def case_query_watch(api):
+    path = (await career_paths(api))["Cloud Engineer"]
+    response = await api.get(f"/api/career-paths/{path['id']}")
+    check("x-db-queries" in response.headers and "x-db-time" in response.headers, "debug headers missing")
+    report = json_of(await api.get("/api/admin/db/queries", headers={"X-Admin-Token": os.environ["ADMIN_TOKEN"]}))
+    check({"collscans", "slow_queries", "shapes_seen"} <= set(report), f"unexpected report: {sorted(report)}")
+    json_of(await api.get("/api/admin/db/queries"), 403)
+    return (f"{response.headers['x-db-queries']} commands in {response.headers['x-db-time']}ms; "
+            f"{report['shapes_seen']} query shapes seen")
+
+
+async def run_case(api, name, function, semaphore):
+    async with semaphore:
+        started = time.perf_counter()
         try:
-            # Test without authentication (should fail)
-            response = self.session.get(f"{API_BASE}/jobs/my-applications", timeout=10)
-            
-            if response.status_code == 403:
-                self.log_test("My Applications (No Auth)", True, "Correctly requires authentication")
-                return True
-            elif response.status_code == 401:
-                self.log_test("My Applications (No Auth)", True, "Correctly requires authentication (401)")
-                return True
-            else:
-                self.log_test("My Applications (No Auth)", False, f"Expected 401/403, got {response.status_code}")
-                return False
-                
+            details, success = await function(api), True
+        except CaseSkipped as e:
+            return {"test": name, "success": True, "skipped": True, "details": str(e), "elapsed_ms": 0.0}
+        except CheckFailed as e:
+            details, success = str(e), False
         except Exception as e:
-            self.log_test("My Applications (No Auth)", False, f"Connection error: {str(e)}")
-            return False
-    
-    def run_all_tests(self):
-        """Run all backend tests"""
-        print("=" * 60)
-        print("TechPathfinder Backend API Testing Suite")
-        print("=" * 60)
-        print(f"Testing backend at: {API_BASE}")
-        print()
-        
-        # Test 1: Health Check (High Priority)
-        health_ok = self.test_health_check()
-        
-        # Test 2: Career Paths API (High Priority - Core Value)
-        career_paths_ok, career_paths = self.test_career_paths_list()
-        career_detail_ok = self.test_career_path_detail(career_paths)
-        
-        # Test 3: Authentication (High Priority)
-        auth_login_ok = self.test_auth_login()
-        auth_profile_ok = self.test_auth_profile()
-        
-        # Test 4: Job Guidance (Medium Priority)
-        job_guidance_ok = self.test_job_guidance()
-        
-        # Test 5: Blog Posts (Medium Priority)
-        blog_posts_ok = self.test_blog_posts()
-        
-        # Test 6: NEW JOB-RELATED APIs (High Priority)
-        print("=" * 40)
-        print("TESTING NEW JOB-RELATED APIS")
-        print("=" * 40)
-        
-        job_search_ok = self.test_job_search()
-        resume_templates_ok, templates = self.test_resume_templates()
-        resume_download_ok = self.test_resume_template_download(templates)
-        job_apply_auth_ok = self.test_job_application_auth_required()
-        my_apps_auth_ok = self.test_my_applications_auth_required()
-        
-        # Summary
-        print("=" * 60)
-        print("TEST SUMMARY")
-        print("=" * 60)
-        
-        total_tests = len(self.test_results)
-        passed_tests = len([r for r in self.test_results if r["success"]])
-        
-        print(f"Total Tests: {total_tests}")
-        print(f"Passed: {passed_tests}")
-        print(f"Failed: {total_tests - passed_tests}")
-        print()
-        
-        # Critical functionality assessment
-        core_apis_working = health_ok and career_paths_ok and career_detail_ok
-        auth_working = auth_login_ok and auth_profile_ok
-        content_working = job_guidance_ok and blog_posts_ok
-        job_apis_working = job_search_ok and resume_templates_ok and resume_download_ok and job_apply_auth_ok and my_apps_auth_ok
-        
-        print("CORE FUNCTIONALITY STATUS:")
-        print(f"✅ Health & Career Paths (Core Value): {'WORKING' if core_apis_working else 'FAILED'}")
-        print(f"✅ Authentication System: {'WORKING' if auth_working else 'FAILED'}")
-        print(f"✅ Content APIs (Job/Blog): {'WORKING' if content_working else 'FAILED'}")
-        print(f"✅ NEW Job-Related APIs: {'WORKING' if job_apis_working else 'FAILED'}")
-        print()
-        
-        if core_apis_working and job_apis_working:
-            print("🎉 ALL BACKEND FUNCTIONALITY IS WORKING!")
-            print("Both core features and new job-related APIs are functional.")
-        elif core_apis_working:
-            print("✅ CORE BACKEND FUNCTIONALITY IS WORKING!")
-            print("⚠️  Some issues found in new job-related APIs.")
-        else:
-            print("⚠️  CRITICAL ISSUES FOUND IN CORE FUNCTIONALITY")
-            print("Career exploration features need attention.")
-        
-        return {
-            "total_tests": total_tests,
-            "passed": passed_tests,
-            "core_working": core_apis_working,
-            "auth_working": auth_working,
-            "content_working": content_working,
-            "job_apis_working": job_apis_working,
-            "detailed_results": self.test_results
-        }
+            details, success = f"{type(e).__name__}: {e}\n{traceback.format_exc()}", False
+        return {"test": name, "success": success, "details": details,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+
+async def run_tests(args, stub):
+    os.environ.update(stub.env())
+    os.environ["MONGO_URL"] = args.mongo_url
+    # Exercise the app, not load shedding: concurrent cases would trip the rate limits.
+    # Searches stay limited per client; the rate limit case searches from its own addresses.
+    for name in ("RATE_LIMIT_RPS", "ADZUNA_MAX_RPS", "ADZUNA_DAILY_QUOTA"):
+        os.environ.setdefault(name, "0")
+    os.environ.setdefault("SEARCH_RATE_LIMIT_PER_MIN", "1")
+    os.environ.setdefault("SEARCH_RATE_LIMIT_BURST", "5")
+    os.environ.setdefault("DB_NAME", "techpathfinder_test")
+    os.environ.setdefault("LOOP_STRICT", "1")
+    # The listener must be registered before the app creates its MongoClient
+    monitoring.register(CommandCounter())
+    import server
+    if not args.mongo_url.startswith("mongomock://") and args.fresh_db:
+        server.client.drop_database(server.DB_NAME)
+
+    async with server.app.router.lifespan_context(server.app):
+        # Career paths are seeded in the background on startup; wait for them
+        for _ in range(100):
+            if await asyncio.to_thread(server.career_paths_collection.count_documents, {}) >= 6:
+                break
+            await asyncio.sleep(0.05)
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+            recorder = Recorder(server.app, args.latency_scale)
+            api = Api(client, recorder)
+            selected = [(name, fn) for name, fn in CASES
+                        if not args.only or any(term.lower() in name.lower() for term in args.only)]
+            semaphore = asyncio.Semaphore(max(1, args.concurrency))
+            started = time.perf_counter()
+            results = await asyncio.gather(*(run_case(api, name, fn, semaphore) for name, fn in selected))
+            elapsed = time.perf_counter() - started
+    return results, recorder, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=8, help="test cases run at once")
+    parser.add_argument("--mongo-url", default=os.environ.get("TEST_MONGO_URL", "mongomock://"))
+    parser.add_argument("--fresh-db", action="store_true", help="drop the test database first (real mongod only)")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiply every latency budget")
+    parser.add_argument("--only", nargs="+", help="run only cases whose name contains one of these")
+    parser.add_argument("--json", help="write the full report here")
+    args = parser.parse_args(argv)
+
+    # Resume artifacts, traces and profiles go to a scratch directory, never into the repo
+    scratch = tempfile.mkdtemp(prefix="techpathfinder-test-")
+    os.environ.setdefault("RESUME_CACHE_DIR", os.path.join(scratch, "resume-cache"))
+    os.environ.setdefault("TRACE_EXPORTER", "jsonl")
+    os.environ.setdefault("TRACE_FILE", os.path.join(scratch, "traces.jsonl"))
+    # Root spans for every request; only callers that ask for sampling are exported
+    os.environ.setdefault("TRACE_SLOW_MS", "60000")
+    os.environ.setdefault("PROFILE_DIR", os.path.join(scratch, "profiles"))
+    os.environ.setdefault("PROFILE_TOKEN", "test-profile-token")
+    os.environ.setdefault("ADMIN_TOKEN", "test-admin-token")
+    os.environ.setdefault("DEBUG", "1")
+
+    try:
+        with UpstreamStub() as stub:
+            results, recorder, elapsed = asyncio.run(run_tests(args, stub))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    print("=" * 60)
+    print("TechPathfinder Backend API Test Suite")
+    print("=" * 60)
+    print(f"Target: in-process app ({args.mongo_url}), {len(results)} cases, concurrency {args.concurrency}")
+    print()
+    for result in results:
+        status = "⏭️  SKIP" if result.get("skipped") else "✅ PASS" if result["success"] else "❌ FAIL"
+        print(f"{status} {result['test']} ({result['elapsed_ms']}ms)")
+        print(f"   Details: {result['details']}")
+
+    violations = recorder.violations()
+    routes = recorder.report()
+    print()
+    print("ROUTE BUDGETS")
+    print(f"{'route':<58} {'reqs':>5} {'max ms':>9} {'budget':>7} {'queries':>8} {'budget':>7}")
+    for route, stats in routes.items():
+        print(f"{route:<58} {stats['requests']:>5} {stats['max_ms']:>9.1f} "
+              f"{'-' if stats['budget_ms'] is None else round(stats['budget_ms']):>7} "
+              f"{stats['max_queries']:>8} {'-' if stats['budget_queries'] is None else stats['budget_queries']:>7}")
+    for violation in violations:
+        print(f"❌ BUDGET {violation}")
+
+    passed = sum(result["success"] for result in results)
+    skipped = sum(bool(result.get("skipped")) for result in results)
+    print()
+    print("=" * 60)
+    print(f"Passed: {passed}/{len(results)} ({skipped} skipped) in {elapsed:.2f}s; "
+          f"budget violations: {len(violations)}")
+    print("=" * 60)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"cases": results, "routes": routes, "budget_violations": violations,
+                       "elapsed_s": round(elapsed, 3)}, f, indent=2)
+            f.write("\n")
+    return 0 if passed == len(results) and not violations else 1
+
 
 if __name__ == "__main__":
-    tester = BackendTester()
-    results = tester.run_all_tests()
-    
-    # Exit with appropriate code
-    if results["core_working"]:
-        sys.exit(0)  # Success
-    else:
-        sys.exit(1)  # Failure
\ No newline at end of file
+    sys.exit(main())
@@ -1,6 +1,36 @@
 import React, { useState, useEffect, createContext, useContext } from 'react';
 import './App.css';
 
+// Initial page data is loaded in a single round-trip via /api/bootstrap.
+// Each section is handed out once; later refreshes (and failed sections) use their own endpoint.
+const BOOTSTRAP_SECTIONS = ['profile', 'career_paths', 'resume_templates', 'my_applications', 'blog_posts'];
+let bootstrapPromise = null;
+
+const loadBootstrap = () => {
+  if (!bootstrapPromise) {
+    const token = localStorage.getItem('session_token');
+    bootstrapPromise = fetch(`${process.env.REACT_APP_BACKEND_URL}/api/bootstrap?sections=${BOOTSTRAP_SECTIONS.join(',')}`, {
+      headers: token ? { 'Authorization': `Bearer ${token}` } : {}
+    })
+      .then((response) => (response.ok ? response.json() : { data: {}, errors: {} }))
+      .catch((error) => {
+        console.error('Error fetching bootstrap data:', error);
+        return { data: {}, errors: {} };
+      });
+  }
+  return bootstrapPromise;
+};
+
+const takeBootstrapSection = async (name) => {
+  const bootstrap = await loadBootstrap();
+  if (!(name in bootstrap.data)) {
+    return { data: undefined, error: bootstrap.errors[name] };
+  }
+  const data = bootstrap.data[name];
+  delete bootstrap.data[name];
+  return { data, error: undefined };
+};
+
 // Context for authentication
 const AuthContext = createContext();
 
@@ -27,6 +57,15 @@ const AuthProvider = ({ children }) => {
 
   const fetchUserProfile = async (token) => {
     try {
+      const bootstrapped = await takeBootstrapSection('profile');
+      if (bootstrapped.data !== undefined) {
+        setUser(bootstrapped.data);
+        return;
+      }
+      if (bootstrapped.error && bootstrapped.error.status === 401) {
+        localStorage.removeItem('session_token');
+        return;
+      }
       const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/user/profile`, {
         headers: {
           'Authorization': `Bearer ${token}`
@@ -190,6 +229,11 @@ const CareerPathsSection = () => {
 
   const fetchCareerPaths = async () => {
     try {
+      const bootstrapped = await takeBootstrapSection('career_paths');
+      if (bootstrapped.data !== undefined) {
+        setCareerPaths(bootstrapped.data.career_paths);
+        return;
+      }
       const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/career-paths`);
       const data = await response.json();
       setCareerPaths(data.career_paths);
@@ -362,8 +406,38 @@ const JobGuidanceSection = () => {
   const [showApplicationModal, setShowApplicationModal] = useState(false);
   const [selectedJob, setSelectedJob] = useState(null);
   const [myApplications, setMyApplications] = useState([]);
+  const [suggestions, setSuggestions] = useState([]);
   const { user } = useAuth();
 
+  useEffect(() => {
+    const prefix = searchQuery.trim();
+    if (!prefix) {
+      setSuggestions([]);
+      return;
+    }
+    // Debounced typeahead so typing doesn't send a request per keystroke; a newer
+    // keystroke aborts the request in flight so stale suggestions never land
+    const controller = new AbortController();
+    const timer = setTimeout(async () => {
+      try {
+        const response = await fetch(
+          `${process.env.REACT_APP_BACKEND_URL}/api/autocomplete?q=${encodeURIComponent(prefix)}&limit=8`,
+          { signal: controller.signal }
+        );
+        const data = await response.json();
+        setSuggestions(data.suggestions || []);
+      } catch (error) {
+        if (error.name !== 'AbortError') {
+          setSuggestions([]);
+        }
+      }
+    }, 150);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [searchQuery]);
+
   useEffect(() => {
     fetchResumeTemplates();
     if (user) {
@@ -373,6 +447,11 @@ const JobGuidanceSection = () => {
 
   const fetchResumeTemplates = async () => {
     try {
+      const bootstrapped = await takeBootstrapSection('resume_templates');
+      if (bootstrapped.data !== undefined) {
+        setTemplates(bootstrapped.data);
+        return;
+      }
       const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/resume-templates`);
       const data = await response.json();
       setTemplates(data);
@@ -384,6 +463,11 @@ const JobGuidanceSection = () => {
   const fetchMyApplications = async () => {
     if (!user) return;
     try {
+      const bootstrapped = await takeBootstrapSection('my_applications');
+      if (bootstrapped.data !== undefined) {
+        setMyApplications(bootstrapped.data);
+        return;
+      }
       const token = localStorage.getItem('session_token');
       const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/jobs/my-applications`, {
         headers: {
@@ -421,6 +505,29 @@ const JobGuidanceSection = () => {
     }
   };
 
+  const exportApplications = async () => {
+    try {
+      const token = localStorage.getItem('session_token');
+      const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/jobs/my-applications/export?format=csv&compress=false`, {
+        headers: {
+          'Authorization': `Bearer ${token}`
+        }
+      });
+      if (!response.ok) {
+        throw new Error(`Export failed with status ${response.status}`);
+      }
+      const blob = await response.blob();
+      const url = URL.createObjectURL(blob);
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = 'applications.csv';
+      link.click();
+      URL.revokeObjectURL(url);
+    } catch (error) {
+      console.error('Error exporting applications:', error);
+    }
+  };
+
   const openApplicationModal = (job) => {
     if (!user) {
       alert('Please sign in to apply for jobs');
@@ -456,27 +563,29 @@ const JobGuidanceSection = () => {
     }
   };
 
-  const downloadTemplate = async (templateId) => {
+  const downloadTemplate = async (templateId, format) => {
     try {
-      const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/resume-templates/${templateId}/download`);
-      const data = await response.json();
-      
-      // Create a downloadable text file with the template structure
-      const content = `${data.template_name}\n\n${data.sections.map(section => 
-        `${section.name}:\n${section.content}\n\n`
-      ).join('')}`;
-      
-      const blob = new Blob([content], { type: 'text/plain' });
+      // Signed-in users get the template filled with their name and email
+      const token = localStorage.getItem('session_token');
+      const response = await fetch(
+        `${process.env.REACT_APP_BACKEND_URL}/api/resume-templates/${templateId}/download?format=${format}&fill=${Boolean(token && user)}`,
+        { headers: token && user ? { 'Authorization': `Bearer ${token}` } : {} }
+      );
+      if (!response.ok) {
+        throw new Error(`Download failed with status ${response.status}`);
+      }
+      const blob = await response.blob();
       const url = URL.createObjectURL(blob);
       const a = document.createElement('a');
       a.href = url;
-      a.download = `${data.template_name.replace(/\s+/g, '_')}.txt`;
+      a.download = `${templateId}_resume.${format}`;
       document.body.appendChild(a);
       a.click();
       document.body.removeChild(a);
       URL.revokeObjectURL(url);
     } catch (error) {
       console.error('Error downloading template:', error);
+      alert('Error downloading template. Please try again.');
     }
   };
 
@@ -524,8 +633,14 @@ const JobGuidanceSection = () => {
                     placeholder="Job title or keyword"
                     value={searchQuery}
                     onChange={(e) => setSearchQuery(e.target.value)}
+                    list="job-search-suggestions"
                     className="w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-transparent"
                   />
+                  <datalist id="job-search-suggestions">
+                    {suggestions.map((suggestion) => (
+                      <option key={suggestion.text} value={suggestion.text} />
+                    ))}
+                  </datalist>
                 </div>
                 <div>
                   <input
@@ -626,10 +741,22 @@ const JobGuidanceSection = () => {
                   </span>
                   <div className="flex gap-3">
                     <button
-                      onClick={() => downloadTemplate(template.id)}
+                      onClick={() => downloadTemplate(template.id, 'pdf')}
                       className="bg-blue-600 text-white px-4 py-2 rounded-lg hover:bg-blue-700 transition-colors"
                     >
-                      Download Template
+                      Download PDF
+                    </button>
+                    <button
+                      onClick={() => downloadTemplate(template.id, 'docx')}
+                      className="text-blue-600 border border-blue-600 px-4 py-2 rounded-lg hover:bg-blue-50 transition-colors"
+                    >
+                      Word
+                    </button>
+                    <button
+                      onClick={() => downloadTemplate(template.id, 'md')}
+                      className="text-blue-600 border border-blue-600 px-4 py-2 rounded-lg hover:bg-blue-50 transition-colors"
+                    >
+                      Markdown
                     </button>
                   </div>
                 </div>
@@ -653,6 +780,16 @@ const JobGuidanceSection = () => {
               </div>
             ) : (
               <div className="space-y-6">
+                {myApplications.length > 0 && (
+                  <div className="flex justify-end">
+                    <button
+                      onClick={exportApplications}
+                      className="text-blue-600 border border-blue-600 px-4 py-2 rounded-lg hover:bg-blue-50 transition-colors"
+                    >
+                      Export CSV
+                    </button>
+                  </div>
+                )}
                 {myApplications.map((application) => (
                   <div key={application.id} className="bg-white rounded-xl shadow-lg p-6">
                     <div className="flex justify-between items-start">
@@ -821,6 +958,11 @@ const BlogSection = () => {
 
   const fetchBlogPosts = async () => {
     try {
+      const bootstrapped = await takeBootstrapSection('blog_posts');
+      if (bootstrapped.data !== undefined) {
+        setPosts(bootstrapped.data.posts);
+        return;
+      }
       const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/blog/posts`);
       const data = await response.json();
       setPosts(data.posts);
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+# Backend modules import each other as top-level modules, as they do when server.py runs
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+
+@pytest.fixture(scope="session")
+def api():
+    # The app against the in-memory Mongo and mock job data, without startup: for validation and mock-data paths
+    with pytest.MonkeyPatch.context() as env:
+        env.setenv("MONGO_URL", "mongomock://")
+        env.setenv("ADZUNA_APP_ID", "")
+        import server
+    from fastapi.testclient import TestClient
+    return TestClient(server.app)
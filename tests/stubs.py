@@ -0,0 +1,125 @@
+"""Local stand-ins for the external services the backend calls.
+
+``UpstreamStub`` serves two endpoints from a background HTTP server thread:
+
+* ``/adzuna/search`` returns Adzuna-shaped job results derived deterministically
+  from the ``what``/``where`` parameters, including the occasional repost of the
+  same listing in another city.
+* ``/auth/session-data`` returns Emergent-auth-shaped user data for any
+  ``X-Session-ID`` except ones starting with "invalid", which get a 401. The email
+  is derived from the session id, so repeated logins with the same id resolve to
+  the same user.
+
+Use ``env()`` to get the variables that point the backend at the stub.
+"""
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+COMPANIES = ["Tech StartUp Inc.", "Analytics Corp", "Digital Solutions", "CloudWorks", "SecureNet", "DataForge"]
+LOCATIONS = ["San Francisco, CA", "New York, NY", "Austin, TX", "Seattle, WA", "Remote", "Boston, MA"]
+
+
+def adzuna_results(what, where=None, count=20):
+    """Deterministic listings; every tenth one reposts the previous listing in another city, like Adzuna does."""
+    seed = int(hashlib.sha1(f"{what}|{where}".encode()).hexdigest(), 16)
+    results = []
+    for i in range(count):
+        n = (seed >> (i % 32)) + i
+        salary_min = 40000 + (n % 60) * 1000
+        if i % 10 == 9:
+            repost = dict(results[-1], id=f"stub_{seed % 100000}_{i}",
+                          location={"display_name": where or LOCATIONS[(n + 1) % len(LOCATIONS)]})
+            results.append(repost)
+            continue
+        results.append({
+            "id": f"stub_{seed % 100000}_{i}",
+            "title": f"{what.title()} {['Intern', 'Engineer', 'Developer', 'Analyst'][n % 4]}",
+            "company": {"display_name": COMPANIES[n % len(COMPANIES)]},
+            "location": {"display_name": where or LOCATIONS[n % len(LOCATIONS)]},
+            "description": f"Work on {what} problems with a friendly team. " * 10,
+            "salary_min": salary_min,
+            "salary_max": salary_min + 30000,
+            "created": "2025-01-10T00:00:00Z",
+            "redirect_url": f"https://example.com/jobs/{i}",
+        })
+    return results
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        stub = self.server.stub
+        if stub.latency:
+            time.sleep(stub.latency)
+        url = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        with stub.lock:
+            stub.calls[url.path] = stub.calls.get(url.path, 0) + 1
+        if url.path == "/adzuna/search":
+            self._send_json({"results": adzuna_results(params.get("what", ""), params.get("where"))})
+        elif url.path == "/auth/session-data":
+            session_id = self.headers.get("X-Session-ID")
+            if not session_id or session_id.startswith("invalid"):
+                self._send_json({"detail": "invalid session"}, 401)
+                return
+            self._send_json({
+                "id": session_id,
+                "email": f"user-{session_id}@example.com",
+                "name": f"Stub User {session_id[:8]}",
+                "picture": None,
+                "session_token": session_id,
+            })
+        else:
+            self._send_json({"detail": "not found"}, 404)
+
+
+class UpstreamStub:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        self.latency = latency
+        self.calls = {}
+        self.lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="upstream-stub", daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self):
+        return {
+            "ADZUNA_APP_ID": "stub",
+            "ADZUNA_API_KEY": "stub",
+            "ADZUNA_API_URL": f"{self.base_url}/adzuna/search",
+            "EMERGENT_AUTH_URL": f"{self.base_url}/auth/session-data",
+        }
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+
+import archive
+
+NOW = datetime(2025, 6, 15)
+
+
+@pytest.fixture
+def applications():
+    collection = mongomock.MongoClient().db.job_applications
+    collection.insert_many([{"n": month, "user_id": "u1", "applied_at": datetime(2024, month, 10)}
+                            for month in range(1, 13)] + [{"n": 99, "user_id": "u1", "applied_at": NOW}])
+    return collection
+
+
+@pytest.fixture
+def archiver(applications):
+    archiver = archive.MonthlyArchiver(applications, "applied_at", timedelta(days=90), batch_size=5)
+    assert archiver.archive(NOW, pause=0) == 12
+    return archiver
+
+
+def test_archive_moves_old_documents_by_month(applications, archiver):
+    assert [doc["n"] for doc in applications.find()] == [99]
+    assert len(archiver.archive_names()) == 12
+    assert archiver.archive_names()[0] == "job_applications_archive_2024_12"
+
+
+def test_zero_age_disables_archiving():
+    collection = mongomock.MongoClient().db.job_applications
+    collection.insert_one({"applied_at": datetime(2000, 1, 1)})
+    assert archive.MonthlyArchiver(collection, "applied_at", timedelta(0)).archive(NOW) == 0
+    assert collection.count_documents({}) == 1
+
+
+def test_find_archived_queries_only_months_in_range(archiver, monkeypatch):
+    queried = []
+    database = archiver.collection.database
+    get_collection = type(database).__getitem__
+
+    def recording_getitem(self, name):
+        queried.append(name)
+        return get_collection(self, name)
+
+    monkeypatch.setattr(type(database), "__getitem__", recording_getitem)
+    docs = list(archiver.find_archived({"user_id": "u1", "applied_at": {"$gte": datetime(2024, 3, 1),
+                                                                        "$lt": datetime(2024, 5, 1)}},
+                                       oldest_first=True))
+    assert [doc["n"] for doc in docs] == [3, 4]
+    assert all(doc["archived"] for doc in docs)
+    assert queried == ["job_applications_archive_2024_03", "job_applications_archive_2024_04",
+                       "job_applications_archive_2024_05"]
+
+
+def test_find_archived_without_range_reads_every_month(archiver):
+    assert [doc["n"] for doc in archiver.find_archived({"user_id": "u1"})] == list(range(12, 0, -1))
+
+
+def test_collection_list_is_cached(archiver, monkeypatch):
+    calls = []
+    database = archiver.collection.database
+    list_names = database.list_collection_names
+    monkeypatch.setattr(database, "list_collection_names", lambda: calls.append(1) or list_names())
+    archiver.archive_names()
+    list(archiver.find_archived({"user_id": "u1"}))
+    list(archiver.find_archived({"user_id": "u1"}))
+    assert calls == []
+    archiver._listed_at -= archiver.refresh_interval + 1
+    archiver.archive_names()
+    assert calls == [1]
+
+
+def test_find_archived_orders_documents_within_a_month_too(applications, archiver):
+    archiver._archive("2024_06").insert_many([{"n": 6.5, "user_id": "u1", "applied_at": datetime(2024, 6, 20)},
+                                              {"n": 5.5, "user_id": "u1", "applied_at": datetime(2024, 6, 1)}])
+    newest_first = [doc["n"] for doc in archiver.find_archived({"user_id": "u1"})]
+    assert newest_first == sorted(newest_first, reverse=True)
+    oldest_first = [doc["n"] for doc in archiver.find_archived({"user_id": "u1"}, oldest_first=True)]
+    assert oldest_first == sorted(newest_first)
@@ -0,0 +1,57 @@
+import autocomplete
+import querylog
+
+
+def test_rare_queries_are_not_suggested():
+    completer = autocomplete.Autocompleter(min_count=3)
+    completer.rebuild([{"title": "Data Scientist", "skills": ["Python"]}], [("jane doe resume", 1)])
+    completer.observe("data engineer", 2)
+    assert [s["text"] for s in completer.complete("data")] == ["Data Scientist"]
+    assert completer.complete("jane") == []
+    completer.observe("data engineer", 3)
+    assert [s["text"] for s in completer.complete("data")] == ["data engineer", "Data Scientist"]
+
+
+def test_static_terms_are_boosted_by_any_count():
+    completer = autocomplete.Autocompleter(min_count=10)
+    completer.rebuild([{"title": "Data Scientist"}, {"title": "Data Analyst"}], [])
+    completer.observe("data analyst", 1)
+    assert completer.complete("data")[0] == {"text": "Data Analyst", "type": "career_path", "score": 2}
+
+
+def test_eviction_drops_the_lowest_current_weight():
+    trie = autocomplete.CompletionTrie(max_terms=3)
+    trie.add("alpha", 5, "query")
+    trie.add("beta", 1, "query")
+    trie.add("gamma", 3, "query")
+    # beta's old weight is stale in the heap once it is re-weighted
+    trie.add("beta", 10, "query")
+    trie.add("delta", 4, "query")
+    assert sorted(trie.terms) == ["alpha", "beta", "delta"]
+    assert trie.complete("g") == []
+    trie.add("epsilon", 6, "query")
+    assert sorted(trie.terms) == ["alpha", "beta", "epsilon"]
+
+
+def test_heap_stays_bounded_under_reweighting():
+    trie = autocomplete.CompletionTrie(max_terms=10)
+    for weight in range(1000):
+        trie.add("python", weight, "query")
+    assert len(trie._by_weight) <= 2 * len(trie.terms) + 64
+    assert trie.complete("py")[0]["score"] == 999
+
+
+def test_one_users_repeated_query_is_never_suggested():
+    log = querylog.QueryLog()
+    completer = autocomplete.Autocompleter(min_count=5)
+    completer.rebuild([], [])
+    for _ in range(50):
+        log.record("jane doe jane@example.com", client="user:jane")
+        completer.observe("jane doe jane@example.com", log.distinct_clients("jane doe jane@example.com"))
+    assert completer.complete("jane") == []
+    completer.rebuild([], log.top_by_clients(100))
+    assert completer.complete("jane") == []
+    for n in range(5):
+        log.record("data engineer", client=f"user:{n}")
+        completer.observe("data engineer", log.distinct_clients("data engineer"))
+    assert [s["text"] for s in completer.complete("data")] == ["data engineer"]
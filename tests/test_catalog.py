@@ -0,0 +1,56 @@
+import asyncio
+import json
+import logging
+
+import pytest
+
+import catalog
+
+
+def write(directory, kind, name, item):
+    folder = directory / kind
+    folder.mkdir(parents=True, exist_ok=True)
+    (folder / name).write_text(json.dumps(item))
+
+
+def test_duplicate_ids_keep_the_first_file(tmp_path, caplog):
+    write(tmp_path, "resume_templates", "a.json", {"id": "shared", "template_name": "First"})
+    write(tmp_path, "resume_templates", "b.json", {"id": "shared", "template_name": "Second"})
+    write(tmp_path, "job_guidance", "shared.json", {"items": []})
+    cat = catalog.Catalog(str(tmp_path))
+    with caplog.at_level(logging.WARNING, logger="catalog"):
+        cat.reload()
+    snapshot = cat.snapshot
+    assert snapshot.get("resume_templates", "shared")["template_name"] == "First"
+    assert len(snapshot.items("resume_templates")) == 1
+    # The same id under another kind is not a clash
+    assert snapshot.get("job_guidance", "shared") is not None
+    assert "already used by" in caplog.text and "b.json" in caplog.text
+
+
+def test_start_loads_in_the_background(tmp_path):
+    write(tmp_path, "resume_templates", "a.json", {"template_name": "A"})
+    cat = catalog.Catalog(str(tmp_path), interval=0)
+
+    async def run():
+        cat.start()
+        assert not cat.snapshot.version
+        await cat._task
+        return cat.snapshot
+
+    snapshot = asyncio.run(run())
+    assert snapshot.version and snapshot.get("resume_templates", "a")["template_name"] == "A"
+
+
+def test_snapshot_items_are_read_only(tmp_path):
+    write(tmp_path, "resume_templates", "a.json", {"template_name": "A", "sections": [{"title": "Skills"}]})
+    cat = catalog.Catalog(str(tmp_path))
+    cat.reload()
+    template = cat.snapshot.get("resume_templates", "a")
+    with pytest.raises(TypeError):
+        template["template_name"] = "Edited"
+    with pytest.raises(TypeError):
+        template["sections"][0]["title"] = "Edited"
+    assert isinstance(template["sections"], tuple)
+    assert cat.snapshot.items("resume_templates")[0] is template
+    assert {**template, "template_name": "Copy"}["template_name"] == "Copy"
@@ -0,0 +1,88 @@
+import dedup
+
+BOILERPLATE = ("Acme is a fast-growing company building tools for developers. We offer remote-friendly hours, "
+               "a generous learning budget, health insurance and a friendly team that ships every week. ") * 3
+
+
+def job(job_id, title, company="Acme", description=BOILERPLATE, location="Austin, TX"):
+    return {"id": job_id, "title": title, "company": company, "description": description, "location": location}
+
+
+def ids(jobs):
+    return [item["id"] for item in jobs]
+
+
+def test_reposts_in_other_cities_collapse_into_the_first():
+    jobs = [job("a", "Data Engineer"), job("b", "Data Engineer", location="Remote"),
+            job("c", "data engineer", location="Seattle, WA")]
+    kept, collapsed = dedup.collapse(jobs)
+    assert ids(kept) == ["a"]
+    assert collapsed == 2
+
+
+def test_distinct_roles_sharing_boilerplate_are_kept():
+    jobs = [job("a", "Data Engineer"), job("b", "Data Analyst"), job("c", "Senior Machine Learning Engineer")]
+    kept, collapsed = dedup.collapse(jobs)
+    assert ids(kept) == ["a", "b", "c"]
+    assert collapsed == 0
+
+
+def test_reposts_under_slightly_different_titles_collapse():
+    jobs = [job("a", "Data Engineer"), job("b", "Senior Data Engineer"), job("c", "Data Engineer (Remote)"),
+            job("d", "Engineer, Data")]
+    kept, collapsed = dedup.collapse(jobs)
+    assert ids(kept) == ["a"]
+    assert collapsed == 3
+
+
+def test_same_title_with_a_different_description_is_kept():
+    other = "Build streaming pipelines in Kafka and Flink, own the warehouse schema and on-call rotation. " * 3
+    kept, _ = dedup.collapse([job("a", "Data Engineer"), job("b", "Data Engineer", description=other)])
+    assert ids(kept) == ["a", "b"]
+
+
+def test_title_similarity_ignores_case_punctuation_and_order():
+    first = dedup.title_words({"title": "Engineer, Data (Remote)"})
+    second = dedup.title_words({"title": "remote data engineer"})
+    assert dedup.title_similarity(first, second) == 1.0
+    assert dedup.title_similarity(dedup.title_words({"title": "Data Engineer"}),
+                                  dedup.title_words({"title": "Data Analyst"})) == 1 / 3
+    assert dedup.title_similarity(dedup.title_words({}), frozenset()) == 1.0
+
+
+def test_one_index_deduplicates_across_batches():
+    index = dedup.LSHIndex()
+    first, _ = dedup.collapse([job("a", "Data Engineer")], index)
+    second, collapsed = dedup.collapse([job("b", "Data Engineer", location="Remote"), job("c", "Data Analyst")], index)
+    assert ids(first + second) == ["a", "c"]
+    assert collapsed == 1
+    assert len(index) == 2
+
+
+def test_the_same_listing_shown_again_is_not_a_duplicate():
+    index = dedup.LSHIndex()
+    first, _ = dedup.collapse([job("a", "Data Engineer"), job("b", "Data Analyst")], index)
+    again, collapsed = dedup.collapse([job("a", "Data Engineer"), job("a2", "Data Engineer", location="Remote"),
+                                       job("a", "Data Engineer")], index)
+    assert ids(first) == ["a", "b"]
+    assert ids(again) == ["a"]
+    assert collapsed == 2
+
+
+def test_a_full_index_still_collapses_against_what_it_holds():
+    index = dedup.LSHIndex(max_listings=1)
+    kept, _ = dedup.collapse([job("a", "Data Engineer"), job("b", "Data Analyst"), job("c", "Data Analyst"),
+                              job("d", "Data Engineer", location="Remote")], index)
+    assert ids(kept) == ["a", "b", "c"]
+    assert len(index) == 1
+
+
+def test_session_indexes_are_per_key_and_bounded():
+    sessions = dedup.SessionIndexes(max_keys=2)
+    first = sessions.get("client-1\x00data engineer")
+    dedup.collapse([job("a", "Data Engineer")], first)
+    assert sessions.get("client-1\x00data engineer") is first
+    assert sessions.get("client-2\x00data engineer") is not first
+    sessions.get("client-3\x00data engineer")
+    assert len(sessions) == 2
+    assert sessions.get("client-1\x00data engineer") is not first
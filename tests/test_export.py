@@ -0,0 +1,65 @@
+import csv
+import io
+import threading
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+
+import export
+
+START = datetime(2025, 1, 1)
+
+
+def rows(text):
+    return list(csv.reader(io.StringIO(text)))
+
+
+def test_csv_neutralizes_formulas():
+    docs = [{"name": "=HYPERLINK(\"http://x\")", "phone": "+1 555 0100", "note": "-2+3", "email": "@sum",
+             "ok": "plain", "count": -3}]
+    fields = ["name", "phone", "note", "email", "ok", "count"]
+    header, row = rows("".join(export.csv_lines(docs, fields)))
+    assert header == fields
+    assert row == ["'=HYPERLINK(\"http://x\")", "'+1 555 0100", "'-2+3", "'@sum", "plain", "-3"]
+
+
+def test_csv_renders_dates_and_missing_values():
+    docs = [{"applied_at": START, "status": None}]
+    assert rows("".join(export.csv_lines(docs, ["applied_at", "status"])))[1] == ["2025-01-01T00:00:00", ""]
+
+
+@pytest.fixture
+def applications():
+    collection = mongomock.MongoClient().db.applications
+    collection.insert_many([{"n": i, "applied_at": START + timedelta(hours=i)} for i in range(500)])
+    return collection
+
+
+def scan_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith("export-scan-")]
+
+
+def test_parallel_scan_is_sorted_and_complete(applications):
+    docs = list(export.parallel_scan(applications, {}, "applied_at", START, START + timedelta(hours=499),
+                                     partitions=4, prefetch=8))
+    assert [doc["n"] for doc in docs] == list(range(500))
+    assert not scan_threads()
+
+
+def test_closing_parallel_scan_early_joins_its_threads(applications):
+    docs = export.parallel_scan(applications, {}, "applied_at", START, START + timedelta(hours=499),
+                                partitions=4, prefetch=2)
+    assert next(docs)["n"] == 0
+    docs.close()
+    assert not scan_threads()
+
+
+def test_parallel_scan_raises_scan_errors():
+    class Broken:
+        def find(self, *args, **kwargs):
+            raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        list(export.parallel_scan(Broken(), {}, "applied_at", START, START + timedelta(days=1)))
+    assert not scan_threads()
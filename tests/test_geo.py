@@ -0,0 +1,106 @@
+import os
+import uuid
+
+import pytest
+
+import geo
+
+GAZETTEER_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "backend", "data", "gazetteer.csv")
+
+
+@pytest.fixture(scope="module")
+def gazetteer():
+    return geo.Gazetteer.from_csv(GAZETTEER_FILE)
+
+
+@pytest.fixture
+def jobs():
+    # $geoNear and $geoWithin need a real server; mongomock implements neither
+    url = os.environ.get("TEST_MONGO_URL")
+    if not url or url.startswith("mongomock://"):
+        pytest.skip("set TEST_MONGO_URL to a mongod to run geo queries")
+    from pymongo import MongoClient
+    client = MongoClient(url, serverSelectionTimeoutMS=2000)
+    collection = client.get_database("geo_test")[f"jobs_{uuid.uuid4().hex}"]
+    collection.create_index([("location_point", "2dsphere")])
+    yield collection
+    collection.drop()
+    client.close()
+
+
+@pytest.mark.parametrize("location, city", [
+    ("Austin, TX", "Austin"),
+    ("San Francisco, California", "San Francisco"),
+    ("Remote / San Francisco", "San Francisco"),
+    ("Greater NYC Area", "New York"),
+])
+def test_geocode(gazetteer, location, city):
+    assert gazetteer.geocode(location)["name"] == city
+
+
+def test_remote_only_locations_do_not_geocode(gazetteer):
+    assert gazetteer.geocode("Remote") is None
+    assert geo.is_remote("Remote (US)")
+    assert not geo.is_remote("Austin, TX")
+
+
+def test_points_are_longitude_first():
+    assert geo.point(30.2672, -97.7431) == {"type": "Point", "coordinates": [-97.7431, 30.2672]}
+
+
+def test_box_is_a_closed_ring():
+    ring = geo.within_box("location_point", [-98, 30, -97, 31])["location_point"]["$geoWithin"]["$geometry"]["coordinates"][0]
+    assert ring[0] == ring[-1] == [-98, 30]
+    assert len(ring) == 5
+
+
+def test_near_converts_kilometres():
+    stage = geo.near("location_point", 30.2672, -97.7431, 25, {"title": "x"})["$geoNear"]
+    assert stage["maxDistance"] == 25000
+    assert stage["distanceMultiplier"] == 0.001
+    assert stage["near"]["coordinates"] == [-97.7431, 30.2672]
+    assert stage["query"] == {"title": "x"}
+
+
+def test_radius_search(jobs, gazetteer):
+    for job_id, city in [("austin", "Austin, TX"), ("dallas", "Dallas, TX"), ("nyc", "New York, NY")]:
+        place = gazetteer.geocode(city)
+        jobs.insert_one({"id": job_id, "location_point": geo.point(place["latitude"], place["longitude"])})
+    austin = gazetteer.geocode("Austin, TX")
+    found = list(jobs.aggregate([geo.near("location_point", austin["latitude"], austin["longitude"], 400)]))
+    assert [job["id"] for job in found] == ["austin", "dallas"]
+    # Austin to Dallas is about 293 km
+    assert found[0]["distance_km"] < 1
+    assert 280 < found[1]["distance_km"] < 305
+
+
+def test_bbox_search(jobs, gazetteer):
+    for job_id, city in [("austin", "Austin, TX"), ("nyc", "New York, NY")]:
+        place = gazetteer.geocode(city)
+        jobs.insert_one({"id": job_id, "location_point": geo.point(place["latitude"], place["longitude"])})
+    found = list(jobs.find(geo.within_box("location_point", [-100, 28, -95, 33])))
+    assert [job["id"] for job in found] == ["austin"]
+
+
+@pytest.mark.parametrize("fields", [
+    {"radius_km": 0, "location": "Austin, TX"},
+    {"radius_km": -5, "location": "Austin, TX"},
+    {"radius_km": 5, "latitude": 90.5, "longitude": 0},
+    {"radius_km": 5, "latitude": 0, "longitude": -180.5},
+    {"radius_km": 5, "latitude": 30.2},
+    {"bbox": [1, 2, 3]},
+    {"bbox": [10, 0, -10, 5]},
+    {"bbox": [-10, 5, 10, 0]},
+    {"bbox": [-190, 0, 10, 5]},
+    {"bbox": [-125, 45, -120, 50], "radius_km": 5},
+])
+def test_invalid_geo_searches_are_rejected_before_querying(api, fields):
+    response = api.post("/api/jobs/search", json={"query": "engineer", **fields})
+    assert response.status_code == 422, response.text
+
+
+def test_radius_search_around_an_unknown_place_is_a_400(api):
+    response = api.post("/api/jobs/search", json={"query": "engineer", "location": "Atlantis", "radius_km": 10})
+    assert response.status_code == 400
+    assert "latitude/longitude" in response.json()["detail"]
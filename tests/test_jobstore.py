@@ -0,0 +1,69 @@
+import json
+from datetime import datetime
+
+import pytest
+
+import jobstore
+
+FETCHED_AT = datetime(2025, 1, 15, 12, 30)
+
+
+def listing(job_id, company="Acme", location="Austin, TX", **fields):
+    job = {"id": job_id, "title": "Data Engineer", "company": company, "location": location,
+           "description": "Build pipelines.", "salary": "$90000 - $120000", "job_type": "full_time",
+           "experience_level": "mid", "posted_date": "2025-01-14", "apply_url": f"https://example.com/{job_id}",
+           "fetched_at": FETCHED_AT}
+    job.update(fields)
+    return job
+
+
+def test_appended_rows_read_back_as_the_same_dicts():
+    jobs = [listing("a"), listing("b", company="Globex", location="Remote", title="Data Analyst")]
+    store = jobstore.JobStore(jobs)
+    assert len(store) == 2
+    for row, job in enumerate(jobs):
+        expected = {field: job[field] for field in jobstore.FIELDS}
+        assert store.to_dict(row) == expected
+        assert store[row].to_dict() == expected
+        assert store.get(row, "fetched_at") == FETCHED_AT
+
+
+def test_records_read_fields_as_attributes():
+    store = jobstore.JobStore([listing("a"), listing("b", company="Globex")])
+    assert [record.company for record in store] == ["Acme", "Globex"]
+    assert store[-1].id == "b"
+    assert store[0].fetched_at == FETCHED_AT
+    with pytest.raises(AttributeError):
+        store[0].missing_field
+    with pytest.raises(IndexError):
+        store[2]
+
+
+def test_missing_fields_read_back_as_none():
+    store = jobstore.JobStore([{"id": "a", "title": "Data Engineer"}])
+    record = store[0]
+    assert record.company is None and record.salary is None and record.fetched_at is None
+    assert record.get("company", "Unknown") == "Unknown"
+    assert store.to_dict(0)["experience_level"] is None
+
+
+def test_column_decodes_every_row():
+    store = jobstore.JobStore([listing("a"), listing("b", company="Globex"), listing("c", fetched_at=None)])
+    assert store.column("company") == ["Acme", "Globex", "Acme"]
+    assert store.column("id") == ["a", "b", "c"]
+    assert store.column("fetched_at") == [FETCHED_AT, FETCHED_AT, None]
+
+
+def test_only_low_cardinality_fields_are_dictionary_encoded():
+    store = jobstore.JobStore([listing(str(n), salary=f"${n}", posted_date=f"2025-01-{n:02d}") for n in range(1, 5)])
+    assert set(store.cardinality()) == {"company", "location", "job_type", "experience_level"}
+    assert store.cardinality()["company"] == 1
+    assert store.column("salary") == ["$1", "$2", "$3", "$4"]
+
+
+def test_rows_json_renders_the_selected_rows_and_fields():
+    store = jobstore.JobStore([listing("a"), listing("b"), listing("c", company=None)])
+    rendered = store.rows_json([2, 0], fields=("id", "company"))
+    assert json.loads(rendered) == [{"id": "c", "company": None}, {"id": "a", "company": "Acme"}]
+    assert store.rows_json([]) == "[]"
+    assert json.loads(store[1].to_json())["apply_url"] == "https://example.com/b"
@@ -0,0 +1,63 @@
+import querylog
+
+
+def test_one_client_adds_at_most_max_per_client_searches():
+    log = querylog.QueryLog(max_per_client=3)
+    for _ in range(50):
+        log.record("python", client="ip:203.0.113.7")
+    log.record("rust", client="user:a")
+    log.record("rust", client="user:b")
+    assert log.top(2) == [("python", 3), ("rust", 2)]
+
+
+def test_the_per_client_cap_resets_when_counts_decay():
+    log = querylog.QueryLog(max_per_client=2)
+    for _ in range(5):
+        log.record("python", client="user:a")
+    assert log.top(1) == [("python", 2)]
+    log._decayed_at -= log.decay_interval
+    for _ in range(5):
+        log.record("python", client="user:a")
+    # Halved to 1, then two more from the fresh allowance
+    assert log.top(1) == [("python", 3)]
+
+
+def test_uncapped_logs_count_every_search():
+    log = querylog.QueryLog()
+    for _ in range(5):
+        log.record("python", client="user:a")
+    assert log.top(1) == [("python", 5)]
+
+
+def test_hyperloglog_counts_distinct_clients_not_searches():
+    hll = querylog.HyperLogLog()
+    for _ in range(100):
+        hll.add("user:a")
+    assert hll.estimate() == 1
+    for n in range(20):
+        hll.add(f"user:{n}")
+    assert 17 <= hll.estimate() <= 23
+    assert querylog.HyperLogLog().estimate() == 0
+
+
+def test_hyperloglogs_merge_without_double_counting():
+    first, second = querylog.HyperLogLog(), querylog.HyperLogLog()
+    for n in range(10):
+        first.add(f"user:{n}")
+        second.add(f"user:{n}")
+    restored = querylog.HyperLogLog.from_bytes(first.to_bytes())
+    restored.merge(second)
+    assert restored.estimate() == first.estimate()
+
+
+def test_top_by_clients_ranks_on_reach():
+    log = querylog.QueryLog()
+    for _ in range(30):
+        log.record("my own name", client="user:a")
+    for n in range(6):
+        log.record("data engineer", client=f"user:{n}")
+    log.record("anonymous", client=None)
+    assert [key for key, _ in log.top(1)] == ["my own name"]
+    assert log.top_by_clients(5) == [("data engineer", 6), ("my own name", 1)]
+    assert log.distinct_clients("my own name") == 1
+    assert log.distinct_clients("unknown") == 0
@@ -0,0 +1,197 @@
+import asyncio
+import itertools
+import logging
+import time
+from datetime import timedelta
+
+from pymongo import monitoring
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+import metrics
+import querywatch
+
+CONNECTION_ID = ("localhost", 27017)
+_request_ids = itertools.count(1)
+
+
+def run_command(watch, command, database="app", duration_ms=1.0, failed=False):
+    """Publish one command to ``watch`` the way the driver does: started, then succeeded or failed."""
+    request_id = next(_request_ids)
+    name = next(iter(command))
+    watch.started(monitoring.CommandStartedEvent(command, database, request_id, CONNECTION_ID, request_id))
+    duration = timedelta(milliseconds=duration_ms)
+    if failed:
+        watch.failed(monitoring.CommandFailedEvent(
+            duration, {"ok": 0, "errmsg": "boom"}, name, request_id, CONNECTION_ID, request_id))
+    else:
+        watch.succeeded(monitoring.CommandSucceededEvent(
+            duration, {"ok": 1}, name, request_id, CONNECTION_ID, request_id))
+
+
+def find(user_id):
+    return {"find": "applications", "filter": {"user_id": user_id}, "lsid": {"id": "session"}}
+
+
+async def call(watch, commands, debug_headers=True):
+    """Serve one GET /api/users/{user_id} that runs ``commands``; returns the response headers."""
+    async def endpoint(request):
+        for command in commands:
+            run_command(watch, command)
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[Route("/api/users/{user_id}", endpoint)])
+    middleware = querywatch.QueryWatchMiddleware(app, watch, debug_headers)
+    scope = {"type": "http", "method": "GET", "path": "/api/users/u1", "raw_path": b"/api/users/u1",
+             "root_path": "", "query_string": b"", "headers": [], "app": app}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+    return dict(messages[0]["headers"])
+
+
+def test_shape_replaces_values_and_keeps_fields_and_operators():
+    query = {
+        "user_id": "u1",
+        "applied_at": {"$lt": 1700000000, "$gte": 1600000000},
+        "status": {"$in": ["applied", "offer", "rejected"]},
+        "$or": [{"remote": True}, {"city": "Austin"}],
+        "skills": {"$elemMatch": {"name": "python", "level": {"$gt": 2}}},
+        "address": {"city": "Austin"},
+    }
+    assert querywatch.shape(query) == {
+        "user_id": "?",
+        "applied_at": {"$lt": "?", "$gte": "?"},
+        "status": {"$in": ["?"]},
+        "$or": [{"remote": "?"}, {"city": "?"}],
+        "skills": {"$elemMatch": {"name": "?", "level": {"$gt": "?"}}},
+        "address": "?",
+    }
+    assert querywatch.shape("literal") == "?"
+
+
+def test_same_query_for_another_user_shares_a_shape_key():
+    first = querywatch.shape_key("find", "applications", {"user_id": "u1", "status": {"$in": ["a"]}})
+    second = querywatch.shape_key("find", "applications", {"status": {"$in": ["b", "c"]}, "user_id": "u2"})
+    assert first == second
+    assert first != querywatch.shape_key("find", "applications", {"user_id": "u1", "status": "a"})
+
+
+def test_command_filter_finds_the_filter_of_each_command():
+    assert querywatch.command_filter("find", {"find": "jobs", "filter": {"id": 1}}) == {"id": 1}
+    assert querywatch.command_filter("count", {"count": "jobs"}) == {}
+    assert querywatch.command_filter("update", {"update": "jobs", "updates": [{"q": {"id": 1}, "u": {}}]}) == {"id": 1}
+    assert querywatch.command_filter("aggregate", {"aggregate": "jobs", "pipeline": [{"$match": {"id": 1}}]}) == {"id": 1}
+    near = {"$geoNear": {"near": [0, 0], "query": {"remote": False}}}
+    assert querywatch.command_filter("aggregate", {"aggregate": "jobs", "pipeline": [near]}) == {"remote": False}
+    assert querywatch.command_filter("aggregate", {"aggregate": "jobs", "pipeline": [{"$group": {}}]}) is None
+    assert querywatch.command_filter("createIndexes", {"createIndexes": "jobs"}) is None
+
+
+def test_has_collscan_looks_through_the_winning_plan_only():
+    collscan = {"queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "COLLSCAN"}}}}
+    indexed = {"queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}},
+                                "rejectedPlans": [{"stage": "COLLSCAN"}]}}
+    sharded = {"queryPlanner": {"winningPlan": {"shards": [{"winningPlan": {"stage": "IXSCAN"}},
+                                                           {"winningPlan": {"stage": "COLLSCAN"}}]}}}
+    assert querywatch.has_collscan(collscan)
+    assert not querywatch.has_collscan(indexed)
+    assert querywatch.has_collscan(sharded)
+    assert not querywatch.has_collscan({})
+
+
+def test_commands_are_counted_per_request_and_reported_in_debug_headers():
+    watch = querywatch.QueryWatch(slow_ms=0, explain=False)
+    headers = asyncio.run(call(watch, [find("u1"), find("u2"), {"insert": "applications"}]))
+    assert headers[b"x-db-queries"] == b"3"
+    assert float(headers[b"x-db-time"]) >= 3.0
+
+
+def test_debug_headers_are_off_by_default():
+    watch = querywatch.QueryWatch(slow_ms=0, explain=False)
+    headers = asyncio.run(call(watch, [find("u1")], debug_headers=False))
+    assert b"x-db-queries" not in headers
+
+
+def test_driver_chatter_and_system_databases_are_ignored():
+    watch = querywatch.QueryWatch(slow_ms=0, explain=False)
+    headers = asyncio.run(call(watch, [{"hello": 1}, {"ping": 1}]))
+    run_command(watch, {"find": "system.version", "filter": {}}, database="admin")
+    assert headers[b"x-db-queries"] == b"0"
+
+
+def test_slow_commands_are_logged_counted_and_kept(caplog):
+    watch = querywatch.QueryWatch(slow_ms=50, explain=False)
+    before = metrics.MONGO_SLOW_QUERIES.value("find")
+    with caplog.at_level(logging.WARNING, logger="querywatch"):
+        run_command(watch, find("u1"), duration_ms=10)
+        run_command(watch, find("u2"), duration_ms=80)
+        run_command(watch, find("u3"), duration_ms=120, failed=True)
+    assert metrics.MONGO_SLOW_QUERIES.value("find") == before + 2
+    slow = watch.report()["slow_queries"]
+    assert [(entry["duration_ms"], entry["status"]) for entry in slow] == [(120.0, "error"), (80.0, "ok")]
+    assert slow[0]["shape"] == 'applications.find {"user_id": "?"}'
+    assert "u2" not in caplog.text and caplog.text.count("Slow Mongo query") == 2
+
+
+def test_repeated_shapes_warn_once_per_request_with_the_route_template(caplog):
+    watch = querywatch.QueryWatch(slow_ms=0, max_commands=25, max_repeats=3, explain=False)
+    with caplog.at_level(logging.WARNING, logger="querywatch"):
+        asyncio.run(call(watch, [find(f"u{n}") for n in range(3)]))
+    assert caplog.records == []
+    with caplog.at_level(logging.WARNING, logger="querywatch"):
+        asyncio.run(call(watch, [find(f"u{n}") for n in range(4)]))
+    assert len(caplog.records) == 1
+    message = caplog.records[0].getMessage()
+    assert message.startswith("GET /api/users/{user_id} ran 4 Mongo commands")
+    assert 'applications.find {"user_id": "?"} x4' in message
+
+
+def test_finish_request_warns_when_a_request_runs_too_many_commands(caplog):
+    watch = querywatch.QueryWatch(max_commands=2, max_repeats=10, explain=False)
+    stats = querywatch.RequestStats()
+    stats.commands = 3
+    stats.shapes.update({"jobs.find {}": 1, "users.find {}": 1, "jobs.count {}": 1})
+    with caplog.at_level(logging.WARNING, logger="querywatch"):
+        watch.finish_request({"type": "http", "method": "POST", "path": "/x"}, stats)
+    assert "POST unmatched ran 3 Mongo commands" in caplog.text
+
+
+class ExplainClient:
+    """Answers explain commands with ``plan`` and remembers what it was asked."""
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.explained = []
+
+    def __getitem__(self, database):
+        return self
+
+    def command(self, command):
+        self.explained.append(command)
+        return self.plan
+
+
+def test_new_shapes_are_explained_once_and_collscans_recorded():
+    client = ExplainClient({"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}})
+    watch = querywatch.QueryWatch(slow_ms=0)
+    watch.start(client)
+    before = metrics.MONGO_COLLSCANS.value("applications")
+    run_command(watch, find("u1"))
+    run_command(watch, find("u2"))
+    run_command(watch, {"find": "applications", "filter": {}})
+    deadline = time.monotonic() + 5
+    while not watch.collscans and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(client.explained) == 1
+    assert client.explained[0] == {"explain": {"find": "applications", "filter": {"user_id": "u1"}},
+                                   "verbosity": "queryPlanner"}
+    assert list(watch.collscans) == ['applications.find {"user_id": "?"}']
+    assert metrics.MONGO_COLLSCANS.value("applications") == before + 1
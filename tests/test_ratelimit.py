@@ -0,0 +1,140 @@
+import asyncio
+import threading
+
+import pytest
+
+import ratelimit
+
+
+def request_scope(client="203.0.113.7", headers=()):
+    return {"type": "http", "method": "GET", "path": "/api/jobs", "headers": list(headers),
+            "client": (client, 50000)}
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def gated_app(release):
+    async def app(scope, receive, send):
+        await release.wait()
+        await ok_app(scope, receive, send)
+    return app
+
+
+async def serve(middleware, scope):
+    """Run one request through ``middleware``; returns (status, headers)."""
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware(scope, receive, send)
+    return sent[0]["status"], dict(sent[0]["headers"])
+
+
+def unlimited():
+    return ratelimit.TokenBucketLimiter("client", 0, 0, ratelimit.MemoryBucketStore())
+
+
+def test_empty_bucket_is_rejected_with_429():
+    limiter = ratelimit.TokenBucketLimiter("client", 0.5, 2, ratelimit.MemoryBucketStore())
+    middleware = ratelimit.AdmissionMiddleware(ok_app, limiter)
+
+    async def run():
+        results = [await serve(middleware, request_scope()) for _ in range(3)]
+        # Another client has its own bucket
+        results.append(await serve(middleware, request_scope(client="198.51.100.1")))
+        return results
+
+    results = asyncio.run(run())
+    assert [status for status, _ in results] == [200, 200, 429, 200]
+    assert int(results[2][1][b"retry-after"]) >= 1
+
+
+def test_full_queue_is_shed_with_503():
+    async def run():
+        release = asyncio.Event()
+        middleware = ratelimit.AdmissionMiddleware(gated_app(release), unlimited(),
+                                                   max_in_flight=1, max_queued=1, queue_timeout=5)
+        running = asyncio.create_task(serve(middleware, request_scope()))
+        await asyncio.sleep(0.01)
+        queued = asyncio.create_task(serve(middleware, request_scope()))
+        await asyncio.sleep(0.01)
+        shed = await serve(middleware, request_scope())
+        release.set()
+        return await running, await queued, shed
+
+    running, queued, shed = asyncio.run(run())
+    assert (running[0], queued[0], shed[0]) == (200, 200, 503)
+    assert int(shed[1][b"retry-after"]) == 5
+
+
+def test_queue_timeout_is_shed_with_503():
+    async def run():
+        release = asyncio.Event()
+        middleware = ratelimit.AdmissionMiddleware(gated_app(release), unlimited(),
+                                                   max_in_flight=1, max_queued=1, queue_timeout=0.05)
+        running = asyncio.create_task(serve(middleware, request_scope()))
+        await asyncio.sleep(0.01)
+        timed_out = await serve(middleware, request_scope())
+        release.set()
+        return await running, timed_out
+
+    running, timed_out = asyncio.run(run())
+    assert (running[0], timed_out[0]) == (200, 503)
+    assert b"retry-after" in timed_out[1]
+
+
+def test_forwarded_for_is_ignored_from_untrusted_peers():
+    headers = [(b"x-forwarded-for", b"192.0.2.99")]
+    assert ratelimit.client_key(request_scope(headers=headers)) == "ip:203.0.113.7"
+    proxies = ratelimit.parse_networks("10.0.0.0/8")
+    assert ratelimit.client_key(request_scope(headers=headers), trusted_proxies=proxies) == "ip:203.0.113.7"
+
+
+def test_forwarded_for_is_honoured_from_trusted_proxies():
+    proxies = ratelimit.parse_networks("10.0.0.0/8, 127.0.0.1")
+    headers = [(b"x-forwarded-for", b"192.0.2.1, 192.0.2.99, 10.1.2.3")]
+    scope = request_scope(client="10.0.0.5", headers=headers)
+    # Entries left of the last untrusted hop are client-supplied and ignored
+    assert ratelimit.client_key(scope, trusted_proxies=proxies) == "ip:192.0.2.99"
+
+
+def test_bearer_tokens_key_on_the_verified_user_only():
+    sessions = {"good-token": "user-1"}
+    headers = [(b"authorization", b"Bearer good-token")]
+    assert ratelimit.client_key(request_scope(headers=headers), resolve_token=sessions.get) == "user:user-1"
+    headers = [(b"authorization", b"Bearer made-up-token")]
+    assert ratelimit.client_key(request_scope(headers=headers), resolve_token=sessions.get) == "ip:203.0.113.7"
+
+
+def test_blocking_store_is_called_off_the_event_loop():
+    threads = []
+
+    class BlockingStore(ratelimit.MemoryBucketStore):
+        blocking = True
+
+        def take(self, *args):
+            threads.append(threading.get_ident())
+            return super().take(*args)
+
+    limiter = ratelimit.TokenBucketLimiter("client", 1, 1, BlockingStore())
+    asyncio.run(serve(ratelimit.AdmissionMiddleware(ok_app, limiter), request_scope()))
+    assert threads and threads[0] != threading.get_ident()
+
+
+def test_worker_shares_add_up_to_the_budget():
+    shares = [ratelimit.worker_share(250, worker_id, 4) for worker_id in range(4)]
+    assert shares == [63, 63, 62, 62]
+    assert ratelimit.worker_share(250, 0, 1) == 250
+    assert ratelimit.worker_share(0, 3, 4) == 0
+
+
+def test_a_budget_smaller_than_the_worker_count_is_refused():
+    with pytest.raises(ValueError, match="RATE_LIMIT_BACKEND=mongo"):
+        ratelimit.worker_share(3, 0, 4)
@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+
+import recommend
+
+
+def listing(job_id, title, description=""):
+    return {"id": job_id, "title": title, "description": description, "company": "Acme",
+            "location": "Austin, TX", "fetched_at": datetime.utcnow()}
+
+
+@pytest.fixture
+def db():
+    db = mongomock.MongoClient().db
+    db.career_paths.insert_many([
+        {"id": "data", "skills": ["python", "sql", "statistics", "machine learning"]},
+        {"id": "web", "skills": ["javascript", "react", "css", "html"]},
+    ])
+    db.users.insert_many([
+        {"id": "ana", "career_path_id": "data"},
+        {"id": "ben", "career_path_id": "web"},
+    ])
+    db.jobs.insert_many([
+        listing("j1", "Data Analyst", "sql dashboards statistics"),
+        listing("j2", "Frontend Developer", "react css html"),
+        listing("j3", "Machine Learning Engineer", "python machine learning"),
+    ])
+    return db
+
+
+@pytest.fixture
+def engine(db):
+    engine = recommend.RecommendationEngine(db.recommendations, db.users, db.career_paths,
+                                            db.job_applications, db.jobs, feed_size=2)
+    engine.ensure_indexes()
+    return engine
+
+
+def feed(db, user_id):
+    return db.recommendations.find_one({"user_id": user_id})
+
+
+def test_feeds_rank_by_career_path_and_skip_applied_jobs(db, engine):
+    db.job_applications.insert_one({"user_id": "ana", "job_id": "j3"})
+    assert engine.rebuild_all() == 2
+    assert [item["id"] for item in feed(db, "ana")["items"]][0] == "j1"
+    assert "j3" not in [item["id"] for item in feed(db, "ana")["items"]]
+    assert feed(db, "ben")["items"][0]["id"] == "j2"
+    # A full feed records the score a new job must beat
+    assert feed(db, "ben")["floor"] == feed(db, "ben")["items"][-1]["score"]
+
+
+def test_rebuild_stale_leaves_fresh_feeds_alone(db, engine):
+    engine.rebuild_all()
+    db.recommendations.update_one({"user_id": "ana"}, {"$set": {"updated_at": datetime.utcnow() - timedelta(days=2)}})
+    db.users.insert_one({"id": "cat", "career_path_id": "web"})
+    ben_updated = feed(db, "ben")["updated_at"]
+    assert engine.rebuild_stale(timedelta(days=1)) == 2
+    assert feed(db, "ben")["updated_at"] == ben_updated
+    assert feed(db, "ana")["updated_at"] > ben_updated
+    assert feed(db, "cat")["items"]
+
+
+def test_merge_only_touches_feeds_a_new_job_improves(db, engine):
+    engine.rebuild_all()
+    ana_before = feed(db, "ana")
+    assert engine.merge_jobs([listing("j4", "Senior React Developer", "react javascript css html")]) == 1
+    assert feed(db, "ben")["items"][0]["id"] == "j4"
+    assert feed(db, "ana")["updated_at"] == ana_before["updated_at"]
+
+
+def test_merge_reads_only_the_feeds_it_changes(db, engine, monkeypatch):
+    engine.rebuild_all()
+    engine.merge_jobs([])  # nothing to merge, cache still cold
+    engine._profile_snapshot()
+    filters = []
+    find = db.recommendations.find
+
+    def recording_find(filter=None, *args, **kwargs):
+        filters.append(filter)
+        return find(filter, *args, **kwargs)
+
+    monkeypatch.setattr(db.recommendations, "find", recording_find)
+    engine.merge_jobs([listing("j5", "React Engineer", "react javascript css")])
+    assert filters == [{"user_id": {"$in": ["ben"]}}]
+
+
+def test_feeds_rebuilt_after_the_cache_loaded_are_merged_too(db, engine):
+    engine.rebuild_all()
+    engine._profile_snapshot()
+    db.users.insert_one({"id": "cat", "career_path_id": "data"})
+    engine.rebuild_user("cat")
+    engine.merge_jobs([listing("j6", "Data Scientist", "python sql statistics machine learning")])
+    assert "j6" in [item["id"] for item in feed(db, "cat")["items"]]
@@ -0,0 +1,48 @@
+import pytest
+
+import salary
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("$65,000 - $120,000", (65000, 120000)),
+    ("$20/hour", (41600, 41600)),
+    ("$15-25/hour", (31200, 52000)),
+    ("$5k", (5000, 5000)),
+    ("$90k+", (90000, 90000)),
+    ("$4,000 per month", (48000, 48000)),
+    ("$85,000 a year", (85000, 85000)),
+    (72000, (72000, 72000)),
+])
+def test_parse_salary_annualizes_ranges(text, expected):
+    assert salary.parse_salary(text) == expected
+
+
+@pytest.mark.parametrize("text", [None, "", "Salary not specified", "N/A", "Competitive", "DOE"])
+def test_unparseable_salaries_are_none(text):
+    assert salary.parse_salary(text) == (None, None)
+    assert salary.salary_fields(text) == {"salary_min": None, "salary_max": None}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("13% growth (faster than average)", 13.0),
+    ("2.5% growth", 2.5),
+    ("3% decline", -3.0),
+    ("Little or no change", None),
+    ("", None),
+    (None, None),
+])
+def test_parse_growth(text, expected):
+    assert salary.parse_growth(text) == expected
+
+
+def test_search_filters_on_min_salary_and_sorts_by_salary(api):
+    response = api.post("/api/jobs/search", json={"query": "developer", "min_salary": 50000, "sort": "salary"})
+    assert response.status_code == 200, response.text
+    results = response.json()["results"]
+    # The $20/hour internship annualizes to $41,600 and is filtered out
+    assert [(job["salary_min"], job["salary_max"]) for job in results] == [(70000, 90000), (60000, 80000)]
+
+
+def test_search_rejects_an_unknown_sort(api):
+    response = api.post("/api/jobs/search", json={"query": "developer", "sort": "salary_desc"})
+    assert response.status_code == 400
@@ -0,0 +1,15 @@
+import metrics
+import shmcache
+
+
+def test_unrecorded_lookups_leave_the_hit_and_miss_counters_alone():
+    cache = shmcache.cache_from_env()
+    cache.set("peek", "a", {"id": 1}, 60)
+    hits, misses = metrics.CACHE_REQUESTS.value("peek", "hit"), metrics.CACHE_REQUESTS.value("peek", "miss")
+    assert cache.get("peek", "a", record=False) == {"id": 1}
+    assert cache.get("peek", "b", record=False) is None
+    assert (metrics.CACHE_REQUESTS.value("peek", "hit"), metrics.CACHE_REQUESTS.value("peek", "miss")) == (hits, misses)
+    cache.get("peek", "a")
+    cache.get("peek", "b")
+    assert metrics.CACHE_REQUESTS.value("peek", "hit") == hits + 1
+    assert metrics.CACHE_REQUESTS.value("peek", "miss") == misses + 1
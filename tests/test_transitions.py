@@ -0,0 +1,62 @@
+import math
+import random
+
+import transitions
+
+SKILLS = ["python", "sql", "react", "css", "docker", "kubernetes", "statistics", "security", "linux", "go"]
+
+
+def paths(count, seed=3):
+    rng = random.Random(seed)
+    return [{"id": f"p{i}", "title": f"Path {i}", "skills": rng.sample(SKILLS, 3),
+             "roadmap": [{"duration": f"{rng.randrange(1, 8)} weeks"}]} for i in range(count)]
+
+
+def walked(graph, from_id):
+    """``reachable`` computed by following next hops, as it was before precomputation."""
+    state = graph._state
+    a = state.index[from_id]
+    targets = []
+    for b in sorted(range(len(state.nodes)), key=lambda b: state.dist[a, b]):
+        if b == a or not math.isfinite(state.dist[a, b]):
+            continue
+        hops, current = 0, a
+        while current != b:
+            current, hops = int(state.next_hop[current, b]), hops + 1
+        targets.append((state.nodes[b].id, round(float(state.dist[a, b]), 1), hops))
+    return targets
+
+
+def summary(targets):
+    return [(target["id"], target["total_weeks"], target["hops"]) for target in targets]
+
+
+def test_reachable_matches_walking_next_hops():
+    graph = transitions.TransitionGraph()
+    graph.rebuild(paths(40))
+    for node in graph._state.nodes:
+        assert sorted(summary(graph.reachable(node.id))) == sorted(walked(graph, node.id))
+
+
+def test_reachable_is_cheapest_first_and_tracks_updates():
+    graph = transitions.TransitionGraph()
+    graph.rebuild(paths(10))
+    graph.update({"id": "new", "title": "New", "skills": ["python", "sql", "react"],
+                  "roadmap": [{"duration": "1 week"}]})
+    targets = graph.reachable("new")
+    weeks = [target["total_weeks"] for target in targets]
+    assert weeks == sorted(weeks)
+    assert sorted(summary(targets)) == sorted(walked(graph, "new"))
+    assert graph.reachable("missing") is None
+
+
+def test_hop_counts_follow_the_route():
+    graph = transitions.TransitionGraph(overhead_weeks=10)
+    graph.rebuild([
+        {"id": "a", "title": "A", "skills": ["python", "sql"]},
+        {"id": "b", "title": "B", "skills": ["sql", "docker"]},
+        {"id": "c", "title": "C", "skills": ["docker", "go"]},
+    ])
+    by_id = {target["id"]: target for target in graph.reachable("a")}
+    assert by_id["b"]["hops"] == 1
+    assert by_id["c"]["hops"] == len(graph.route("a", "c")["steps"]) == 2